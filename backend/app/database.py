@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 import os
@@ -12,6 +14,104 @@ Base = declarative_base()
 # URL de la base de données (SQLite pour le développement)
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./drone_delivery.db")
 
+# Pilotes asynchrones utilisés quand DATABASE_URL n'en précise pas
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def async_database_url(url: str) -> str:
+    """Déduit l'URL asynchrone (aiosqlite, asyncpg...) de DATABASE_URL"""
+    parsed = make_url(url)
+    if "+" in parsed.drivername:
+        return url
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def pool_options(url: str) -> dict:
+    """Options du pool de connexions, configurables par variables d'environnement"""
+    if make_url(url).get_backend_name() == "sqlite" and not is_sqlite_file(url):
+        # Base en mémoire : une seule connexion partagée, pas de pool dimensionnable
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+    }
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+
+# Mode production SQLite : WAL, pragmas réglés, moteurs de lecture et d'écriture séparés
+SQLITE_PRODUCTION = _env_bool("SQLITE_PRODUCTION", False) and is_sqlite_file(DATABASE_URL)
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))  # par connexion
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # octets
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def sqlite_pragmas(read_only: bool = False) -> list:
+    """
+    PRAGMA posés à chaque nouvelle connexion SQLite.
+    WAL : les lecteurs ne bloquent pas l'écrivain ni l'inverse ; synchronous=NORMAL ne
+    synchronise le disque qu'aux checkpoints (une transaction validée peut être perdue
+    en cas de coupure de courant, jamais la base corrompue).
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # Persistant dans le fichier : posé par les connexions d'écriture, hérité par les lecteurs
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+    return pragmas
+
+
+def configure_sqlite(engine, read_only: bool = False):
+    """
+    Branche les pragmas sur l'événement connect d'un moteur (synchrone ou asynchrone).
+    Les transactions sont ouvertes explicitement (BEGIN IMMEDIATE pour l'écriture : le
+    verrou est pris dès le début, sans conversion lecture → écriture qui finirait en
+    « database is locked ») ; cela rend aussi les SAVEPOINT fiables avec pysqlite.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in sqlite_pragmas(read_only):
+            cursor.execute(pragma)
+        cursor.close()
+
+    @event.listens_for(sync_engine, "begin")
+    def begin(connection):
+        connection.exec_driver_sql("BEGIN" if read_only else "BEGIN IMMEDIATE")
+
+
+# Moteur synchrone : migrations et scripts (benchmarks, outils en ligne de commande)
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
@@ -19,21 +119,50 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Moteur asynchrone d'écriture : file d'écriture (app.services.writer), par laquelle passent
+# les routes d'écriture, le planificateur et la télémétrie. En mode production SQLite, une
+# seule connexion : les écritures du processus se suivent au lieu de se disputer le verrou du fichier.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **(dict(pool_options(ASYNC_DATABASE_URL), pool_size=1, max_overflow=0)
+       if SQLITE_PRODUCTION else pool_options(ASYNC_DATABASE_URL))
+)
+
+# Moteur asynchrone de lecture : routes GET et exports. Hors mode production SQLite,
+# c'est le même moteur que l'écriture.
+async_read_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **pool_options(ASYNC_DATABASE_URL)
+) if SQLITE_PRODUCTION else async_engine
+
+if SQLITE_PRODUCTION:
+    configure_sqlite(engine)
+    configure_sqlite(async_engine)
+    configure_sqlite(async_read_engine, read_only=True)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+) if SQLITE_PRODUCTION else AsyncSessionLocal
+
 
 def init_db():
-    """Initialise la base de données"""
-    # Import all models to make sure they are registered with Base
-    from app.models import Mission, Drone, ZoneDeVol, HistoriqueMission
-    
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
-
-
-def get_db():
-    """Dépendance pour obtenir une session de base de données"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    """Initialise la base de données en appliquant les migrations manquantes"""
+    from app import migrations
 
+    migrations.upgrade(engine)
+
+
+async def get_read_db():
+    """Dépendance des routes en lecture seule : session sur le moteur de lecture"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -1,31 +1,76 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app import database
-from app.routes import missions, drones, zones, historique
+from app.routes import (
+    missions, drones, zones, historique, stats, events, search, telemetrie, simulation, metrics as metrics_routes
+)
+from app.services import admission, cache, metrics, pagination
+from app.services.scheduler import SCHEDULER_ENABLED, scheduler
+from app.services.telemetry import store as telemetry_store
+from app.services.writer import WRITE_QUEUE_ENABLED, writer
 
 # Initialiser la base de données
 database.init_db()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # File d'écriture à validation groupée (mode production SQLite)
+    if WRITE_QUEUE_ENABLED:
+        await writer.start()
+    # Planificateur d'attribution : file reconstruite depuis la base, puis tours périodiques
+    if SCHEDULER_ENABLED:
+        await scheduler.start()
+    # Télémétrie : écriture périodique en lot des échantillons reçus
+    await telemetry_store.start()
+    yield
+    await telemetry_store.stop()
+    await scheduler.stop()
+    await writer.stop()
+
+
 app = FastAPI(
     title="Drone Delivery API",
     description="API pour la gestion de livraisons par drone en situation de crise",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
-# Configuration CORS pour permettre les requêtes depuis Flutter
+# Contrôle d'admission par classe de route ; sous les métriques, qui comptent aussi les refus
+if admission.ADMISSION_ENABLED:
+    app.add_middleware(admission.AdmissionMiddleware)
+
+# Configuration CORS pour permettre les requêtes depuis Flutter ; ajoutée après l'admission,
+# donc exécutée avant : les refus 429/503 portent aussi les en-têtes CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # En production, spécifier les origines autorisées
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        pagination.NEXT_CURSOR_HEADER, pagination.TOTAL_COUNT_HEADER, "ETag", cache.CACHE_STATUS_HEADER, "Retry-After"
+    ],
 )
 
+# Mesures par requête (latence, requêtes SQL) ; ajouté en dernier, donc exécuté en premier
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(database.async_engine)
+if database.async_read_engine is not database.async_engine:
+    metrics.instrument_engine(database.async_read_engine)
+
 # Inclure toutes les routes
 app.include_router(missions.router)
 app.include_router(drones.router)
 app.include_router(zones.router)
 app.include_router(historique.router)
+app.include_router(stats.router)
+app.include_router(events.router)
+app.include_router(search.router)
+app.include_router(telemetrie.router)
+app.include_router(simulation.router)
+app.include_router(metrics_routes.router)
 
 
 @app.get("/")
@@ -38,7 +83,14 @@ def root():
             "Gestion des missions",
             "Gestion des drones", 
             "Gestion des zones de vol",
-            "Historique des missions"
+            "Historique des missions",
+            "Statistiques agrégées",
+            "Événements temps réel (SSE, WebSocket)",
+            "Métriques Prometheus (/metrics)",
+            "Planificateur d'attribution par priorité",
+            "Recherche plein texte (/api/search)",
+            "Télémétrie des drones (/api/telemetrie, HTTP et WebSocket)",
+            "Simulation de capacité de la flotte (/api/simulation)"
         ]
     }
 
@@ -0,0 +1,174 @@
+"""
+Migrations versionnées du schéma.
+
+Chaque migration porte un numéro croissant et n'est appliquée qu'une fois ;
+la version courante est enregistrée dans la table `schema_version`.
+Les migrations sont idempotentes afin de pouvoir reprendre une base créée
+par l'ancien `create_all` (sans table de version).
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, text
+from app.database import Base
+
+_version_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Index secondaires sur les colonnes filtrées par les routes
+HOT_INDEXES = (
+    "ix_missions_status_priority_created_at",
+    "ix_missions_category",
+    "ix_drones_statut",
+    "ix_zones_de_vol_risque",
+    "ix_historique_missions_mission_id",
+    "ix_historique_missions_drone_id_date",
+)
+
+
+def get_index(name: str):
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(name)
+
+
+def create_indexes(connection, names=HOT_INDEXES):
+    for name in names:
+        get_index(name).create(connection, checkfirst=True)
+
+
+def drop_indexes(connection, names=HOT_INDEXES):
+    for name in names:
+        get_index(name).drop(connection, checkfirst=True)
+
+
+def _initial_schema(connection):
+    inspector = inspect(connection)
+    if inspector.has_table("missions"):
+        columns = {column["name"] for column in inspector.get_columns("missions")}
+        # Première version du schéma (type_materiel, urgence...) : conservée à part
+        if "title" not in columns:
+            # Copie plutôt que RENAME, qui réécrirait les clés étrangères de historique_missions
+            connection.execute(text("CREATE TABLE missions_legacy AS SELECT * FROM missions"))
+            connection.execute(text("DROP TABLE missions"))
+    Base.metadata.create_all(bind=connection)
+
+
+def _add_mission_zone(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("missions")}
+    if "zone_id" not in columns:
+        connection.execute(text(
+            "ALTER TABLE missions ADD COLUMN zone_id INTEGER REFERENCES zones_de_vol (zone_id)"
+        ))
+
+
+def _hot_indexes(connection):
+    create_indexes(connection)
+
+
+def _add_columns(connection, table: str, *names: str):
+    """Ajoute les colonnes du modèle absentes de la table (types compilés pour le dialecte)"""
+    existing = {column["name"] for column in inspect(connection).get_columns(table)}
+    for name in names:
+        if name not in existing:
+            column_type = Base.metadata.tables[table].c[name].type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
+
+
+def _geo_columns(connection):
+    _add_columns(connection, "zones_de_vol", "polygone")
+    _add_columns(connection, "missions", "departure_lat", "departure_lon", "arrival_lat", "arrival_lon")
+
+
+def _full_text_search(connection):
+    from app.services import search
+
+    search.install(connection)
+
+
+def _performance_rollups(connection):
+    from app.services import rollups
+
+    rollups.install(connection)
+
+
+def _mission_sync(connection):
+    from app.models import MissionSupprimee
+
+    MissionSupprimee.__table__.create(connection, checkfirst=True)
+    # Les lignes sans updated_at échapperaient aux comparaisons de la synchronisation
+    connection.execute(
+        text("UPDATE missions SET updated_at = coalesce(created_at, :now) WHERE updated_at IS NULL"),
+        {"now": datetime.utcnow()}
+    )
+    create_indexes(connection, ("ix_missions_updated_at_mission_id",))
+
+
+def _row_versions(connection):
+    for table in ("missions", "drones"):
+        _add_columns(connection, table, "version")
+        connection.execute(text(f"UPDATE {table} SET version = 1 WHERE version IS NULL"))
+
+
+def _rollup_triggers(connection):
+    from app.services import rollups
+
+    # Triggers PostgreSQL et déplacement entre zones ; la reconstruction corrige la dérive passée
+    rollups.install(connection)
+
+
+def _numeric_drone_ids(connection):
+    # missions.drone_id est du texte converti en entier par la jointure Mission.drone :
+    # les anciennes valeurs non numériques ("AUTO", "") feraient échouer CAST sous PostgreSQL
+    if connection.dialect.name == "postgresql":
+        condition = "drone_id !~ '^[0-9]+$'"
+    else:
+        condition = "drone_id = '' OR drone_id GLOB '*[^0-9]*'"
+    connection.execute(text(f"UPDATE missions SET drone_id = NULL WHERE drone_id IS NOT NULL AND ({condition})"))
+
+
+MIGRATIONS = [
+    (1, "Schéma initial", _initial_schema),
+    (2, "Colonne missions.zone_id", _add_mission_zone),
+    (3, "Index sur les colonnes filtrées", _hot_indexes),
+    (4, "Polygones des zones et coordonnées des missions", _geo_columns),
+    (5, "Index plein texte des missions et de l'historique (FTS5)", _full_text_search),
+    (6, "Statistiques de performance par drone et par zone", _performance_rollups),
+    (7, "Index missions.updated_at et journal des suppressions (synchronisation)", _mission_sync),
+    (8, "Colonnes version des missions et des drones (concurrence optimiste)", _row_versions),
+    (9, "Statistiques par drone et par zone : triggers PostgreSQL et changements de zone", _rollup_triggers),
+    (10, "missions.drone_id : valeurs non numériques remises à NULL", _numeric_drone_ids),
+]
+
+
+def current_version(connection) -> int:
+    _version_metadata.create_all(bind=connection)
+    version = connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    return version or 0
+
+
+def upgrade(engine, target=None):
+    """Applique les migrations manquantes, chacune dans sa propre transaction"""
+    # Importer tous les modèles pour les enregistrer dans Base
+    from app import models  # noqa: F401
+
+    with engine.begin() as connection:
+        version = current_version(connection)
+
+    for number, description, migrate in MIGRATIONS:
+        if number <= version or (target is not None and number > target):
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(
+                schema_version.insert().values(
+                    version=number, description=description, applied_at=datetime.utcnow()
+                )
+            )
@@ -1,13 +1,15 @@
 # Package models
-from .mission import Mission, MissionCategory, StatutMission, Priority, Risk
+from .mission import Mission, MissionSupprimee, MissionCategory, StatutMission, Priority, Risk
 from .drone import Drone, StatutDrone
 from .zone_vol import ZoneDeVol, TypeZone
 from .historique import HistoriqueMission
+from .statistiques import StatistiquesDrone, StatistiquesZone
 
 __all__ = [
-    'Mission', 'MissionCategory', 'StatutMission', 'Priority', 'Risk',
+    'Mission', 'MissionSupprimee', 'MissionCategory', 'StatutMission', 'Priority', 'Risk',
     'Drone', 'StatutDrone',
     'ZoneDeVol', 'TypeZone',
-    'HistoriqueMission'
+    'HistoriqueMission',
+    'StatistiquesDrone', 'StatistiquesZone'
 ]
 
@@ -20,9 +20,16 @@ class Drone(Base):
     autonomie_max = Column(Float, nullable=False)  # en km
     vitesse_max = Column(Float, nullable=False)  # en km/h
     niveau_securite = Column(Integer, nullable=False)  # niveau de sécurité (échelle de 1 à 5)
-    statut = Column(String(50), default=StatutDrone.DISPONIBLE.value)
+    statut = Column(String(50), default=StatutDrone.DISPONIBLE.value, index=True)
     zone_vol_autorisee = Column(String(255), nullable=True)  # zones où le drone peut voler
+    # Contrôle de concurrence optimiste : incrémentée à chaque écriture (ETag des routes)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     # Relations
-    missions = relationship("Mission", back_populates="drone")
+    missions = relationship(
+        "Mission",
+        back_populates="drone",
+        primaryjoin="cast(Drone.drone_id, String) == foreign(Mission.drone_id)",
+        viewonly=True
+    )
     historique_missions = relationship("HistoriqueMission", back_populates="drone")
\ No newline at end of file
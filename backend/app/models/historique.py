@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -6,9 +6,13 @@ from datetime import datetime
 
 class HistoriqueMission(Base):
     __tablename__ = "historique_missions"
+    __table_args__ = (
+        # /drone/{drone_id}, trié par date
+        Index("ix_historique_missions_drone_id_date", "drone_id", "date"),
+    )
 
     historique_id = Column(Integer, primary_key=True, index=True)
-    mission_id = Column(Integer, ForeignKey("missions.mission_id"), nullable=False)
+    mission_id = Column(Integer, ForeignKey("missions.mission_id"), nullable=False, index=True)
     drone_id = Column(Integer, ForeignKey("drones.drone_id"), nullable=False)
     date = Column(DateTime, default=datetime.utcnow)
     performance = Column(String(255), nullable=True)  # performance de la mission (réussie, retard, échec)
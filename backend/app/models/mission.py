@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -35,10 +35,16 @@ class Risk(str, enum.Enum):
 
 class Mission(Base):
     __tablename__ = "missions"
+    __table_args__ = (
+        # /status/{status} et la file d'attribution (statut, puis priorité et ancienneté)
+        Index("ix_missions_status_priority_created_at", "status", "priority", "created_at"),
+        # Synchronisation incrémentale : lignes modifiées après (updated_at, mission_id)
+        Index("ix_missions_updated_at_mission_id", "updated_at", "mission_id"),
+    )
 
     mission_id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)  # titre de la mission
-    category = Column(String(50), nullable=False)  # catégorie de mission
+    category = Column(String(50), nullable=False, index=True)  # catégorie de mission
     drone_id = Column(String(50), nullable=True)  # ID du drone assigné
     priority = Column(String(50), nullable=False)  # niveau de priorité
     status = Column(String(50), default=StatutMission.PENDING.value)
@@ -50,12 +56,38 @@ class Mission(Base):
     start_date = Column(DateTime, nullable=True)  # date de début planifiée
     departure = Column(String(255), nullable=True)  # point de départ
     arrival = Column(String(255), nullable=True)  # point d'arrivée
+    zone_id = Column(Integer, ForeignKey("zones_de_vol.zone_id"), nullable=True)  # zone de vol survolée
+    departure_lat = Column(Float, nullable=True)  # coordonnées du point de départ
+    departure_lon = Column(Float, nullable=True)
+    arrival_lat = Column(Float, nullable=True)  # coordonnées du point d'arrivée
+    arrival_lon = Column(Float, nullable=True)
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Contrôle de concurrence optimiste : incrémentée à chaque écriture (ETag des routes)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Relations (conservées pour compatibilité)
     zone = relationship("ZoneDeVol", back_populates="missions", foreign_keys="Mission.zone_id")
+    # drone_id est stocké en texte : il est converti en entier pour que la jointure
+    # (et selectinload) utilise la clé primaire des drones
+    drone = relationship(
+        "Drone",
+        back_populates="missions",
+        primaryjoin="cast(foreign(Mission.drone_id), Integer) == Drone.drone_id",
+        viewonly=True
+    )
     historique = relationship("HistoriqueMission", back_populates="mission")
 
+
+
+class MissionSupprimee(Base):
+    """Journal des suppressions de missions, relu par la synchronisation incrémentale"""
+    __tablename__ = "missions_supprimees"
+    # AUTOINCREMENT : un numéro n'est jamais réutilisé, même après la purge des plus anciens
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True)  # ordre des suppressions
+    mission_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
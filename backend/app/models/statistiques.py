@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from app.database import Base
+
+
+class _Compteurs:
+    """Compteurs cumulés depuis l'historique, tenus à jour par triggers (services/rollups.py)"""
+    missions = Column(Integer, nullable=False, default=0)  # enregistrements d'historique
+    reussies = Column(Integer, nullable=False, default=0)
+    retards = Column(Integer, nullable=False, default=0)
+    echecs = Column(Integer, nullable=False, default=0)
+    autres = Column(Integer, nullable=False, default=0)  # performance absente ou non reconnue
+    duree_totale = Column(Float, nullable=False, default=0)  # somme des durées estimées (minutes)
+    durees = Column(Integer, nullable=False, default=0)  # missions dont la durée est connue
+    derniere_mission = Column(DateTime, nullable=True)  # date du dernier enregistrement
+
+
+class StatistiquesDrone(_Compteurs, Base):
+    __tablename__ = "statistiques_drones"
+
+    drone_id = Column(Integer, ForeignKey("drones.drone_id"), primary_key=True)
+
+
+class StatistiquesZone(_Compteurs, Base):
+    __tablename__ = "statistiques_zones"
+
+    zone_id = Column(Integer, ForeignKey("zones_de_vol.zone_id"), primary_key=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Integer, String, Text, JSON
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -20,8 +20,9 @@ class ZoneDeVol(Base):
     zone_id = Column(Integer, primary_key=True, index=True)
     nom_zone = Column(String(255), nullable=False)  # nom de la zone (ex: Zone A, Zone B)
     type_zone = Column(String(255), nullable=False)  # type de zone
-    risque = Column(Integer, nullable=False)  # niveau de risque dans cette zone (échelle de 1 à 5)
+    risque = Column(Integer, nullable=False, index=True)  # niveau de risque dans cette zone (échelle de 1 à 5)
     restrictions = Column(Text, nullable=True)  # détails sur les restrictions spécifiques à la zone
+    polygone = Column(JSON, nullable=True)  # contour de la zone : liste de [latitude, longitude]
 
     # Relations
     missions = relationship("Mission", back_populates="zone")
\ No newline at end of file
@@ -1,86 +1,162 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.database import get_read_db
 from app.schemas.drone import DroneCreate, DroneResponse, DroneUpdate
-from app.models.drone import Drone
+from app.models.drone import Drone, StatutDrone
+from app.models.historique import HistoriqueMission
+from app.services import cache, concurrency, eligibility, events, fastjson, stats, pagination, persistence
+from app.services.events import hub
+from app.services.scheduler import scheduler
+from app.services.writer import writer
 from datetime import datetime
 
 router = APIRouter(prefix="/api/drones", tags=["drones"])
 
 
 @router.post("/", response_model=DroneResponse, status_code=status.HTTP_201_CREATED)
-def create_drone(drone: DroneCreate, db: Session = Depends(get_db)):
+async def create_drone(drone: DroneCreate):
     """
     Créer un nouveau drone
     """
-    db_drone = Drone(**drone.dict())
-    db.add(db_drone)
-    db.commit()
-    db.refresh(db_drone)
+    async def write(db: AsyncSession) -> Drone:
+        db_drone = Drone(**drone.dict())
+        db.add(db_drone)
+        return db_drone
+
+    db_drone = await writer.submit(write)
+    pagination.invalidate_count(Drone)
+    stats.invalidate()
+    await cache.invalidate(cache.DRONES)
+    eligibility.index_drone(db_drone)
+    scheduler.wake()
+    hub.publish(events.DRONE_CREATED, events.drone_payload(db_drone))
     return db_drone
 
 
 @router.get("/", response_model=List[DroneResponse])
-def get_drones(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_drones(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Récupérer tous les drones
+    Pagination par curseur : renvoyer l'en-tête X-Next-Cursor dans le paramètre `cursor`
+    Réponse mise en cache ; l'en-tête If-None-Match permet d'obtenir un 304
     """
-    drones = db.query(Drone).offset(skip).limit(limit).all()
-    return drones
+    async def load():
+        drones = await pagination.paginate(db, fastjson.select_schema(DroneResponse, Drone), Drone.drone_id, response, cursor=cursor, limit=limit, skip=skip)
+        if with_total:
+            await pagination.set_total(response, db, Drone)
+        return drones
+
+    return await cache.cached_json(request, response, cache.DRONES, load)
 
 
 @router.get("/disponibles", response_model=List[DroneResponse])
-def get_available_drones(db: Session = Depends(get_db)):
+async def get_available_drones(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
     """
     Récupérer tous les drones disponibles
     """
-    drones = db.query(Drone).filter(Drone.statut == "disponible").all()
-    return drones
+    async def load():
+        return await fastjson.fetch(db, fastjson.select_schema(DroneResponse, Drone).where(Drone.statut == "disponible"))
+
+    return await cache.cached_json(request, response, cache.DRONES, load)
+
+
+@router.get("/eligibles", response_model=List[DroneResponse])
+async def get_eligible_drones(
+    zone_id: Optional[int] = None,
+    poids: float = 0,
+    securite: int = 1,
+    autonomie: Optional[float] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Drones disponibles autorisés dans la zone, de charge, de niveau de sécurité et d'autonomie suffisants
+    Triés du plus ajusté (plus petite capacité, puis plus faible niveau de sécurité) au moins ajusté
+    """
+    drone_ids = await eligibility.eligible_drones(db, zone_id, poids, securite, autonomie, limit)
+    if drone_ids is None:
+        raise HTTPException(status_code=404, detail="Zone non trouvée")
+    if not drone_ids:
+        return fastjson.json_response([])
+    rows = await fastjson.fetch(db, fastjson.select_schema(DroneResponse, Drone).where(Drone.drone_id.in_(drone_ids)))
+    by_id = {row["drone_id"]: row for row in rows}
+    return fastjson.json_response([by_id[drone_id] for drone_id in drone_ids if drone_id in by_id])
 
 
 @router.get("/{drone_id}", response_model=DroneResponse)
-def get_drone(drone_id: int, db: Session = Depends(get_db)):
+async def get_drone(drone_id: int, response: Response, db: AsyncSession = Depends(get_read_db)):
     """
     Récupérer un drone spécifique par son ID
+    L'en-tête ETag porte la version du drone, à renvoyer dans If-Match lors d'un PATCH
     """
-    drone = db.query(Drone).filter(Drone.drone_id == drone_id).first()
+    drone = await db.get(Drone, drone_id)
     if drone is None:
         raise HTTPException(status_code=404, detail="Drone non trouvé")
+    concurrency.set_etag(response, drone)
     return drone
 
 
 @router.patch("/{drone_id}", response_model=DroneResponse)
-def update_drone(
+async def update_drone(
     drone_id: int,
     drone_update: DroneUpdate,
-    db: Session = Depends(get_db)
+    response: Response,
+    if_match: Optional[str] = Header(None)
 ):
     """
     Mettre à jour un drone
+    Avec If-Match (ETag de la dernière lecture), 409 si le drone a été modifié entre-temps
     """
-    db_drone = db.query(Drone).filter(Drone.drone_id == drone_id).first()
+    try:
+        db_drone = await writer.submit(lambda db: persistence.update_returning(
+            db, Drone, drone_id, drone_update.dict(exclude_unset=True), concurrency.expected_version(if_match)
+        ))
+    except persistence.VersionConflict as error:
+        raise concurrency.conflict(error, "Drone modifié par une autre requête")
     if db_drone is None:
         raise HTTPException(status_code=404, detail="Drone non trouvé")
-    
-    update_data = drone_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_drone, field, value)
-    
-    db.commit()
-    db.refresh(db_drone)
+
+    stats.invalidate()
+    await cache.invalidate(cache.DRONES)
+    eligibility.index_drone(db_drone)
+    concurrency.set_etag(response, db_drone)
+    if db_drone.statut == StatutDrone.DISPONIBLE.value:
+        # Drone libéré : les missions en attente n'attendent pas le prochain tour
+        scheduler.wake()
+    hub.publish(events.DRONE_UPDATED, events.drone_payload(db_drone))
     return db_drone
 
 
 @router.delete("/{drone_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_drone(drone_id: int, db: Session = Depends(get_db)):
+async def delete_drone(drone_id: int):
     """
     Supprimer un drone
     """
-    db_drone = db.query(Drone).filter(Drone.drone_id == drone_id).first()
-    if db_drone is None:
+    async def write(db: AsyncSession) -> bool:
+        db_drone = await db.get(Drone, drone_id, populate_existing=True)
+        if db_drone is None:
+            return False
+        # historique_missions.drone_id est obligatoire : l'historique n'est pas effacé avec le drone
+        if await db.scalar(select(HistoriqueMission.historique_id).where(HistoriqueMission.drone_id == drone_id).limit(1)):
+            raise HTTPException(status_code=409, detail="Drone présent dans l'historique : supprimer d'abord ses entrées")
+        await db.delete(db_drone)
+        return True
+
+    if not await writer.submit(write):
         raise HTTPException(status_code=404, detail="Drone non trouvé")
-    
-    db.delete(db_drone)
-    db.commit()
+    pagination.invalidate_count(Drone)
+    stats.invalidate()
+    await cache.invalidate(cache.DRONES)
+    eligibility.unindex_drone(drone_id)
+    hub.publish(events.DRONE_DELETED, {"drone_id": drone_id})
     return None
\ No newline at end of file
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.services.events import hub
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+HEARTBEAT_INTERVAL = 15.0  # secondes
+
+
+def _filters(type: Optional[str], status: Optional[str], category: Optional[str], drone_id: Optional[str]) -> dict:
+    return {"type": type, "status": status, "category": category, "drone_id": drone_id}
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    drone_id: Optional[str] = None
+):
+    """
+    Flux Server-Sent Events des créations, mises à jour et suppressions de missions et de drones
+    Filtres optionnels : type (mission, drone), status, category, drone_id
+    """
+    subscriber = hub.subscribe(_filters(type, status, category, drone_id))
+
+    async def event_source():
+        try:
+            yield ": connecté\n\n"
+            while not await request.is_disconnected():
+                message = await subscriber.get(timeout=HEARTBEAT_INTERVAL)
+                # Commentaire SSE : maintient la connexion ouverte à travers les proxys
+                yield f"data: {message}\n\n" if message is not None else ": ping\n\n"
+        finally:
+            hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    drone_id: Optional[str] = None
+):
+    """
+    Même flux que /stream, sur WebSocket
+    """
+    await websocket.accept()
+    subscriber = hub.subscribe(_filters(type, status, category, drone_id))
+    try:
+        while True:
+            message = await subscriber.get(timeout=HEARTBEAT_INTERVAL)
+            if message is None:
+                await websocket.send_json({"type": "ping"})
+            else:
+                await websocket.send_text(message)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+@router.get("/stats")
+async def get_event_stats():
+    """
+    Nombre d'abonnés et d'événements diffusés
+    """
+    return hub.stats()
@@ -1,94 +1,130 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+from app.database import get_read_db
 from app.schemas.historique import HistoriqueMissionCreate, HistoriqueMissionResponse, HistoriqueMissionUpdate
 from app.models.historique import HistoriqueMission
+from app.services import export, fastjson, pagination, persistence
+from app.services.writer import writer
 
 router = APIRouter(prefix="/api/historique", tags=["historique"])
 
 
 @router.post("/", response_model=HistoriqueMissionResponse, status_code=status.HTTP_201_CREATED)
-def create_historique(historique: HistoriqueMissionCreate, db: Session = Depends(get_db)):
+async def create_historique(historique: HistoriqueMissionCreate):
     """
     Créer un nouvel enregistrement d'historique
     """
-    db_historique = HistoriqueMission(**historique.dict())
-    db.add(db_historique)
-    db.commit()
-    db.refresh(db_historique)
+    async def write(db: AsyncSession) -> HistoriqueMission:
+        db_historique = HistoriqueMission(**historique.dict())
+        db.add(db_historique)
+        return db_historique
+
+    db_historique = await writer.submit(write)
+    pagination.invalidate_count(HistoriqueMission)
     return db_historique
 
 
 @router.get("/", response_model=List[HistoriqueMissionResponse])
-def get_historique(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_historique(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Récupérer l'historique des missions
+    Pagination par curseur : renvoyer l'en-tête X-Next-Cursor dans le paramètre `cursor`
     """
-    historique = db.query(HistoriqueMission).offset(skip).limit(limit).all()
-    return historique
+    query = fastjson.select_schema(HistoriqueMissionResponse, HistoriqueMission)
+    historique = await pagination.paginate(db, query, HistoriqueMission.historique_id, response, cursor=cursor, limit=limit, skip=skip)
+    if with_total:
+        await pagination.set_total(response, db, HistoriqueMission)
+    return fastjson.json_response(historique, response)
 
 
 @router.get("/mission/{mission_id}", response_model=List[HistoriqueMissionResponse])
-def get_historique_by_mission(mission_id: int, db: Session = Depends(get_db)):
+async def get_historique_by_mission(mission_id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Récupérer l'historique d'une mission spécifique
     """
-    historique = db.query(HistoriqueMission).filter(HistoriqueMission.mission_id == mission_id).all()
-    return historique
+    query = fastjson.select_schema(HistoriqueMissionResponse, HistoriqueMission).where(HistoriqueMission.mission_id == mission_id)
+    return fastjson.json_response(await fastjson.fetch(db, query))
 
 
 @router.get("/drone/{drone_id}", response_model=List[HistoriqueMissionResponse])
-def get_historique_by_drone(drone_id: int, db: Session = Depends(get_db)):
+async def get_historique_by_drone(drone_id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Récupérer l'historique d'un drone spécifique
     """
-    historique = db.query(HistoriqueMission).filter(HistoriqueMission.drone_id == drone_id).all()
-    return historique
+    query = fastjson.select_schema(HistoriqueMissionResponse, HistoriqueMission).where(HistoriqueMission.drone_id == drone_id)
+    return fastjson.json_response(await fastjson.fetch(db, query))
+
+
+@router.get("/export")
+async def export_historique(
+    format: str = export.NDJSON,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    drone_id: Optional[int] = None,
+    performance: Optional[str] = None,
+):
+    """
+    Exporter tout l'historique, joint aux missions et aux drones, en flux
+    Formats : ndjson, csv, colonnes (NDJSON par lots de colonnes), parquet (si pyarrow est installé)
+    Filtres : période [date_from, date_to[, drone, performance
+    """
+    query = export.build_query(date_from=date_from, date_to=date_to, drone_id=drone_id, performance=performance)
+    try:
+        body = export.stream(format, query)
+    except export.ExportUnavailable as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    filename = f"historique.{export.EXTENSIONS[format]}"
+    return StreamingResponse(
+        body,
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/{historique_id}", response_model=HistoriqueMissionResponse)
-def get_historique_entry(historique_id: int, db: Session = Depends(get_db)):
+async def get_historique_entry(historique_id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Récupérer un enregistrement d'historique spécifique
     """
-    historique = db.query(HistoriqueMission).filter(HistoriqueMission.historique_id == historique_id).first()
+    historique = await db.get(HistoriqueMission, historique_id)
     if historique is None:
         raise HTTPException(status_code=404, detail="Enregistrement d'historique non trouvé")
     return historique
 
 
 @router.patch("/{historique_id}", response_model=HistoriqueMissionResponse)
-def update_historique(
+async def update_historique(
     historique_id: int,
-    historique_update: HistoriqueMissionUpdate,
-    db: Session = Depends(get_db)
+    historique_update: HistoriqueMissionUpdate
 ):
     """
     Mettre à jour un enregistrement d'historique
     """
-    db_historique = db.query(HistoriqueMission).filter(HistoriqueMission.historique_id == historique_id).first()
+    db_historique = await writer.submit(lambda db: persistence.update_returning(
+        db, HistoriqueMission, historique_id, historique_update.dict(exclude_unset=True)
+    ))
     if db_historique is None:
         raise HTTPException(status_code=404, detail="Enregistrement d'historique non trouvé")
-    
-    update_data = historique_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_historique, field, value)
-    
-    db.commit()
-    db.refresh(db_historique)
+
     return db_historique
 
 
 @router.delete("/{historique_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_historique(historique_id: int, db: Session = Depends(get_db)):
+async def delete_historique(historique_id: int):
     """
     Supprimer un enregistrement d'historique
     """
-    db_historique = db.query(HistoriqueMission).filter(HistoriqueMission.historique_id == historique_id).first()
-    if db_historique is None:
+    if await writer.submit(lambda db: persistence.delete_returning(db, HistoriqueMission, historique_id)) is None:
         raise HTTPException(status_code=404, detail="Enregistrement d'historique non trouvé")
-    
-    db.delete(db_historique)
-    db.commit()
+    pagination.invalidate_count(HistoriqueMission)
     return None
\ No newline at end of file
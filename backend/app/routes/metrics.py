@@ -0,0 +1,47 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app import database
+from app.services import admission, eligibility, metrics
+from app.services.writer import writer
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Métriques au format texte Prometheus
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/metrics/slow-queries")
+def get_slow_queries():
+    """
+    Dernières requêtes SQL lentes (seuil SLOW_QUERY_MS), avec la route d'origine
+    """
+    return {"threshold_ms": metrics.SLOW_QUERY_MS, "queries": list(metrics.slow_queries)}
+
+
+@router.get("/metrics/write-queue")
+def get_write_queue():
+    """
+    État de la file d'écriture (mode production SQLite) : profondeur, transactions, jobs par transaction
+    """
+    return {"sqlite_production": database.SQLITE_PRODUCTION, **writer.status()}
+
+
+@router.get("/metrics/admission")
+def get_admission():
+    """
+    Contrôle d'admission : requêtes en cours, en attente, admises et délestées par classe
+    """
+    return {"enabled": admission.ADMISSION_ENABLED, **admission.controller.status()}
+
+
+@router.get("/metrics/eligibility")
+def get_eligibility():
+    """
+    Index d'éligibilité des drones : drones indexés, drones sans restriction, zones connues
+    """
+    return eligibility.index.status()
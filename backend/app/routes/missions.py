@@ -1,105 +1,429 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.schemas.mission import MissionCreate, MissionResponse, MissionUpdate
-from app.models.mission import Mission
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Literal, Optional, Tuple
+from app.database import get_read_db
+from app.schemas.mission import (
+    MissionCreate, MissionResponse, MissionUpdate, AssignmentResult, MissionAssignment,
+    MissionStatusUpdate, BulkMissionResult, BulkStatusResult, SchedulerStatus, MissionChanges
+)
+from app.schemas.zone_vol import ZoneDeVolResponse
+from app.schemas.route import RouteResponse, RouteBatchRequest, RouteBatchResult, RouteError
+from app.models.mission import Mission, StatutMission
+from app.models.drone import Drone
+from app.models.historique import HistoriqueMission
+from app.services import assignment, bulk, cache, concurrency, events, fastjson, stats, pagination, persistence, routing, spatial, sync
+from app.services.scheduler import QUEUE_COLUMNS, QueuedMission, scheduler
+from app.services.writer import writer
+from app.services.events import hub
 from datetime import datetime
 
 router = APIRouter(prefix="/api/missions", tags=["missions"])
 
+SANS_COORDONNEES = "La mission n'a pas de coordonnées de départ et d'arrivée"
+
+
+def _has_coordinates(mission: Mission) -> bool:
+    return None not in (mission.departure_lat, mission.departure_lon, mission.arrival_lat, mission.arrival_lon)
+
+
+def _route_response(planner: routing.RoutePlanner, mission: Mission) -> RouteResponse:
+    """`mission.drone` doit avoir été chargé (selectinload)"""
+    route = planner.plan((mission.departure_lat, mission.departure_lon), (mission.arrival_lat, mission.arrival_lon))
+    autonomie = mission.drone.autonomie_max if mission.drone is not None else None
+    return RouteResponse(
+        mission_id=mission.mission_id,
+        points=[{"lat": lat, "lon": lon} for lat, lon in route.points],
+        distance_km=round(route.distance_km, 3),
+        cost=round(route.cost, 3),
+        zone_ids=route.zone_ids,
+        drone_id=mission.drone_id,
+        autonomie_max=autonomie,
+        within_range=None if autonomie is None else route.distance_km <= autonomie
+    )
+
+
+def _plan_batch(planner: routing.RoutePlanner, ids: List[int], missions: dict) -> RouteBatchResult:
+    """Trajets d'un lot de missions chargées ; exécuté dans le pool de threads"""
+    result = RouteBatchResult()
+    for mission_id in ids:
+        mission = missions.get(mission_id)
+        if mission is None:
+            result.errors.append(RouteError(mission_id=mission_id, detail="Mission non trouvée"))
+        elif not _has_coordinates(mission):
+            result.errors.append(RouteError(mission_id=mission_id, detail=SANS_COORDONNEES))
+        else:
+            try:
+                result.routes.append(_route_response(planner, mission))
+            except routing.NoRouteError as error:
+                result.errors.append(RouteError(mission_id=mission_id, detail=str(error)))
+    return result
+
+
+async def _drones_released(drones: List[Drone]):
+    """Après commit : drones rendus par des missions closes, proposés au planificateur"""
+    if not drones:
+        return
+    await cache.invalidate(cache.DRONES)
+    scheduler.wake()
+    hub.publish_many(events.DRONE_UPDATED, (events.drone_payload(drone) for drone in drones))
+
 
 @router.post("/", response_model=MissionResponse, status_code=status.HTTP_201_CREATED)
-def create_mission(mission: MissionCreate, db: Session = Depends(get_db)):
+async def create_mission(mission: MissionCreate):
     """
     Créer une nouvelle mission
     """
     mission_data = mission.dict()
     
     # Ajouter des valeurs par défaut
-    mission_data['drone_id'] = 'AUTO'  # Assignation automatique à implémenter
     if not mission_data.get('estimated_duration'):
-        mission_data['estimated_duration'] = 30  # Durée par défaut
+        mission_data['estimated_duration'] = assignment.DUREE_PAR_DEFAUT
     
-    db_mission = Mission(**mission_data)
-    db.add(db_mission)
-    db.commit()
-    db.refresh(db_mission)
+    async def write(db: AsyncSession) -> Tuple[Mission, Optional[Drone]]:
+        db_mission = Mission(**mission_data)
+        # Attribution automatique : la mission reste en attente si aucun drone ne convient
+        drone = await assignment.assign_mission(db, db_mission)
+        db.add(db_mission)
+        return db_mission, drone
+
+    # Validée avec les créations concurrentes (file d'écriture) ou seule
+    db_mission, drone = await writer.submit(write)
+    pagination.invalidate_count(Mission)
+    stats.invalidate()
+    hub.publish(events.MISSION_CREATED, events.mission_payload(db_mission))
+    # Sans drone disponible, la mission attend dans la file du planificateur
+    scheduler.sync(db_mission)
+    if drone is not None:
+        await cache.invalidate(cache.DRONES)
+        hub.publish(events.DRONE_UPDATED, events.drone_payload(drone))
     
     return db_mission
 
 
+@router.post("/assign", response_model=AssignmentResult)
+async def assign_pending_missions(limit: Optional[int] = None, db: AsyncSession = Depends(get_read_db)):
+    """
+    Attribuer en lot les missions en attente aux drones disponibles
+    """
+    assigned, unassigned = await writer.submit(lambda write_db: assignment.assign_pending_missions(write_db, limit=limit))
+    scheduler.discard(*(mission_id for mission_id, _ in assigned))
+    if assigned:
+        stats.invalidate()
+        await cache.invalidate(cache.DRONES)
+        await assignment.publish_assignments(db, assigned)
+    return AssignmentResult(
+        assigned=[MissionAssignment(mission_id=m, drone_id=d) for m, d in assigned],
+        unassigned=unassigned
+    )
+
+
+@router.post("/bulk", response_model=BulkMissionResult, status_code=status.HTTP_201_CREATED)
+async def create_missions_bulk(
+    request: Request,
+    assign: bool = True,
+    atomic: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Importer des missions en lot (tableau JSON ou NDJSON)
+    Les lignes valides sont insérées dans une seule transaction ; les lignes invalides
+    sont signalées par leur index. Avec `atomic=true`, aucune ligne n'est insérée en cas d'erreur.
+    """
+    try:
+        rows = bulk.parse_rows(await request.body(), request.headers.get("content-type", ""))
+    except bulk.PayloadError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    valid, errors = bulk.validate_rows(rows, MissionCreate)
+    if not valid or (atomic and errors):
+        return BulkMissionResult(errors=errors)
+
+    now = datetime.utcnow()
+    values = []
+    for _, mission in valid:
+        mission_data = mission.dict()
+        if not mission_data.get('estimated_duration'):
+            mission_data['estimated_duration'] = assignment.DUREE_PAR_DEFAUT
+        mission_data.update(status=StatutMission.PENDING.value, created_at=now, updated_at=now)
+        values.append(mission_data)
+
+    # INSERT multi-lignes (executemany) au niveau Core ; RETURNING fournit les IDs créés.
+    # Trier RETURNING dans l'ordre des paramètres impose un repli ligne à ligne, bien plus lent :
+    # l'ordre n'étant pas garanti, RETURNING renvoie aussi les colonnes de la file d'attribution.
+    async def write(write_db: AsyncSession) -> list:
+        return (await write_db.execute(insert(Mission.__table__).returning(*QUEUE_COLUMNS), values)).all()
+
+    created_rows = await writer.submit(write)
+    mission_ids = [row.mission_id for row in created_rows]
+    pagination.invalidate_count(Mission)
+    stats.invalidate()
+    if hub.subscribers:
+        created = (await db.execute(select(Mission).where(Mission.mission_id.in_(mission_ids)))).scalars()
+        hub.publish_many(events.MISSION_CREATED, (events.mission_payload(m) for m in created))
+    scheduler.push_many(QueuedMission(*row) for row in created_rows)
+
+    assigned = []
+    if assign:
+        assigned, _ = await writer.submit(
+            lambda write_db: assignment.assign_pending_missions(write_db, mission_ids=mission_ids)
+        )
+        scheduler.discard(*(mission_id for mission_id, _ in assigned))
+        if assigned:
+            await cache.invalidate(cache.DRONES)
+            await assignment.publish_assignments(db, assigned)
+
+    return BulkMissionResult(inserted=len(mission_ids), mission_ids=mission_ids, assigned=len(assigned), errors=errors)
+
+
+@router.post("/routes", response_model=RouteBatchResult)
+async def plan_routes(request: RouteBatchRequest, db: AsyncSession = Depends(get_read_db)):
+    """
+    Calculer les trajets de plusieurs missions ; les missions en erreur sont signalées sans bloquer les autres
+    """
+    ids = list(dict.fromkeys(request.mission_ids))
+    query = select(Mission).where(Mission.mission_id.in_(ids)).options(selectinload(Mission.drone))
+    missions = {m.mission_id: m for m in (await db.execute(query)).scalars()}
+    planner = routing.get_planner(await spatial.get_zone_index(db))
+    # Jusqu'à 1000 recherches A* : hors de la boucle d'événements
+    return await run_in_threadpool(_plan_batch, planner, ids, missions)
+
+
+@router.patch("/bulk", response_model=BulkStatusResult)
+async def update_missions_status_bulk(request: Request, db: AsyncSession = Depends(get_read_db)):
+    """
+    Mettre à jour le statut de plusieurs missions (tableau JSON ou NDJSON de {mission_id, status})
+    """
+    try:
+        rows = bulk.parse_rows(await request.body(), request.headers.get("content-type", ""))
+    except bulk.PayloadError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    valid, errors = bulk.validate_rows(rows, MissionStatusUpdate)
+
+    async def write(write_db: AsyncSession) -> Tuple[List[dict], List[Drone]]:
+        # Une seule requête pour vérifier l'existence de toutes les missions
+        ids = {update_row.mission_id for _, update_row in valid}
+        existing = {}
+        if ids:
+            rows = await write_db.execute(
+                select(Mission.mission_id, Mission.drone_id).where(Mission.mission_id.in_(ids))
+            )
+            existing = {row.mission_id: row for row in rows}
+
+        now = datetime.utcnow()
+        values = []
+        for index, update_row in valid:
+            if update_row.mission_id not in existing:
+                errors.append({"index": index, "errors": [{"loc": ["mission_id"], "msg": "Mission non trouvée"}]})
+                continue
+            values.append({"mission_id": update_row.mission_id, "status": update_row.status.value, "updated_at": now})
+        if not values:
+            return values, []
+        await persistence.update_many(write_db, Mission, values)
+        released = await assignment.release_drones(write_db, (
+            existing[value["mission_id"]].drone_id for value in values
+            if value["status"] != StatutMission.IN_PROGRESS.value
+        ))
+        return values, released
+
+    values, released = await writer.submit(write)
+    if values:
+        stats.invalidate()
+        await _drones_released(released)
+        scheduler.discard(*(v["mission_id"] for v in values if v["status"] != StatutMission.PENDING.value))
+        await scheduler.reload(db, (v["mission_id"] for v in values if v["status"] == StatutMission.PENDING.value))
+        if hub.subscribers:
+            # Missions relues après commit : les abonnés reçoivent l'objet complet
+            updated = await db.execute(
+                select(Mission)
+                .where(Mission.mission_id.in_([value["mission_id"] for value in values]))
+                .execution_options(populate_existing=True)
+            )
+            hub.publish_many(events.MISSION_UPDATED, (events.mission_payload(m) for m in updated.scalars()))
+
+    errors.sort(key=lambda error: error["index"])
+    return BulkStatusResult(updated=len(values), errors=errors)
+
+
 @router.get("/", response_model=List[MissionResponse])
-def get_missions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_missions(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    order: Literal["asc", "desc"] = "asc",
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Récupérer toutes les missions
+    Pagination par curseur : renvoyer l'en-tête X-Next-Cursor dans le paramètre `cursor`
+    `order=desc` : les plus récentes d'abord (identifiant décroissant)
     """
-    missions = db.query(Mission).offset(skip).limit(limit).all()
-    return missions
+    query = fastjson.select_schema(MissionResponse, Mission)
+    missions = await pagination.paginate(
+        db, query, Mission.mission_id, response, cursor=cursor, limit=limit, skip=skip, descending=order == "desc"
+    )
+    if with_total:
+        await pagination.set_total(response, db, Mission)
+    return fastjson.json_response(missions, response)
+
+
+@router.get("/changes", response_model=MissionChanges)
+async def get_mission_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Synchronisation incrémentale : missions créées ou modifiées et missions supprimées
+    depuis le jeton `since` (sans jeton : toutes les missions). Renvoyer `token` au prochain
+    appel, immédiatement tant que `has_more` est vrai. 410 : jeton expiré, tout resynchroniser.
+    """
+    return fastjson.json_response(await sync.changes(db, since, limit))
+
+
+@router.get("/queue", response_model=SchedulerStatus)
+async def get_scheduler_status():
+    """
+    État de la file d'attribution : missions en attente, tours effectués, missions attribuées
+    """
+    return scheduler.status()
 
 
 @router.get("/status/{status}", response_model=List[MissionResponse])
-def get_missions_by_status(status: str, db: Session = Depends(get_db)):
+async def get_missions_by_status(status: str, db: AsyncSession = Depends(get_read_db)):
     """
     Récupérer les missions par statut
     """
-    missions = db.query(Mission).filter(Mission.status == status).all()
-    return missions
+    query = fastjson.select_schema(MissionResponse, Mission).where(Mission.status == status)
+    return fastjson.json_response(await fastjson.fetch(db, query))
 
 
 @router.get("/category/{category}", response_model=List[MissionResponse])
-def get_missions_by_category(category: str, db: Session = Depends(get_db)):
+async def get_missions_by_category(category: str, db: AsyncSession = Depends(get_read_db)):
     """
     Récupérer les missions par catégorie
     """
-    missions = db.query(Mission).filter(Mission.category == category).all()
-    return missions
+    query = fastjson.select_schema(MissionResponse, Mission).where(Mission.category == category)
+    return fastjson.json_response(await fastjson.fetch(db, query))
 
 
 @router.get("/{mission_id}", response_model=MissionResponse)
-def get_mission(mission_id: int, db: Session = Depends(get_db)):
+async def get_mission(mission_id: int, response: Response, db: AsyncSession = Depends(get_read_db)):
     """
     Récupérer une mission spécifique par son ID
+    L'en-tête ETag porte la version de la mission, à renvoyer dans If-Match lors d'un PATCH
     """
-    mission = db.query(Mission).filter(Mission.mission_id == mission_id).first()
+    mission = await db.get(Mission, mission_id)
     if mission is None:
         raise HTTPException(status_code=404, detail="Mission non trouvée")
+    concurrency.set_etag(response, mission)
     return mission
 
 
+@router.get("/{mission_id}/zones", response_model=List[ZoneDeVolResponse])
+async def get_mission_zones(mission_id: int, db: AsyncSession = Depends(get_read_db)):
+    """
+    Récupérer les zones traversées par le trajet direct d'une mission
+    """
+    mission = await db.get(Mission, mission_id)
+    if mission is None:
+        raise HTTPException(status_code=404, detail="Mission non trouvée")
+    if not _has_coordinates(mission):
+        raise HTTPException(status_code=400, detail=SANS_COORDONNEES)
+    index = await spatial.get_zone_index(db)
+    points = [(mission.departure_lat, mission.departure_lon), (mission.arrival_lat, mission.arrival_lon)]
+    return [zone.data for zone in index.zones_crossed(points)]
+
+
+@router.get("/{mission_id}/route", response_model=RouteResponse)
+async def get_mission_route(mission_id: int, db: AsyncSession = Depends(get_read_db)):
+    """
+    Calculer le trajet d'une mission en contournant les zones à risque et les zones interdites
+    """
+    query = select(Mission).where(Mission.mission_id == mission_id).options(selectinload(Mission.drone))
+    mission = (await db.execute(query)).scalar_one_or_none()
+    if mission is None:
+        raise HTTPException(status_code=404, detail="Mission non trouvée")
+    if not _has_coordinates(mission):
+        raise HTTPException(status_code=400, detail=SANS_COORDONNEES)
+    planner = routing.get_planner(await spatial.get_zone_index(db))
+    try:
+        return _route_response(planner, mission)
+    except routing.NoRouteError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+
+
 @router.patch("/{mission_id}", response_model=MissionResponse)
-def update_mission(
+async def update_mission(
     mission_id: int,
     mission_update: MissionUpdate,
-    db: Session = Depends(get_db)
+    response: Response,
+    if_match: Optional[str] = Header(None)
 ):
     """
     Mettre à jour une mission
+    Avec If-Match (ETag de la dernière lecture), 409 si la mission a été modifiée entre-temps
     """
-    db_mission = db.query(Mission).filter(Mission.mission_id == mission_id).first()
+    update_data = mission_update.dict(exclude_unset=True)
+    update_data['updated_at'] = datetime.utcnow()
+
+    async def write(db: AsyncSession) -> Tuple[Optional[Mission], List[Drone]]:
+        db_mission = await persistence.update_returning(
+            db, Mission, mission_id, update_data, concurrency.expected_version(if_match)
+        )
+        if db_mission is None or "status" not in update_data or db_mission.status == StatutMission.IN_PROGRESS.value:
+            return db_mission, []
+        return db_mission, await assignment.release_drones(db, [db_mission.drone_id])
+
+    try:
+        db_mission, released = await writer.submit(write)
+    except persistence.VersionConflict as error:
+        raise concurrency.conflict(error, "Mission modifiée par une autre requête")
     if db_mission is None:
         raise HTTPException(status_code=404, detail="Mission non trouvée")
-    
-    update_data = mission_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_mission, field, value)
-    
-    db_mission.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(db_mission)
+
+    concurrency.set_etag(response, db_mission)
+    stats.invalidate()
+    await _drones_released(released)
+    scheduler.sync(db_mission)
+    hub.publish(events.MISSION_UPDATED, events.mission_payload(db_mission))
     return db_mission
 
 
 @router.delete("/{mission_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_mission(mission_id: int, db: Session = Depends(get_db)):
+async def delete_mission(mission_id: int):
     """
     Supprimer une mission
     """
-    db_mission = db.query(Mission).filter(Mission.mission_id == mission_id).first()
-    if db_mission is None:
+    async def write(db: AsyncSession) -> Tuple[Optional[dict], List[Drone]]:
+        db_mission = await db.get(Mission, mission_id, populate_existing=True)
+        if db_mission is None:
+            return None, []
+        # historique_missions.mission_id est obligatoire : l'historique n'est pas effacé avec la mission
+        if await db.scalar(select(HistoriqueMission.historique_id).where(HistoriqueMission.mission_id == mission_id).limit(1)):
+            raise HTTPException(status_code=409, detail="Mission présente dans l'historique : supprimer d'abord ses entrées")
+
+        deleted = {
+            "mission_id": db_mission.mission_id,
+            "status": db_mission.status,
+            "category": db_mission.category,
+            "drone_id": db_mission.drone_id
+        }
+        await db.delete(db_mission)
+        await sync.record_deletion(db, mission_id)
+        await db.flush()
+        return deleted, await assignment.release_drones(db, [deleted["drone_id"]])
+
+    deleted, released = await writer.submit(write)
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Mission non trouvée")
-    
-    db.delete(db_mission)
-    db.commit()
+    pagination.invalidate_count(Mission)
+    stats.invalidate()
+    await _drones_released(released)
+    scheduler.discard(mission_id)
+    hub.publish(events.MISSION_DELETED, deleted)
     return None
 
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.database import get_read_db
+from app.schemas.search import SearchResponse
+from app.services import search as search_service
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("/", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Rechercher dans les missions (titre, description, localisation) et les commentaires de l'historique
+    Chaque mot est cherché en préfixe, sans tenir compte des accents ni de la casse ; résultats classés par pertinence
+    """
+    kinds = type or list(search_service.KINDS)
+    unknown = set(kinds) - set(search_service.KINDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Type inconnu : {', '.join(sorted(unknown))}")
+    hits = await search_service.search(db, q, kinds=kinds, limit=limit)
+    backend = await search_service.get_backend(db)
+    return SearchResponse(query=q, backend=backend.name, hits=hits)
@@ -0,0 +1,36 @@
+import os
+import time
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_read_db
+from app.schemas.simulation import SimulationRequest, SimulationResult
+from app.services import simulation
+
+router = APIRouter(prefix="/api/simulation", tags=["simulation"])
+
+
+@router.post("/", response_model=SimulationResult)
+async def simulate_fleet(request: SimulationRequest, db: AsyncSession = Depends(get_read_db)):
+    """
+    Simulation Monte-Carlo : part des tirages où la flotte (ou chaque taille de flotte testée)
+    livre toutes les missions critiques dans le délai, débit et distributions d'attente
+    """
+    if not simulation.available():
+        raise HTTPException(status_code=503, detail="Simulation indisponible : le paquet numpy n'est pas installé")
+    fleet, catalog = await simulation.load(db, request.source)
+    source = request.source
+    if not catalog:
+        # Pas encore d'historique exploitable (coordonnées) : profils synthétiques
+        catalog, source = simulation.synthetic_catalog(request.seed), simulation.SYNTHETIQUE
+    start = time.perf_counter()
+    try:
+        # Calcul NumPy hors de la boucle d'événements
+        result = await run_in_threadpool(
+            simulation.run, fleet, catalog, request.missions, request.delai,
+            fenetre=request.fenetre, runs=request.runs, tailles=request.flotte, objectif=request.objectif,
+            seed=request.seed, workers=min(request.workers, os.cpu_count() or 1),
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    return {**result, "source": source, "duree_ms": round((time.perf_counter() - start) * 1000, 1)}
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app.database import get_read_db
+from app.models import StatistiquesDrone, StatistiquesZone
+from app.schemas.stats import StatsResponse, DronePerformanceStats, ZonePerformanceStats
+from app.services import rollups, stats as stats_service
+
+router = APIRouter(prefix="/api/stats", tags=["stats"])
+
+
+@router.get("/", response_model=StatsResponse)
+async def get_stats(db: AsyncSession = Depends(get_read_db)):
+    """
+    Récupérer les statistiques agrégées des missions et des drones
+    """
+    return await stats_service.get_stats(db)
+
+
+@router.get("/drones", response_model=List[DronePerformanceStats])
+async def get_drones_performance(db: AsyncSession = Depends(get_read_db)):
+    """
+    Performances de chaque drone ayant un historique : réussites, retards, échecs, durée moyenne
+    """
+    return await rollups.list_all(db, StatistiquesDrone)
+
+
+@router.get("/drones/{drone_id}", response_model=DronePerformanceStats)
+async def get_drone_performance(drone_id: int, db: AsyncSession = Depends(get_read_db)):
+    """
+    Performances d'un drone, tenues à jour à chaque écriture de l'historique
+    """
+    performance = await rollups.get_drone(db, drone_id)
+    if performance is None:
+        raise HTTPException(status_code=404, detail="Drone non trouvé")
+    return performance
+
+
+@router.get("/zones", response_model=List[ZonePerformanceStats])
+async def get_zones_performance(db: AsyncSession = Depends(get_read_db)):
+    """
+    Performances des missions de chaque zone de vol ayant un historique
+    """
+    return await rollups.list_all(db, StatistiquesZone)
+
+
+@router.get("/zones/{zone_id}", response_model=ZonePerformanceStats)
+async def get_zone_performance(zone_id: int, db: AsyncSession = Depends(get_read_db)):
+    """
+    Performances des missions d'une zone de vol, tenues à jour à chaque écriture de l'historique
+    """
+    performance = await rollups.get_zone(db, zone_id)
+    if performance is None:
+        raise HTTPException(status_code=404, detail="Zone non trouvée")
+    return performance
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from typing import List, Optional
+from app.schemas.telemetrie import (
+    TelemetrieBatchResult, TelemetriePosition, TelemetrieSample, TelemetrieSerie, TelemetrieStatus
+)
+from app.services import bulk, telemetry
+from app.services.telemetry import store
+
+router = APIRouter(prefix="/api/telemetrie", tags=["telemetrie"])
+
+FENETRE_PAR_DEFAUT = timedelta(minutes=10)
+
+
+def _epoch(value: datetime) -> float:
+    # Dates sans fuseau : UTC, comme en base
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@router.post(
+    "/",
+    response_model=TelemetrieBatchResult,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra={"requestBody": {"content": {"application/json": {"schema": {
+        "type": "array", "items": TelemetrieSample.model_json_schema()
+    }}}}}
+)
+async def ingest_telemetry(request: Request):
+    """
+    Envoyer des échantillons de télémétrie en lot (objet, tableau JSON ou NDJSON)
+    Les échantillons valides sont acceptés immédiatement et écrits en base au prochain vidage ;
+    les échantillons invalides sont signalés par leur index.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    try:
+        rows = telemetry.parse_body(await request.body(), ndjson=content_type in bulk.NDJSON_TYPES)
+    except telemetry.PayloadError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    accepted, errors = store.ingest(rows, source="http")
+    return TelemetrieBatchResult(accepted=accepted, errors=errors)
+
+
+@router.websocket("/ws")
+async def ingest_telemetry_ws(websocket: WebSocket, ack: bool = False):
+    """
+    Flux d'échantillons sur WebSocket : chaque message est un objet, un tableau JSON ou du NDJSON
+    Les erreurs sont renvoyées au client ; avec `ack=true`, chaque message est aussi acquitté.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            body = message.get("bytes") or (message.get("text") or "").encode("utf-8")
+            try:
+                rows = telemetry.parse_body(body, ndjson=b"\n" in body.strip())
+            except telemetry.PayloadError as error:
+                await websocket.send_json({"type": "erreur", "detail": str(error)})
+                continue
+            accepted, errors = store.ingest(rows, source="websocket")
+            if errors:
+                await websocket.send_json({"type": "erreur", "accepted": accepted, "errors": errors})
+            elif ack:
+                await websocket.send_json({"type": "ack", "accepted": accepted})
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+
+@router.get("/positions", response_model=List[TelemetriePosition])
+async def get_positions():
+    """
+    Dernière position connue de chaque drone ayant émis depuis le démarrage
+    """
+    return store.positions()
+
+
+@router.get("/status", response_model=TelemetrieStatus)
+async def get_telemetry_status():
+    """
+    État de l'ingestion : drones suivis, échantillons en attente d'écriture, partitions
+    """
+    return store.status()
+
+
+@router.get("/{drone_id}/position", response_model=TelemetriePosition)
+async def get_position(drone_id: int):
+    """
+    Dernière position connue d'un drone
+    """
+    position = store.position(drone_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Aucune télémétrie pour ce drone")
+    return position
+
+
+@router.get("/{drone_id}", response_model=TelemetrieSerie)
+async def get_telemetry(
+    drone_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    step: float = Query(1.0, gt=0, description="Largeur des intervalles en secondes")
+):
+    """
+    Trajectoire sous-échantillonnée d'un drone sur [date_from, date_to[ (10 dernières minutes par défaut)
+    Servie depuis la mémoire quand la fenêtre est dans le tampon du drone, sinon depuis les partitions.
+    L'intervalle est élargi si la fenêtre donnerait plus de 5000 points.
+    """
+    until = _epoch(date_to) if date_to else datetime.now(timezone.utc).timestamp()
+    since = _epoch(date_from) if date_from else until - FENETRE_PAR_DEFAUT.total_seconds()
+    if since >= until:
+        raise HTTPException(status_code=400, detail="date_from doit précéder date_to")
+    step = max(step, (until - since) / telemetry.MAX_POINTS)
+    source, points = await store.history(drone_id, since, until, step)
+    return TelemetrieSerie(drone_id=drone_id, step=step, source=source, points=points)
@@ -1,88 +1,136 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.schemas.zone_vol import ZoneDeVolCreate, ZoneDeVolResponse, ZoneDeVolUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.database import get_read_db
+from app.schemas.zone_vol import ZoneDeVolCreate, ZoneDeVolResponse, ZoneDeVolUpdate, TrajetRequest
 from app.models.zone_vol import ZoneDeVol
+from app.services import cache, eligibility, fastjson, pagination, persistence, spatial
+from app.services.writer import writer
 
 router = APIRouter(prefix="/api/zones", tags=["zones"])
 
 
 @router.post("/", response_model=ZoneDeVolResponse, status_code=status.HTTP_201_CREATED)
-def create_zone(zone: ZoneDeVolCreate, db: Session = Depends(get_db)):
+async def create_zone(zone: ZoneDeVolCreate):
     """
     Créer une nouvelle zone de vol
     """
-    db_zone = ZoneDeVol(**zone.dict())
-    db.add(db_zone)
-    db.commit()
-    db.refresh(db_zone)
+    async def write(db: AsyncSession) -> ZoneDeVol:
+        db_zone = ZoneDeVol(**zone.dict())
+        db.add(db_zone)
+        return db_zone
+
+    db_zone = await writer.submit(write)
+    pagination.invalidate_count(ZoneDeVol)
+    await cache.invalidate(cache.ZONES)
+    spatial.index_zone(db_zone)
+    eligibility.index_zone(db_zone)
     return db_zone
 
 
 @router.get("/", response_model=List[ZoneDeVolResponse])
-def get_zones(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_zones(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Récupérer toutes les zones de vol
+    Pagination par curseur : renvoyer l'en-tête X-Next-Cursor dans le paramètre `cursor`
+    Réponse mise en cache ; l'en-tête If-None-Match permet d'obtenir un 304
     """
-    zones = db.query(ZoneDeVol).offset(skip).limit(limit).all()
-    return zones
+    async def load():
+        zones = await pagination.paginate(db, fastjson.select_schema(ZoneDeVolResponse, ZoneDeVol), ZoneDeVol.zone_id, response, cursor=cursor, limit=limit, skip=skip)
+        if with_total:
+            await pagination.set_total(response, db, ZoneDeVol)
+        return zones
+
+    return await cache.cached_json(request, response, cache.ZONES, load)
 
 
 @router.get("/risque/{niveau_risque}", response_model=List[ZoneDeVolResponse])
-def get_zones_by_risk(niveau_risque: int, db: Session = Depends(get_db)):
+async def get_zones_by_risk(niveau_risque: int, db: AsyncSession = Depends(get_read_db)):
     """
     Récupérer les zones par niveau de risque
     """
     if niveau_risque < 1 or niveau_risque > 5:
         raise HTTPException(status_code=400, detail="Le niveau de risque doit être entre 1 et 5")
     
-    zones = db.query(ZoneDeVol).filter(ZoneDeVol.risque == niveau_risque).all()
-    return zones
+    query = fastjson.select_schema(ZoneDeVolResponse, ZoneDeVol).where(ZoneDeVol.risque == niveau_risque)
+    return fastjson.json_response(await fastjson.fetch(db, query))
+
+
+@router.get("/localisation", response_model=List[ZoneDeVolResponse])
+async def get_zones_at_point(lat: float, lon: float, db: AsyncSession = Depends(get_read_db)):
+    """
+    Récupérer les zones contenant un point
+    """
+    index = await spatial.get_zone_index(db)
+    return [zone.data for zone in index.zones_at(lat, lon)]
+
+
+@router.post("/intersection", response_model=List[ZoneDeVolResponse])
+async def get_zones_crossed(trajet: TrajetRequest, db: AsyncSession = Depends(get_read_db)):
+    """
+    Récupérer les zones traversées par un trajet (départ, points intermédiaires, arrivée)
+    """
+    index = await spatial.get_zone_index(db)
+    points = [(point.lat, point.lon) for point in trajet.points]
+    return [zone.data for zone in index.zones_crossed(points)]
 
 
 @router.get("/{zone_id}", response_model=ZoneDeVolResponse)
-def get_zone(zone_id: int, db: Session = Depends(get_db)):
+async def get_zone(zone_id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Récupérer une zone spécifique par son ID
     """
-    zone = db.query(ZoneDeVol).filter(ZoneDeVol.zone_id == zone_id).first()
+    zone = await db.get(ZoneDeVol, zone_id)
     if zone is None:
         raise HTTPException(status_code=404, detail="Zone non trouvée")
     return zone
 
 
 @router.patch("/{zone_id}", response_model=ZoneDeVolResponse)
-def update_zone(
+async def update_zone(
     zone_id: int,
-    zone_update: ZoneDeVolUpdate,
-    db: Session = Depends(get_db)
+    zone_update: ZoneDeVolUpdate
 ):
     """
     Mettre à jour une zone de vol
     """
-    db_zone = db.query(ZoneDeVol).filter(ZoneDeVol.zone_id == zone_id).first()
+    db_zone = await writer.submit(
+        lambda db: persistence.update_returning(db, ZoneDeVol, zone_id, zone_update.dict(exclude_unset=True))
+    )
     if db_zone is None:
         raise HTTPException(status_code=404, detail="Zone non trouvée")
-    
-    update_data = zone_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_zone, field, value)
-    
-    db.commit()
-    db.refresh(db_zone)
+
+    await cache.invalidate(cache.ZONES)
+    spatial.index_zone(db_zone)
+    eligibility.index_zone(db_zone)
     return db_zone
 
 
 @router.delete("/{zone_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_zone(zone_id: int, db: Session = Depends(get_db)):
+async def delete_zone(zone_id: int):
     """
     Supprimer une zone de vol
     """
-    db_zone = db.query(ZoneDeVol).filter(ZoneDeVol.zone_id == zone_id).first()
-    if db_zone is None:
+    async def write(db: AsyncSession) -> bool:
+        # Suppression ORM : les missions de la zone sont détachées (zone_id à NULL)
+        db_zone = await db.get(ZoneDeVol, zone_id, populate_existing=True)
+        if db_zone is None:
+            return False
+        await db.delete(db_zone)
+        return True
+
+    if not await writer.submit(write):
         raise HTTPException(status_code=404, detail="Zone non trouvée")
-    
-    db.delete(db_zone)
-    db.commit()
+    pagination.invalidate_count(ZoneDeVol)
+    await cache.invalidate(cache.ZONES)
+    spatial.unindex_zone(zone_id)
+    eligibility.unindex_zone(zone_id)
     return None
\ No newline at end of file
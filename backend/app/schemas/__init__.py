@@ -1,13 +1,32 @@
 # Package schemas
-from .mission import MissionCreate, MissionResponse, MissionUpdate
+from .mission import (
+    MissionCreate, MissionResponse, MissionUpdate, MissionAssignment, AssignmentResult,
+    MissionStatusUpdate, BulkRowError, BulkMissionResult, BulkStatusResult, SchedulerStatus,
+    MissionTombstone, MissionChanges
+)
 from .drone import DroneCreate, DroneResponse, DroneUpdate
 from .zone_vol import ZoneDeVolCreate, ZoneDeVolResponse, ZoneDeVolUpdate
 from .historique import HistoriqueMissionCreate, HistoriqueMissionResponse, HistoriqueMissionUpdate
+from .stats import StatsResponse, PerformanceStats, DronePerformanceStats, ZonePerformanceStats
+from .route import RouteResponse, RouteBatchRequest, RouteError, RouteBatchResult
+from .search import SearchHit, SearchResponse
+from .telemetrie import (
+    TelemetrieSample, TelemetriePosition, TelemetriePoint, TelemetrieSerie, TelemetrieBatchResult, TelemetrieStatus
+)
+from .simulation import SimulationRequest, SimulationFlotte, SimulationResult
 
 __all__ = [
-    'MissionCreate', 'MissionResponse', 'MissionUpdate',
+    'MissionCreate', 'MissionResponse', 'MissionUpdate', 'MissionAssignment', 'AssignmentResult',
+    'MissionStatusUpdate', 'BulkRowError', 'BulkMissionResult', 'BulkStatusResult', 'SchedulerStatus',
+    'MissionTombstone', 'MissionChanges',
     'DroneCreate', 'DroneResponse', 'DroneUpdate',
     'ZoneDeVolCreate', 'ZoneDeVolResponse', 'ZoneDeVolUpdate',
-    'HistoriqueMissionCreate', 'HistoriqueMissionResponse', 'HistoriqueMissionUpdate'
+    'HistoriqueMissionCreate', 'HistoriqueMissionResponse', 'HistoriqueMissionUpdate',
+    'StatsResponse', 'PerformanceStats', 'DronePerformanceStats', 'ZonePerformanceStats',
+    'RouteResponse', 'RouteBatchRequest', 'RouteError', 'RouteBatchResult',
+    'SearchHit', 'SearchResponse',
+    'TelemetrieSample', 'TelemetriePosition', 'TelemetriePoint', 'TelemetrieSerie', 'TelemetrieBatchResult',
+    'TelemetrieStatus',
+    'SimulationRequest', 'SimulationFlotte', 'SimulationResult'
 ]
 
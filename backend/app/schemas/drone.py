@@ -19,6 +19,7 @@ class DroneCreate(DroneBase):
 class DroneResponse(DroneBase):
     drone_id: int
     statut: str
+    version: int = Field(1, description="Version de la ligne, renvoyée dans l'ETag (If-Match des PATCH)")
 
     class Config:
         from_attributes = True
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, validator
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from app.models.mission import MissionCategory, StatutMission, Priority, Risk
 
@@ -16,6 +16,11 @@ class MissionBase(BaseModel):
     start_date: Optional[datetime] = Field(None, description="Date de début planifiée")
     departure: Optional[str] = Field(None, max_length=255, description="Point de départ")
     arrival: Optional[str] = Field(None, max_length=255, description="Point d'arrivée")
+    zone_id: Optional[int] = Field(None, description="Zone de vol survolée")
+    departure_lat: Optional[float] = Field(None, ge=-90, le=90, description="Latitude du départ")
+    departure_lon: Optional[float] = Field(None, ge=-180, le=180, description="Longitude du départ")
+    arrival_lat: Optional[float] = Field(None, ge=-90, le=90, description="Latitude de l'arrivée")
+    arrival_lon: Optional[float] = Field(None, ge=-180, le=180, description="Longitude de l'arrivée")
 
 
 class MissionCreate(MissionBase):
@@ -28,6 +33,7 @@ class MissionResponse(MissionBase):
     status: StatutMission
     created_at: datetime
     updated_at: datetime
+    version: int = Field(1, description="Version de la ligne, renvoyée dans l'ETag (If-Match des PATCH)")
 
     class Config:
         from_attributes = True
@@ -47,4 +53,78 @@ class MissionUpdate(BaseModel):
     start_date: Optional[datetime] = None
     departure: Optional[str] = Field(None, max_length=255)
     arrival: Optional[str] = Field(None, max_length=255)
+    zone_id: Optional[int] = None
+    departure_lat: Optional[float] = Field(None, ge=-90, le=90)
+    departure_lon: Optional[float] = Field(None, ge=-180, le=180)
+    arrival_lat: Optional[float] = Field(None, ge=-90, le=90)
+    arrival_lon: Optional[float] = Field(None, ge=-180, le=180)
 
+    @field_validator("drone_id")
+    @classmethod
+    def check_drone_id(cls, value):
+        # Anciens clients : "" ou "AUTO" pour « sans drone » ; sinon un identifiant numérique
+        if value is None or value.strip() in ("", "AUTO"):
+            return None
+        if not value.strip().isdigit():
+            raise ValueError("drone_id doit être l'identifiant numérique d'un drone")
+        return value.strip()
+
+
+class MissionAssignment(BaseModel):
+    mission_id: int
+    drone_id: int
+
+
+class AssignmentResult(BaseModel):
+    assigned: List[MissionAssignment] = Field(default_factory=list, description="Missions attribuées")
+    unassigned: List[int] = Field(default_factory=list, description="Missions sans drone compatible")
+
+
+class MissionStatusUpdate(BaseModel):
+    mission_id: int
+    status: StatutMission
+
+
+class BulkRowError(BaseModel):
+    index: int = Field(..., description="Position de la ligne dans la requête")
+    errors: List[Dict[str, Any]] = Field(default_factory=list, description="Erreurs de validation")
+
+
+class BulkMissionResult(BaseModel):
+    inserted: int = 0
+    mission_ids: List[int] = Field(default_factory=list, description="IDs des missions créées")
+    assigned: int = Field(0, description="Missions attribuées à un drone après l'import")
+    errors: List[BulkRowError] = Field(default_factory=list)
+
+
+class BulkStatusResult(BaseModel):
+    updated: int = 0
+    errors: List[BulkRowError] = Field(default_factory=list)
+
+
+class SchedulerStatus(BaseModel):
+    running: bool = Field(..., description="Tâche d'attribution active dans ce processus")
+    queued: int = Field(..., description="Missions en attente d'un drone")
+    ready: int = Field(..., description="Missions dont la date de début est atteinte")
+    delayed: int = Field(..., description="Missions planifiées plus tard")
+    ticks: int
+    dispatched: int = Field(..., description="Missions attribuées par le planificateur")
+    last_tick_ms: float
+    rebuild_ms: float = Field(..., description="Durée de la reconstruction de la file au démarrage")
+
+
+class MissionTombstone(BaseModel):
+    mission_id: int
+    deleted_at: datetime
+
+
+class MissionChanges(BaseModel):
+    changes: List[MissionResponse] = Field(
+        default_factory=list, description="Missions créées ou modifiées, par (updated_at, mission_id) croissants"
+    )
+    deleted: List[MissionTombstone] = Field(
+        default_factory=list,
+        description="Missions supprimées ; à ignorer si la copie locale a un updated_at plus récent (ID réutilisé)"
+    )
+    token: str = Field(..., description="Jeton à renvoyer dans `since` à la prochaine synchronisation")
+    has_more: bool = Field(..., description="D'autres changements attendent : rappeler aussitôt avec `token`")
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.schemas.zone_vol import Coordonnees
+
+
+class RouteResponse(BaseModel):
+    mission_id: int
+    points: List[Coordonnees] = Field(..., description="Départ, points de passage, arrivée")
+    distance_km: float = Field(..., description="Longueur du trajet en km")
+    cost: float = Field(..., description="Coût pondéré par le risque des zones traversées")
+    zone_ids: List[int] = Field(default_factory=list, description="Zones traversées")
+    drone_id: Optional[str] = None
+    autonomie_max: Optional[float] = Field(None, description="Autonomie du drone attribué en km")
+    within_range: Optional[bool] = Field(None, description="Le trajet tient dans l'autonomie du drone")
+
+
+class RouteBatchRequest(BaseModel):
+    mission_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class RouteError(BaseModel):
+    mission_id: int
+    detail: str
+
+
+class RouteBatchResult(BaseModel):
+    routes: List[RouteResponse] = Field(default_factory=list)
+    errors: List[RouteError] = Field(default_factory=list)
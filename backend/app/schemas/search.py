@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class SearchHit(BaseModel):
+    type: str = Field(..., description="mission ou historique")
+    id: int = Field(..., description="ID de la mission ou de l'enregistrement d'historique")
+    mission_id: int
+    title: str = Field(..., description="Titre de la mission")
+    status: Optional[str] = None
+    score: float = Field(..., description="Pertinence (BM25), plus grand = plus pertinent")
+    extrait: Optional[str] = Field(None, description="Extrait, mots trouvés entre <mark> et </mark>")
+
+
+class SearchResponse(BaseModel):
+    query: str
+    backend: str = Field(..., description="Moteur de recherche utilisé (fts5, like)")
+    hits: List[SearchHit] = Field(default_factory=list)
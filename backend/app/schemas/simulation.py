@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field, conint
+from typing import Dict, List, Literal, Optional
+
+
+class SimulationRequest(BaseModel):
+    missions: int = Field(100, gt=0, le=10_000, description="Missions critiques à livrer")
+    delai: float = Field(60.0, gt=0, description="Délai pour tout livrer, en minutes")
+    fenetre: float = Field(0.0, ge=0, description="Durée d'arrivée des missions en minutes (0 : toutes à t=0)")
+    runs: int = Field(1000, gt=0, le=100_000, description="Tirages Monte-Carlo par taille de flotte")
+    flotte: Optional[List[conint(ge=1, le=5_000)]] = Field(
+        None, max_length=50, description="Tailles de flotte à tester ; par défaut la flotte actuelle"
+    )
+    objectif: float = Field(0.95, gt=0, le=1, description="Part des tirages où tout doit être livré à temps")
+    source: Literal["historique", "synthetique"] = Field(
+        "historique", description="Missions tirées de l'historique, ou profils synthétiques"
+    )
+    seed: Optional[int] = None
+    workers: int = Field(1, ge=1, le=64, description="Processus de simulation (borné au nombre de cœurs)")
+
+
+class SimulationFlotte(BaseModel):
+    drones: int
+    taux_reussite: float = Field(..., description="Part des tirages où toutes les missions sont livrées dans le délai")
+    livrees_dans_delai: float = Field(..., description="Part moyenne des missions livrées dans le délai")
+    non_servies: float = Field(..., description="Missions sans drone compatible, en moyenne par tirage")
+    debit_par_heure: float
+    attente_min: Dict[str, Optional[float]] = Field(..., description="Attente avant départ : p50, p90, p99")
+    derniere_livraison_min: Dict[str, Optional[float]] = Field(
+        ..., description="Instant de la dernière livraison des tirages complets : p50, p90, p99"
+    )
+
+
+class SimulationResult(BaseModel):
+    source: str = Field(..., description="Catalogue de missions utilisé")
+    missions: int
+    delai: float
+    fenetre: float
+    runs: int
+    profils: int = Field(..., description="Profils de mission (poids, distance) du catalogue")
+    objectif: float
+    recommandation: Optional[int] = Field(None, description="Plus petite flotte testée atteignant l'objectif")
+    duree_ms: float
+    resultats: List[SimulationFlotte]
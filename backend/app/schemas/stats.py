@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class StatsResponse(BaseModel):
+    total_missions: int = Field(..., description="Nombre total de missions")
+    missions_by_status: Dict[str, int] = Field(default_factory=dict, description="Missions par statut")
+    missions_by_category: Dict[str, int] = Field(default_factory=dict, description="Missions par catégorie")
+    missions_by_priority: Dict[str, int] = Field(default_factory=dict, description="Missions par priorité")
+    total_drones: int = Field(..., description="Nombre total de drones")
+    drones_by_statut: Dict[str, int] = Field(default_factory=dict, description="Drones par statut")
+    drone_utilisation: float = Field(..., ge=0, le=1, description="Part des drones en mission")
+
+
+class PerformanceStats(BaseModel):
+    missions: int = Field(..., description="Enregistrements d'historique")
+    reussies: int
+    retards: int
+    echecs: int
+    autres: int = Field(..., description="Performance absente ou non reconnue")
+    durees: int = Field(..., description="Missions dont la durée estimée est connue")
+    taux_reussite: float = Field(..., ge=0, le=1)
+    taux_retard: float = Field(..., ge=0, le=1)
+    taux_echec: float = Field(..., ge=0, le=1)
+    duree_moyenne: Optional[float] = Field(None, description="Durée estimée moyenne en minutes")
+    derniere_mission: Optional[datetime] = None
+
+
+class DronePerformanceStats(PerformanceStats):
+    drone_id: int
+
+
+class ZonePerformanceStats(PerformanceStats):
+    zone_id: int
@@ -0,0 +1,55 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from .mission import BulkRowError
+
+
+class TelemetrieSample(BaseModel):
+    """Échantillon reçu ; documente le corps de POST /api/telemetrie (validé sans Pydantic à l'ingestion)"""
+    drone_id: int = Field(..., gt=0)
+    ts: Optional[float] = Field(None, description="Horodatage en secondes epoch (UTC) ; heure de réception si absent")
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+    altitude: Optional[float] = Field(None, description="En mètres")
+    vitesse: Optional[float] = Field(None, ge=0, description="En km/h")
+    batterie: Optional[float] = Field(None, ge=0, le=100, description="Charge en %")
+
+
+class TelemetriePosition(BaseModel):
+    drone_id: int
+    ts: float
+    lat: float
+    lon: float
+    altitude: Optional[float] = None
+    vitesse: Optional[float] = None
+    batterie: Optional[float] = None
+
+
+class TelemetriePoint(BaseModel):
+    ts: float = Field(..., description="Début de l'intervalle (secondes epoch)")
+    lat: float
+    lon: float
+    altitude: Optional[float] = None
+    vitesse: Optional[float] = None
+    batterie: Optional[float] = Field(None, description="Charge minimale sur l'intervalle")
+    echantillons: int = Field(..., description="Échantillons moyennés")
+    dernier_ts: float
+
+
+class TelemetrieSerie(BaseModel):
+    drone_id: int
+    step: float = Field(..., description="Largeur des intervalles en secondes")
+    source: str = Field(..., description="memoire (tampon du drone) ou base (partitions)")
+    points: List[TelemetriePoint] = Field(default_factory=list)
+
+
+class TelemetrieBatchResult(BaseModel):
+    accepted: int = 0
+    errors: List[BulkRowError] = Field(default_factory=list)
+
+
+class TelemetrieStatus(BaseModel):
+    drones: int = Field(..., description="Drones ayant émis depuis le démarrage")
+    en_attente: int = Field(..., description="Échantillons pas encore écrits")
+    partitions: List[str] = Field(default_factory=list)
+    dernier_vidage: Optional[float] = None
+    capacite_tampon: int = Field(..., description="Échantillons gardés en mémoire par drone")
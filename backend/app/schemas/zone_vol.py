@@ -1,13 +1,33 @@
-from pydantic import BaseModel, Field, validator
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, validator
+from typing import List, Optional
 from app.models.zone_vol import TypeZone
 
 
+def _check_polygone(value):
+    if value is None:
+        return value
+    if len(value) < 3:
+        raise ValueError("Le polygone doit contenir au moins 3 points")
+    for point in value:
+        if len(point) != 2:
+            raise ValueError("Chaque point doit être [latitude, longitude]")
+        lat, lon = point
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f"Coordonnées hors limites : {point}")
+    return value
+
+
 class ZoneDeVolBase(BaseModel):
     nom_zone: str = Field(..., max_length=255, description="Nom de la zone")
     type_zone: str = Field(..., max_length=255, description="Type de zone")
     risque: int = Field(..., ge=1, le=5, description="Niveau de risque (1-5)")
     restrictions: Optional[str] = Field(None, description="Restrictions spécifiques à la zone")
+    polygone: Optional[List[List[float]]] = Field(None, description="Contour de la zone : liste de [latitude, longitude]")
+
+    @field_validator("polygone")
+    @classmethod
+    def check_polygone(cls, value):
+        return _check_polygone(value)
 
 
 class ZoneDeVolCreate(ZoneDeVolBase):
@@ -25,4 +45,19 @@ class ZoneDeVolUpdate(BaseModel):
     nom_zone: Optional[str] = Field(None, max_length=255)
     type_zone: Optional[str] = Field(None, max_length=255)
     risque: Optional[int] = Field(None, ge=1, le=5)
-    restrictions: Optional[str] = None
\ No newline at end of file
+    restrictions: Optional[str] = None
+    polygone: Optional[List[List[float]]] = None
+
+    @field_validator("polygone")
+    @classmethod
+    def check_polygone(cls, value):
+        return _check_polygone(value)
+
+
+class Coordonnees(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+
+
+class TrajetRequest(BaseModel):
+    points: List[Coordonnees] = Field(..., min_length=2, description="Départ, points intermédiaires, arrivée")
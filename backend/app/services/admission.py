@@ -0,0 +1,341 @@
+"""
+Contrôle d'admission et délestage par priorité.
+
+Chaque requête HTTP est rangée dans une classe, de la plus prioritaire à la moins :
+
+- critical : création d'une mission de priorité `critical` (POST /api/missions/) ;
+- creation : les autres créations de mission ;
+- write : les autres écritures (POST, PATCH, PUT, DELETE) ;
+- read : les lectures ciblées (une mission, un drone, la recherche...) ;
+- low : les tableaux de bord (statistiques, listes, export).
+
+Une requête n'entre que si sa classe est sous sa limite de concurrence (ADMISSION_LIMITS)
+et si le nombre total de requêtes en cours laisse la place : les ADMISSION_RESERVED
+dernières places de ADMISSION_CAPACITY sont réservées aux créations critiques. Sinon elle
+attend dans la file de sa classe, au plus le délai de sa classe (WAITS : court pour les
+lectures, long pour les créations) ; une place libérée est donnée à la classe la plus
+prioritaire. File pleine, la requête en attente la moins prioritaire est délestée. Une
+requête délestée reçoit 503 avec Retry-After : en surcharge, ce sont donc les tableaux de
+bord qui cèdent d'abord, et les créations critiques gardent leur voie même quand les
+lectures saturent le pool de threads et les connexions.
+
+Avec ADMISSION_RATE > 0, chaque client (en-tête X-Client-Id, sinon adresse IP) dispose
+d'un seau de jetons de ADMISSION_BURST requêtes, rechargé de ADMISSION_RATE par seconde ;
+au-delà : 429. Les créations critiques n'y sont pas soumises.
+
+Les requêtes OPTIONS (pré-vols CORS) ne sont pas contrôlées.
+
+Les limites sont propres à chaque processus.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+import orjson
+from app.services import metrics
+
+CRITICAL, CREATION, WRITE, READ, LOW = CLASSES = ("critical", "creation", "write", "read", "low")
+
+
+def _limits(value: str) -> Dict[str, int]:
+    limits = {}
+    for item in value.split(","):
+        if item.strip():
+            name, _, limit = item.partition("=")
+            limits[name.strip()] = int(limit)
+    return limits
+
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1").strip().lower() in ("1", "true", "yes", "on")
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", "64"))  # requêtes en cours, toutes classes
+ADMISSION_RESERVED = int(os.getenv("ADMISSION_RESERVED", "8"))  # places réservées aux créations critiques
+ADMISSION_LIMITS = {
+    CRITICAL: ADMISSION_CAPACITY, CREATION: 32, WRITE: 24, READ: 32, LOW: 16,
+    **_limits(os.getenv("ADMISSION_LIMITS", "")),
+}
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))  # requêtes en attente, toutes classes
+ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", "0"))  # requêtes par seconde et par client (0 : sans limite)
+ADMISSION_BURST = int(os.getenv("ADMISSION_BURST", "50"))
+
+# Attente maximale d'une place, en secondes
+WAITS = {CRITICAL: 10.0, CREATION: 5.0, WRITE: 2.0, READ: 0.5, LOW: 0.1}
+RETRY_AFTER = "1"
+MAX_CLIENTS = 10_000  # seaux de jetons gardés (les moins récents sont oubliés)
+MAX_PEEKED_BODY = 64 * 1024  # au-delà, la priorité de la mission n'est pas lue
+
+# Routes jamais limitées : supervision, documentation, flux d'événements longs
+EXEMPT_PREFIXES = ("/metrics", "/health", "/docs", "/redoc", "/openapi.json", "/api/events/stream")
+LOW_PREFIXES = (
+    "/api/stats", "/api/events/stats", "/api/historique/export",
+    "/api/missions/status/", "/api/missions/category/", "/api/zones/risque/",
+)
+COLLECTIONS = ("/api/missions", "/api/drones", "/api/zones", "/api/historique")
+MISSIONS = "/api/missions"
+
+admission_in_flight = metrics.registry.register(metrics.Gauge(
+    "admission_in_flight", "Requêtes admises en cours", ("classe",)))
+admission_queue_depth = metrics.registry.register(metrics.Gauge(
+    "admission_queue_depth", "Requêtes en attente d'admission", ("classe",)))
+admission_shed = metrics.registry.register(metrics.Counter(
+    "admission_shed_total", "Requêtes refusées par le contrôle d'admission", ("classe", "cause")))
+admission_wait = metrics.registry.register(metrics.Histogram(
+    "admission_wait_seconds", "Attente avant admission", ("classe",)))
+
+
+def classify(method: str, path: str, body: Optional[bytes] = None) -> Optional[str]:
+    """Classe d'une requête ; None si elle n'est pas soumise au contrôle"""
+    if method == "OPTIONS" or path == "/" or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if method in ("GET", "HEAD"):
+        if path.startswith(LOW_PREFIXES) or path.rstrip("/") in COLLECTIONS:
+            return LOW
+        return READ
+    if method == "POST" and path.rstrip("/") == MISSIONS:
+        return CRITICAL if body is not None and _is_critical(body) else CREATION
+    return WRITE
+
+
+def _is_critical(body: bytes) -> bool:
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return False
+    return isinstance(data, dict) and data.get("priority") == "critical"
+
+
+class TokenBuckets:
+    """Seau de jetons par client : `burst` requêtes d'avance, `rate` jetons par seconde"""
+
+    def __init__(self, rate: float = ADMISSION_RATE, burst: int = ADMISSION_BURST, size: int = MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.size = size
+        self.buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # client -> (jetons, instant)
+
+    def take(self, client: str) -> float:
+        """0 si la requête passe, sinon le délai (s) avant le prochain jeton"""
+        now = time.monotonic()
+        tokens, last = self.buckets.pop(client, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self.buckets[client] = (tokens, now)
+        if len(self.buckets) > self.size:
+            self.buckets.popitem(last=False)
+        return wait
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        capacity: int = ADMISSION_CAPACITY,
+        reserved: int = ADMISSION_RESERVED,
+        limits: Optional[Dict[str, int]] = None,
+        waits: Optional[Dict[str, float]] = None,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+    ):
+        self.capacity = capacity
+        self.reserved = reserved
+        self.limits = dict(limits or ADMISSION_LIMITS)
+        self.waits = dict(waits or WAITS)
+        self.max_queue = max_queue
+        self.in_flight = dict.fromkeys(CLASSES, 0)
+        self.total = 0
+        self.waiters: Dict[str, deque] = {name: deque() for name in CLASSES}
+        self.admitted = dict.fromkeys(CLASSES, 0)
+        self.shed = dict.fromkeys(CLASSES, 0)
+
+    def _can_admit(self, name: str) -> bool:
+        ceiling = self.capacity if name == CRITICAL else self.capacity - self.reserved
+        return self.in_flight[name] < self.limits[name] and self.total < ceiling
+
+    def _admit(self, name: str):
+        self.in_flight[name] += 1
+        self.total += 1
+        self.admitted[name] += 1
+        admission_in_flight.set(self.in_flight[name], name)
+
+    def _queued(self) -> int:
+        return sum(len(waiters) for waiters in self.waiters.values())
+
+    def reject(self, name: str, cause: str) -> str:
+        self.shed[name] += 1
+        admission_shed.inc(name, cause)
+        return cause
+
+    def _evict_below(self, name: str) -> bool:
+        """File pleine : déleste la dernière requête arrivée de la classe la moins prioritaire"""
+        for victim in reversed(CLASSES[CLASSES.index(name) + 1:]):
+            waiters = self.waiters[victim]
+            while waiters:
+                future = waiters.pop()
+                if not future.done():
+                    future.set_result(False)
+                    self.reject(victim, "file_pleine")
+                    admission_queue_depth.set(len(waiters), victim)
+                    return True
+        return False
+
+    async def acquire(self, name: str) -> Optional[str]:
+        """None si la requête est admise (appeler `release` ensuite), sinon la cause du refus"""
+        waiters = self.waiters[name]
+        if not waiters and self._can_admit(name):
+            self._admit(name)
+            admission_wait.observe(0.0, name)
+            return None
+        if self._queued() >= self.max_queue and not self._evict_below(name):
+            return self.reject(name, "file_pleine")
+
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        admission_queue_depth.set(len(waiters), name)
+        start = time.perf_counter()
+        try:
+            admitted = await asyncio.wait_for(future, self.waits[name])
+        except asyncio.TimeoutError:
+            admitted = None
+        except asyncio.CancelledError:
+            # Client parti alors qu'une place venait de lui être donnée : elle est rendue
+            if future.done() and not future.cancelled() and future.result():
+                self.release(name)
+            raise
+        finally:
+            if future in waiters:
+                waiters.remove(future)
+            admission_queue_depth.set(len(waiters), name)
+        if admitted:
+            admission_wait.observe(time.perf_counter() - start, name)
+            return None
+        if admitted is None:
+            return self.reject(name, "attente")
+        # Délestée par une requête plus prioritaire (déjà comptée)
+        return "file_pleine"
+
+    def release(self, name: str):
+        self.in_flight[name] -= 1
+        self.total -= 1
+        admission_in_flight.set(self.in_flight[name], name)
+        self._wake()
+
+    def _wake(self):
+        """Donne les places libres aux requêtes en attente, classe la plus prioritaire d'abord"""
+        for name in CLASSES:
+            waiters = self.waiters[name]
+            while waiters and self._can_admit(name):
+                future = waiters.popleft()
+                if future.done():
+                    continue
+                self._admit(name)
+                future.set_result(True)
+
+    def status(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "reserved": self.reserved,
+            "in_flight": self.total,
+            "classes": {
+                name: {
+                    "limit": self.limits[name],
+                    "in_flight": self.in_flight[name],
+                    "queued": len(self.waiters[name]),
+                    "admitted": self.admitted[name],
+                    "shed": self.shed[name],
+                }
+                for name in CLASSES
+            },
+        }
+
+
+controller = AdmissionController()
+buckets = TokenBuckets()
+
+
+async def _reply(send, status: int, detail: str, retry_after: str):
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", retry_after.encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _client(scope) -> str:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-client-id":
+            return value.decode("latin-1")
+    client = scope.get("client")
+    return client[0] if client else "inconnu"
+
+
+def _content_length(scope) -> int:
+    for name, value in scope.get("headers", ()):
+        if name == b"content-length":
+            return int(value) if value.isdigit() else -1
+    return -1
+
+
+async def _read_body(receive) -> Tuple[bytes, list]:
+    """Lit le corps de la requête et garde les messages pour les rejouer à l'application"""
+    messages, chunks = [], []
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks), messages
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI : classe la requête, applique le seau de jetons puis attend une place"""
+
+    def __init__(self, app, controller: AdmissionController = controller, buckets: TokenBuckets = buckets):
+        self.app = app
+        self.controller = controller
+        self.buckets = buckets
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method, path = scope["method"], scope["path"]
+        body = None
+        if method == "POST" and path.rstrip("/") == MISSIONS and 0 <= _content_length(scope) <= MAX_PEEKED_BODY:
+            # La priorité de la mission décide de la voie : le corps est lu puis rejoué
+            body, messages = await _read_body(receive)
+            replay = deque(messages)
+
+            async def receive_again():
+                return replay.popleft() if replay else await receive()
+
+            receive = receive_again
+
+        name = classify(method, path, body)
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        if self.buckets.rate > 0 and name != CRITICAL:
+            wait = self.buckets.take(_client(scope))
+            if wait > 0:
+                self.controller.reject(name, "debit")
+                return await _reply(send, 429, "Trop de requêtes pour ce client", str(math.ceil(wait)))
+
+        refused = await self.controller.acquire(name)
+        if refused is not None:
+            return await _reply(send, 503, "Serveur surchargé : requête délestée, réessayer plus tard", RETRY_AFTER)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
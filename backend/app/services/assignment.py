@@ -0,0 +1,301 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import String, case, cast, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.drone import Drone, StatutDrone
+from app.models.mission import Mission, StatutMission, Priority, Risk
+from app.services import eligibility, events, persistence
+from app.services.eligibility import DroneCandidate, EligibilityIndex
+from app.services.events import hub
+
+# Ordre de traitement des missions (plus petit = plus urgent)
+PRIORITY_RANK = {
+    Priority.CRITICAL.value: 0,
+    Priority.HIGH.value: 1,
+    Priority.MEDIUM.value: 2,
+    Priority.LOW.value: 3,
+}
+
+# Niveau de sécurité minimal du drone selon le risque de la mission
+RISK_MIN_SECURITE = {
+    Risk.LOW.value: 1,
+    Risk.MEDIUM.value: 2,
+    Risk.HIGH.value: 3,
+    Risk.CRITICAL.value: 4,
+}
+
+NIVEAUX_SECURITE = range(1, 6)
+DUREE_PAR_DEFAUT = 30  # minutes, identique à create_mission
+PLACEHOLDER_DRONE_IDS = ("", "AUTO")  # anciennes missions sans drone (remises à NULL par la migration 10)
+ASSIGN_ATTEMPTS = 5  # drones pris entre-temps écartés avant de laisser la mission en attente
+
+
+class DroneIndex:
+    """
+    Drones disponibles d'un tour d'attribution : un masque de bits sur l'index d'éligibilité.
+    Une recherche combine par ET binaire les drones disponibles, autorisés dans la zone, de
+    capacité, d'autonomie et de niveau de sécurité suffisants, puis retient le plus petit
+    drone compatible ; un drone attribué est retiré du masque.
+    """
+
+    def __init__(self, eligibility: EligibilityIndex, available: int = 0):
+        self.eligibility = eligibility
+        self.available = available
+
+    def __len__(self):
+        return self.available.bit_count()
+
+    def __contains__(self, drone_id):
+        return bool(self.available & self.eligibility.bits_of((drone_id,)))
+
+    def remove(self, drone_id: int) -> Optional[DroneCandidate]:
+        self.available &= ~self.eligibility.bits_of((drone_id,))
+        return self.eligibility.drones.get(drone_id)
+
+    def find(
+        self,
+        weight: float = 0,
+        niveau_securite: int = 1,
+        duree: float = DUREE_PAR_DEFAUT,
+        distance: Optional[float] = None,
+        zone: Optional[str] = None,
+    ) -> Optional[DroneCandidate]:
+        """
+        Retourne le drone compatible le plus ajusté : la plus petite capacité suffisante,
+        puis le plus faible niveau de sécurité suffisant, afin de garder les gros drones
+        et les drones les plus sûrs pour les missions qui en ont besoin.
+        """
+        mask = self.available & self.eligibility.candidates(weight, niveau_securite, distance, zone)
+        if not mask:
+            return None
+        return self.eligibility.best(mask, weight, duree, distance)
+
+    def pop(self, **requirement) -> Optional[DroneCandidate]:
+        candidate = self.find(**requirement)
+        if candidate is not None:
+            self.remove(candidate.drone_id)
+        return candidate
+
+
+def mission_requirement(mission: Mission, zone_names: Dict[int, str]) -> dict:
+    """Traduit une mission en contraintes pour l'index de drones"""
+    zone = zone_names.get(mission.zone_id) if mission.zone_id is not None else None
+    return {
+        "weight": mission.weight or 0,
+        "niveau_securite": RISK_MIN_SECURITE.get(mission.risk, 1),
+        "duree": mission.estimated_duration or DUREE_PAR_DEFAUT,
+        "zone": zone or None,
+    }
+
+
+def mission_sort_key(mission: Mission):
+    return (
+        PRIORITY_RANK.get(mission.priority, len(PRIORITY_RANK)),
+        mission.created_at or datetime.min,
+        mission.mission_id or 0,
+    )
+
+
+async def load_drone_index(db: AsyncSession) -> DroneIndex:
+    """Drones disponibles, en une requête sur le seul statut ; leurs caractéristiques sont dans l'index"""
+    index = await eligibility.get_index(db)
+    return DroneIndex(index, await eligibility.available_mask(db, index))
+
+
+async def load_zone_names(db: AsyncSession, missions: Iterable[Mission]) -> Dict[int, str]:
+    """Noms normalisés des zones des missions, lus dans l'index d'éligibilité"""
+    zone_ids = {mission.zone_id for mission in missions if mission.zone_id is not None}
+    if not zone_ids:
+        return {}
+    return await eligibility.zone_names(db, await eligibility.get_index(db), zone_ids)
+
+
+def solve(missions: Iterable[Mission], index: DroneIndex, zone_names: Dict[int, str]) -> List[Tuple[Mission, int]]:
+    """
+    Attribue les missions par ordre de priorité puis d'ancienneté.
+    Chaque drone attribué est retiré de l'index ; aucune requête SQL n'est émise.
+    """
+    assignments = []
+    for mission in sorted(missions, key=mission_sort_key):
+        if not index:
+            break
+        candidate = index.pop(**mission_requirement(mission, zone_names))
+        if candidate is not None:
+            assignments.append((mission, candidate.drone_id))
+    return assignments
+
+
+async def apply_assignments(db: AsyncSession, assignments: List[Tuple[Mission, int]]) -> List[Tuple[Mission, int]]:
+    """
+    Écrit les attributions en UPDATE groupés (versions incrémentées), sans commit, et
+    retourne celles qui ont été écrites. Un drone n'est pris que s'il est encore disponible,
+    une mission que si elle est encore en attente dans la version lue : les couples modifiés
+    entre-temps par une autre requête sont écartés et leur drone rendu.
+    """
+    if not assignments:
+        return []
+    claimed = set((await db.execute(
+        update(Drone)
+        .where(Drone.drone_id.in_([drone_id for _, drone_id in assignments]),
+               Drone.statut == StatutDrone.DISPONIBLE.value)
+        .values(**persistence.versioned(Drone, {"statut": StatutDrone.EN_MISSION.value}))
+        .returning(Drone.drone_id)
+        .execution_options(synchronize_session=False)
+    )).scalars())
+    assignments = [(mission, drone_id) for mission, drone_id in assignments if drone_id in claimed]
+    if not assignments:
+        return []
+
+    now = datetime.utcnow()
+    await persistence.update_many(db, Mission, [
+        {
+            "mission_id": mission.mission_id,
+            "drone_id": str(drone_id),
+            "status": StatutMission.IN_PROGRESS.value,
+            "updated_at": now,
+            "version": mission.version,
+        }
+        for mission, drone_id in assignments
+    ], Mission.status == StatutMission.PENDING.value, expected_version=True)
+    # Le drone vient d'être pris dans cette transaction : seule notre écriture a pu le poser
+    written = dict((await db.execute(
+        select(Mission.mission_id, Mission.drone_id)
+        .where(Mission.mission_id.in_([mission.mission_id for mission, _ in assignments]))
+    )).all())
+    released = [drone_id for mission, drone_id in assignments if written.get(mission.mission_id) != str(drone_id)]
+    if released:
+        await db.execute(
+            update(Drone)
+            .where(Drone.drone_id.in_(released))
+            .values(**persistence.versioned(Drone, {"statut": StatutDrone.DISPONIBLE.value}))
+            .execution_options(synchronize_session=False)
+        )
+    return [(mission, drone_id) for mission, drone_id in assignments if drone_id not in released]
+
+
+async def release_drones(db: AsyncSession, drone_ids: Iterable[Optional[str]]) -> List[Drone]:
+    """
+    Rend disponibles, sans commit, les drones de missions terminées, échouées, remises en
+    attente ou supprimées. Un drone n'est rendu que s'il est en mission et qu'aucune autre
+    mission en cours ne l'occupe. Retourne les drones rendus (à diffuser après commit).
+    """
+    ids = {int(drone_id) for drone_id in drone_ids if drone_id and str(drone_id).isdigit()}
+    if not ids:
+        return []
+    busy = select(Mission.mission_id).where(
+        Mission.drone_id == cast(Drone.drone_id, String), Mission.status == StatutMission.IN_PROGRESS.value
+    )
+    statement = (
+        update(Drone)
+        .where(Drone.drone_id.in_(ids), Drone.statut == StatutDrone.EN_MISSION.value, ~busy.exists())
+        .values(**persistence.versioned(Drone, {"statut": StatutDrone.DISPONIBLE.value}))
+        .returning(Drone)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    return list((await db.execute(statement)).scalars())
+
+
+async def publish_assignments(db: AsyncSession, assigned: List[Tuple[int, int]]):
+    """
+    Diffuse les attributions (couples mission_id, drone_id) aux abonnés temps réel, après
+    commit : missions et drones relus en base, publiés en objets complets comme les autres
+    événements *.updated
+    """
+    if not hub.subscribers or not assigned:
+        return
+    missions = (await db.execute(
+        select(Mission)
+        .where(Mission.mission_id.in_([mission_id for mission_id, _ in assigned]))
+        .execution_options(populate_existing=True)
+    )).scalars().all()
+    drones = (await db.execute(
+        select(Drone)
+        .where(Drone.drone_id.in_([drone_id for _, drone_id in assigned]))
+        .execution_options(populate_existing=True)
+    )).scalars().all()
+    hub.publish_many(events.MISSION_UPDATED, (events.mission_payload(mission) for mission in missions))
+    hub.publish_many(events.DRONE_UPDATED, (events.drone_payload(drone) for drone in drones))
+
+
+async def assign_mission(db: AsyncSession, mission: Mission) -> Optional[Drone]:
+    """
+    Attribue un drone à une mission pas encore enregistrée.
+    Les champs de la mission et le statut du drone sont modifiés dans la session, sans commit.
+    Le drone n'est pris que s'il est toujours disponible : un drone attribué entre-temps par
+    une requête concurrente est écarté au profit du candidat suivant (au plus
+    ASSIGN_ATTEMPTS essais, puis la mission reste en attente pour le planificateur).
+    Retourne le drone pris, dans son état écrit, ou None.
+    """
+    if mission.start_date is not None and mission.start_date > datetime.utcnow():
+        return None
+    index = await load_drone_index(db)
+    requirement = mission_requirement(mission, await load_zone_names(db, [mission]))
+    for _ in range(ASSIGN_ATTEMPTS):
+        candidate = index.pop(**requirement)
+        if candidate is None:
+            return None
+        drone = await claim_drone(db, candidate.drone_id)
+        if drone is not None:
+            mission.drone_id = str(drone.drone_id)
+            mission.status = StatutMission.IN_PROGRESS.value
+            return drone
+    return None
+
+
+async def claim_drone(db: AsyncSession, drone_id: int) -> Optional[Drone]:
+    """Passe le drone en mission s'il est encore disponible et le retourne ; None s'il a été pris entre-temps"""
+    return (await db.execute(
+        update(Drone)
+        .where(Drone.drone_id == drone_id, Drone.statut == StatutDrone.DISPONIBLE.value)
+        .values(**persistence.versioned(Drone, {"statut": StatutDrone.EN_MISSION.value}))
+        .returning(Drone)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )).scalar_one_or_none()
+
+
+def pending_missions_query():
+    """Missions en attente, sans drone et dont la date de début est atteinte"""
+    return select(Mission).where(
+        Mission.status == StatutMission.PENDING.value,
+        or_(Mission.drone_id.is_(None), Mission.drone_id.in_(PLACEHOLDER_DRONE_IDS)),
+        or_(Mission.start_date.is_(None), Mission.start_date <= datetime.utcnow()),
+    )
+
+
+async def assign_pending_missions(
+    db: AsyncSession, limit: Optional[int] = None, mission_ids: Optional[Iterable[int]] = None
+) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """
+    Résout en lot toutes les missions en attente, ou seulement `mission_ids` (import en lot),
+    et écrit les attributions sans commit (job de la file d'écriture).
+    Retourne les couples (mission_id, drone_id) attribués et les missions restées sans drone.
+    """
+    query = pending_missions_query()
+    if mission_ids is not None:
+        mission_ids = set(mission_ids)
+        if not mission_ids:
+            return [], []
+        # Intervalle plutôt que IN : un import peut dépasser la limite de paramètres du pilote
+        query = query.where(Mission.mission_id.between(min(mission_ids), max(mission_ids)))
+    query = query.order_by(
+        case(PRIORITY_RANK, value=Mission.priority, else_=len(PRIORITY_RANK)),
+        Mission.created_at,
+        Mission.mission_id,
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    missions = (await db.execute(query)).scalars().all()
+    if mission_ids is not None:
+        missions = [mission for mission in missions if mission.mission_id in mission_ids]
+    if not missions:
+        return [], []
+
+    index = await load_drone_index(db)
+    assignments = solve(missions, index, await load_zone_names(db, missions))
+    assignments = await apply_assignments(db, assignments)
+
+    assigned_ids = {mission.mission_id for mission, _ in assignments}
+    return (
+        [(mission.mission_id, drone_id) for mission, drone_id in assignments],
+        [mission.mission_id for mission in missions if mission.mission_id not in assigned_ids],
+    )
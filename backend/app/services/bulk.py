@@ -0,0 +1,60 @@
+import json
+from typing import List, Tuple, Type
+from pydantic import BaseModel, ValidationError
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+MAX_ROWS = 50_000
+
+
+class PayloadError(ValueError):
+    """Corps de requête illisible (ni tableau JSON ni NDJSON)"""
+
+
+def parse_rows(body: bytes, content_type: str = "") -> List[Tuple[int, object]]:
+    """
+    Découpe le corps en lignes (index, objet JSON).
+    Accepte un tableau JSON ou du NDJSON (une ligne JSON par objet).
+    Une ligne NDJSON mal formée est conservée comme chaîne pour être signalée à part ;
+    un corps qui n'est pas de l'UTF-8 est rejeté en entier.
+    """
+    if content_type.split(";")[0].strip().lower() in NDJSON_TYPES:
+        try:
+            text = body.decode("utf-8")
+        except UnicodeDecodeError as error:
+            raise PayloadError(f"Encodage invalide (UTF-8 attendu) : {error}")
+        rows = []
+        for index, line in enumerate(text.splitlines()):
+            if not line.strip():
+                continue
+            try:
+                rows.append((index, json.loads(line)))
+            except ValueError:
+                rows.append((index, line))
+    else:
+        try:
+            data = json.loads(body or b"[]")
+        except ValueError as error:
+            raise PayloadError(f"JSON invalide : {error}")
+        if not isinstance(data, list):
+            raise PayloadError("Le corps doit être un tableau JSON ou du NDJSON")
+        rows = list(enumerate(data))
+    if len(rows) > MAX_ROWS:
+        raise PayloadError(f"Au plus {MAX_ROWS} lignes par requête")
+    return rows
+
+
+def validate_rows(rows: List[Tuple[int, object]], schema: Type[BaseModel]):
+    """Valide chaque ligne et sépare les lignes valides des erreurs (index, détails)"""
+    valid, errors = [], []
+    for index, row in rows:
+        if not isinstance(row, dict):
+            errors.append({"index": index, "errors": [{"msg": "Objet JSON attendu"}]})
+            continue
+        try:
+            valid.append((index, schema.model_validate(row)))
+        except ValidationError as error:
+            errors.append({
+                "index": index,
+                "errors": error.errors(include_url=False, include_context=False, include_input=False)
+            })
+    return valid, errors
@@ -0,0 +1,199 @@
+"""
+Cache des réponses des listes lues à chaque chargement de page (drones, zones).
+
+Le corps JSON est mis en cache déjà sérialisé, avec son ETag et ses en-têtes de pagination.
+Les entrées sont regroupées par espace de noms (`drones`, `zones`) : les routes d'écriture
+invalident tout l'espace concerné. Le client qui renvoie l'ETag dans If-None-Match reçoit
+un 304 sans corps.
+
+Deux stockages :
+- en mémoire (LRU avec TTL), propre à chaque processus : par défaut ;
+- Redis (ou compatible), partagé entre processus, si REDIS_URL est défini et que le
+  paquet `redis` est installé. Une erreur Redis est traitée comme une absence en cache.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+from app.services import fastjson
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # dépendance optionnelle
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+DRONES = "drones"
+ZONES = "zones"
+
+CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))  # secondes ; 0 désactive le stockage
+CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+CACHED_HEADERS = ("x-next-cursor", "x-total-count")
+CACHE_STATUS_HEADER = "X-Cache"
+
+# Corps, ETag, en-têtes à rejouer
+Entry = Tuple[bytes, str, Dict[str, str]]
+
+
+class MemoryCache:
+    """LRU avec expiration, protégé par un verrou"""
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[Entry, float]]" = OrderedDict()
+        self.generations: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    async def generation(self, namespace: str) -> int:
+        return self.generations.get(namespace, 0)
+
+    async def get(self, namespace: str, generation: int, key: str) -> Optional[Entry]:
+        with self.lock:
+            item = self.entries.get((namespace, key))
+            if item is None:
+                return None
+            if time.monotonic() >= item[1]:
+                del self.entries[(namespace, key)]
+                return None
+            self.entries.move_to_end((namespace, key))
+            return item[0]
+
+    async def set(self, namespace: str, generation: int, key: str, entry: Entry, ttl: float):
+        with self.lock:
+            # Une invalidation survenue pendant le calcul rend la réponse obsolète : on ne la garde pas
+            if generation != self.generations.get(namespace, 0):
+                return
+            self.entries[(namespace, key)] = (entry, time.monotonic() + ttl)
+            self.entries.move_to_end((namespace, key))
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    async def invalidate(self, namespace: str):
+        with self.lock:
+            self.generations[namespace] = self.generations.get(namespace, 0) + 1
+            for cache_key in [cache_key for cache_key in self.entries if cache_key[0] == namespace]:
+                del self.entries[cache_key]
+
+
+class RedisCache:
+    """
+    Entrées stockées sous cache:<espace>:<génération>:<clé> avec expiration Redis.
+    L'invalidation incrémente la génération de l'espace : les anciennes clés ne sont
+    plus jamais lues et expirent d'elles-mêmes, sans parcours des clés (SCAN).
+    """
+
+    def __init__(self, url: str):
+        self.client = redis.from_url(url)
+
+    async def generation(self, namespace: str) -> int:
+        try:
+            return int(await self.client.get(f"cache:{namespace}:gen") or 0)
+        except (redis.RedisError, OSError) as error:
+            logger.warning("Cache Redis indisponible : %s", error)
+            return -1
+
+    async def get(self, namespace: str, generation: int, key: str) -> Optional[Entry]:
+        if generation < 0:
+            return None
+        try:
+            raw = await self.client.get(f"cache:{namespace}:{generation}:{key}")
+        except (redis.RedisError, OSError) as error:
+            logger.warning("Cache Redis indisponible : %s", error)
+            return None
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return data["body"].encode(), data["etag"], data["headers"]
+
+    async def set(self, namespace: str, generation: int, key: str, entry: Entry, ttl: float):
+        if generation < 0:
+            return
+        body, etag, headers = entry
+        raw = json.dumps({"body": body.decode(), "etag": etag, "headers": headers})
+        try:
+            await self.client.set(f"cache:{namespace}:{generation}:{key}", raw, px=int(ttl * 1000))
+        except (redis.RedisError, OSError) as error:
+            logger.warning("Cache Redis indisponible : %s", error)
+
+    async def invalidate(self, namespace: str):
+        try:
+            await self.client.incr(f"cache:{namespace}:gen")
+        except (redis.RedisError, OSError) as error:
+            logger.warning("Invalidation Redis impossible : %s", error)
+
+
+def _create_backend():
+    if REDIS_URL:
+        if redis is not None:
+            return RedisCache(REDIS_URL)
+        logger.warning("REDIS_URL défini mais le paquet redis n'est pas installé : cache en mémoire")
+    return MemoryCache()
+
+
+backend = _create_backend()
+
+
+async def invalidate(*namespaces: str):
+    """À appeler après toute écriture touchant les drones ou les zones"""
+    for namespace in namespaces:
+        await backend.invalidate(namespace)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparaison faible (RFC 9110) : le préfixe W/ est ignoré
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def _request_key(request: Request) -> str:
+    return request.url.path + "?" + "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+
+
+def _build(entry: Entry, if_none_match: Optional[str], status: str) -> Response:
+    body, etag, headers = entry
+    headers = {**headers, "ETag": etag, "Cache-Control": "no-cache", CACHE_STATUS_HEADER: status}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cached_json(
+    request: Request,
+    response: Response,
+    namespace: str,
+    load: Callable[[], Awaitable[object]],
+) -> Response:
+    """
+    Réponse JSON servie depuis le cache, ou calculée par `load` puis mise en cache.
+    `load` renvoie des lignes prêtes à encoder (fastjson) ; les en-têtes de
+    pagination qu'il pose sur `response` sont conservés avec l'entrée.
+    """
+    key = _request_key(request)
+    if_none_match = request.headers.get("if-none-match")
+    generation = await backend.generation(namespace)
+    entry = await backend.get(namespace, generation, key)
+    if entry is not None:
+        return _build(entry, if_none_match, "HIT")
+
+    body = fastjson.dumps(await load())
+    headers = {name: value for name, value in response.headers.items() if name in CACHED_HEADERS}
+    entry = (body, make_etag(body), headers)
+    if CACHE_TTL > 0:
+        await backend.set(namespace, generation, key, entry, CACHE_TTL)
+    return _build(entry, if_none_match, "MISS")
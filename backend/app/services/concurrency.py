@@ -0,0 +1,48 @@
+"""
+Contrôle de concurrence optimiste des missions et des drones.
+
+Chaque ligne porte une colonne `version`, incrémentée par toute écriture (PATCH, attribution,
+mises à jour groupées de statut). GET et PATCH d'une ligne renvoient sa version dans l'en-tête
+ETag (`"3"`). Un PATCH accompagné de If-Match n'est appliqué que si la ligne en est toujours à
+cette version, par un `UPDATE ... WHERE id = ? AND version = ?` : aucun verrou n'est pris, et
+l'écrivain en retard reçoit 409 avec la version actuelle dans l'ETag ; il relit et recommence.
+Sans If-Match, le PATCH s'applique à la dernière version (comportement historique).
+"""
+from typing import Optional
+from fastapi import HTTPException, Response
+from app.services.persistence import VersionConflict
+
+ETAG_HEADER = "ETag"
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def set_etag(response: Response, row) -> None:
+    response.headers[ETAG_HEADER] = etag(row.version)
+
+
+def expected_version(if_match: Optional[str]) -> Optional[int]:
+    """
+    Version attendue d'après If-Match ; None sans en-tête ou avec `*` (la ligne doit seulement
+    exister). Une seule version est acceptée.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="En-tête If-Match invalide")
+
+
+def conflict(error: VersionConflict, detail: str) -> HTTPException:
+    """409 avec la version actuelle de la ligne"""
+    return HTTPException(
+        status_code=409,
+        detail=f"{detail} (version actuelle : {error.current.version})",
+        headers={ETAG_HEADER: etag(error.current.version)},
+    )
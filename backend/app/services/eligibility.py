@@ -0,0 +1,405 @@
+"""
+Index d'éligibilité des drones, en mémoire.
+
+Chaque drone reçoit une position de bit. L'index garde :
+
+- par nom de zone normalisé (minuscules, sans accents ni espaces superflus), l'ensemble
+  des drones autorisés à la survoler, plus celui des drones sans restriction ;
+- des tableaux triés sur poids_max, autonomie_max et niveau_securite, avec l'union des bits
+  de chaque suffixe commençant à un multiple du bloc (BLOCK, ou √n positions) : « valeur ≥ x »
+  est une recherche dichotomique, une union précalculée et les quelques bits restants ;
+- le nom normalisé de chaque zone, pour passer d'une mission (zone_id) à ses drones.
+
+« Drones disponibles pouvant survoler Z, portant ≥ W kg, de sécurité ≥ S » est alors un ET
+binaire de ces ensembles et de celui des drones disponibles (relu en base à chaque appel :
+le statut change à chaque attribution, y compris dans les autres processus). Les chaînes
+`zone_vol_autorisee` ne sont analysées qu'à l'écriture d'un drone.
+
+L'index est chargé une fois depuis la base puis tenu à jour par les routes des drones et
+des zones, comme l'index spatial. Un drone ou une zone inconnu (créé par un autre
+processus) est lu en base à la première rencontre.
+"""
+import asyncio
+import math
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.drone import Drone, StatutDrone
+from app.models.zone_vol import ZoneDeVol
+
+BLOCK = 64  # positions minimales entre deux unions de suffixe précalculées
+SPARSE = 64  # en dessous de ce nombre de candidats, on les parcourt directement
+
+DRONE_COLUMNS = (
+    Drone.drone_id, Drone.poids_max, Drone.autonomie_max, Drone.vitesse_max, Drone.niveau_securite,
+    Drone.zone_vol_autorisee,
+)
+
+
+def normalise(name: str) -> str:
+    """Nom de zone comparable : minuscules, sans accents, espaces réduits"""
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return " ".join(text.lower().split())
+
+
+def parse_zones(zone_vol_autorisee: Optional[str]) -> Optional[frozenset]:
+    """
+    Normalise la liste des zones autorisées d'un drone.
+    None signifie que le drone n'est pas restreint.
+    """
+    if not zone_vol_autorisee:
+        return None
+    zones = frozenset(
+        normalise(part)
+        for part in zone_vol_autorisee.replace(";", ",").split(",")
+        if part.strip()
+    )
+    return zones or None
+
+
+class DroneCandidate:
+    """Caractéristiques d'un drone, extraites une seule fois"""
+
+    __slots__ = ("drone_id", "poids_max", "autonomie_max", "vitesse_max", "niveau_securite", "zones")
+
+    def __init__(self, drone_id, poids_max, autonomie_max, vitesse_max, niveau_securite, zone_vol_autorisee):
+        self.drone_id = drone_id
+        self.poids_max = poids_max
+        self.autonomie_max = autonomie_max
+        self.vitesse_max = vitesse_max
+        self.niveau_securite = niveau_securite
+        self.zones = parse_zones(zone_vol_autorisee)
+
+    @property
+    def endurance(self) -> float:
+        """Temps de vol maximal en minutes"""
+        return self.autonomie_max / self.vitesse_max * 60
+
+    @property
+    def fit_key(self) -> tuple:
+        """Ordre de préférence : plus petite capacité, puis plus faible niveau de sécurité"""
+        return (self.poids_max, self.niveau_securite, self.drone_id)
+
+    def can_fly(self, duree: float, distance: Optional[float], zone: Optional[str]) -> bool:
+        if distance is not None and distance > self.autonomie_max:
+            return False
+        if duree > self.endurance:
+            return False
+        if zone is not None and self.zones is not None and zone not in self.zones:
+            return False
+        return True
+
+
+def mask_of(slots: Iterable[int]) -> int:
+    """Ensemble de bits des positions données, construit en un seul entier"""
+    slots = list(slots)
+    if not slots:
+        return 0
+    buffer = bytearray((max(slots) >> 3) + 1)
+    for slot in slots:
+        buffer[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buffer, "little")
+
+
+class SortedBits:
+    """
+    Tableau trié de (valeur, départage..., drone_id) et position de bit de chaque entrée. Les
+    unions des suffixes commençant à chaque multiple du bloc (BLOCK, ou √n pour les grandes
+    flottes) sont recalculées à la première requête qui suit une modification.
+    """
+
+    def __init__(self):
+        self.keys: List[tuple] = []
+        self.slots: List[int] = []
+        self._block = BLOCK
+        self._suffixes: Optional[List[int]] = None
+
+    def load(self, entries: Iterable[tuple]):
+        """Remplit le tableau en une fois à partir de (clé, position)"""
+        entries = sorted(entries)
+        self.keys = [key for key, _ in entries]
+        self.slots = [slot for _, slot in entries]
+        self._suffixes = None
+
+    def add(self, key: tuple, slot: int):
+        position = bisect_left(self.keys, key)
+        self.keys.insert(position, key)
+        self.slots.insert(position, slot)
+        self._suffixes = None
+
+    def remove(self, key: tuple):
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            del self.keys[position]
+            del self.slots[position]
+            self._suffixes = None
+
+    def _build(self) -> List[int]:
+        self._block = max(BLOCK, math.isqrt(len(self.slots)))
+        suffixes = [0] * (len(self.slots) // self._block + 1)
+        buffer = bytearray((max(self.slots, default=0) >> 3) + 1)
+        for position in range(len(self.slots) - 1, -1, -1):
+            slot = self.slots[position]
+            buffer[slot >> 3] |= 1 << (slot & 7)
+            if position % self._block == 0:
+                suffixes[position // self._block] = int.from_bytes(buffer, "little")
+        return suffixes
+
+    def position(self, value) -> int:
+        return bisect_left(self.keys, (value,))
+
+    def at_least(self, value) -> int:
+        """Bits des entrées dont la valeur est ≥ `value`"""
+        if self._suffixes is None:
+            self._suffixes = self._build()
+        start = self.position(value)
+        block = -(-start // self._block)
+        mask = self._suffixes[block] if block * self._block < len(self.slots) else 0
+        return mask | mask_of(self.slots[start:block * self._block])
+
+
+class EligibilityIndex:
+    def __init__(self):
+        self.loaded = False
+        self.clear()
+
+    def clear(self):
+        self.drones: Dict[int, DroneCandidate] = {}
+        self.slots: Dict[int, int] = {}  # drone_id -> position de bit
+        self.by_slot: Dict[int, DroneCandidate] = {}
+        self.free_slots: List[int] = []
+        self.all = 0
+        self.unrestricted = 0  # drones sans zone_vol_autorisee
+        self.zones: Dict[str, int] = {}  # nom normalisé -> drones autorisés
+        self.zone_names: Dict[int, str] = {}  # zone_id -> nom normalisé
+        self.poids = SortedBits()
+        self.autonomie = SortedBits()
+        self.securite = SortedBits()
+
+    def __len__(self):
+        return len(self.drones)
+
+    def __contains__(self, drone_id):
+        return drone_id in self.drones
+
+    # --- écriture ---
+
+    def load(self, candidates: Iterable[DroneCandidate]):
+        """Chargement initial : ensembles construits en une passe plutôt que drone par drone"""
+        self.clear()
+        unrestricted, zones = [], {}
+        for slot, candidate in enumerate(candidates):
+            self.drones[candidate.drone_id] = candidate
+            self.slots[candidate.drone_id] = slot
+            self.by_slot[slot] = candidate
+            if candidate.zones is None:
+                unrestricted.append(slot)
+            else:
+                for zone in candidate.zones:
+                    zones.setdefault(zone, []).append(slot)
+        self.all = mask_of(self.slots.values())
+        self.unrestricted = mask_of(unrestricted)
+        self.zones = {zone: mask_of(slots) for zone, slots in zones.items()}
+        self.poids.load((candidate.fit_key, slot) for slot, candidate in self.by_slot.items())
+        self.autonomie.load(((c.autonomie_max, c.drone_id), slot) for slot, c in self.by_slot.items())
+        self.securite.load(((c.niveau_securite, c.drone_id), slot) for slot, c in self.by_slot.items())
+
+    def upsert_drone(self, candidate: DroneCandidate):
+        self.remove_drone(candidate.drone_id)
+        slot = self.free_slots.pop() if self.free_slots else len(self.slots)
+        bit = 1 << slot
+        self.drones[candidate.drone_id] = candidate
+        self.slots[candidate.drone_id] = slot
+        self.by_slot[slot] = candidate
+        self.all |= bit
+        if candidate.zones is None:
+            self.unrestricted |= bit
+        else:
+            for zone in candidate.zones:
+                self.zones[zone] = self.zones.get(zone, 0) | bit
+        self.poids.add(candidate.fit_key, slot)
+        self.autonomie.add((candidate.autonomie_max, candidate.drone_id), slot)
+        self.securite.add((candidate.niveau_securite, candidate.drone_id), slot)
+
+    def remove_drone(self, drone_id: int) -> Optional[DroneCandidate]:
+        candidate = self.drones.pop(drone_id, None)
+        if candidate is None:
+            return None
+        slot = self.slots.pop(drone_id)
+        del self.by_slot[slot]
+        self.free_slots.append(slot)
+        keep = ~(1 << slot)
+        self.all &= keep
+        self.unrestricted &= keep
+        for zone in candidate.zones or ():
+            remaining = self.zones[zone] & keep
+            if remaining:
+                self.zones[zone] = remaining
+            else:
+                del self.zones[zone]
+        self.poids.remove(candidate.fit_key)
+        self.autonomie.remove((candidate.autonomie_max, candidate.drone_id))
+        self.securite.remove((candidate.niveau_securite, candidate.drone_id))
+        return candidate
+
+    def upsert_zone(self, zone_id: int, nom_zone: Optional[str]):
+        self.zone_names[zone_id] = normalise(nom_zone or "")
+
+    def remove_zone(self, zone_id: int):
+        self.zone_names.pop(zone_id, None)
+
+    # --- lecture ---
+
+    def bits_of(self, drone_ids: Iterable[int]) -> int:
+        return mask_of(slot for slot in map(self.slots.get, drone_ids) if slot is not None)
+
+    def zone_mask(self, zone: Optional[str]) -> int:
+        """
+        Drones autorisés dans la zone (nom normalisé) : ceux qui la citent et ceux sans
+        restriction de zone, seuls à pouvoir voler dans une zone qu'aucun drone ne cite ;
+        tous si aucune zone n'est donnée.
+        """
+        if zone is None:
+            return self.all
+        return self.zones.get(zone, 0) | self.unrestricted
+
+    def candidates(
+        self,
+        weight: float = 0,
+        niveau_securite: int = 1,
+        distance: Optional[float] = None,
+        zone: Optional[str] = None,
+    ) -> int:
+        """Bits des drones satisfaisant la zone, la charge, le niveau de sécurité et l'autonomie"""
+        mask = self.zone_mask(zone)
+        if weight > 0:
+            mask &= self.poids.at_least(weight)
+        if niveau_securite > 1:
+            mask &= self.securite.at_least(niveau_securite)
+        if distance is not None:
+            mask &= self.autonomie.at_least(distance)
+        return mask
+
+    def iterate(self, mask: int, weight: float = 0) -> Iterable[DroneCandidate]:
+        """Drones du masque par ordre de préférence (plus petite capacité ≥ weight d'abord)"""
+        if mask.bit_count() <= SPARSE:
+            found = []
+            while mask:
+                low = mask & -mask
+                found.append(self.by_slot[low.bit_length() - 1])
+                mask ^= low
+            yield from sorted(found, key=lambda candidate: candidate.fit_key)
+            return
+        # Masque dense : parcours du tableau des capacités, test de chaque bit dans les octets
+        data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+        size = len(data) * 8
+        slots = self.poids.slots
+        for position in range(self.poids.position(weight), len(slots)):
+            slot = slots[position]
+            if slot < size and data[slot >> 3] >> (slot & 7) & 1:
+                yield self.by_slot[slot]
+
+    def best(self, mask: int, weight: float, duree: float, distance: Optional[float]) -> Optional[DroneCandidate]:
+        """Premier drone du masque, par ordre de préférence, dont l'endurance couvre la mission"""
+        for candidate in self.iterate(mask, weight):
+            if candidate.can_fly(duree, distance, None):
+                return candidate
+        return None
+
+    def status(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "drones": len(self.drones),
+            "unrestricted": self.unrestricted.bit_count(),
+            "zones": len(self.zones),
+            "zone_names": len(self.zone_names),
+        }
+
+
+index = EligibilityIndex()
+_load_lock = asyncio.Lock()
+
+
+def index_drone(drone: Drone):
+    """À appeler après la création ou la modification d'un drone"""
+    if index.loaded:
+        index.upsert_drone(DroneCandidate(*(getattr(drone, column.key) for column in DRONE_COLUMNS)))
+
+
+def unindex_drone(drone_id: int):
+    if index.loaded:
+        index.remove_drone(drone_id)
+
+
+def index_zone(zone: ZoneDeVol):
+    """À appeler après la création ou la modification d'une zone"""
+    if index.loaded:
+        index.upsert_zone(zone.zone_id, zone.nom_zone)
+
+
+def unindex_zone(zone_id: int):
+    if index.loaded:
+        index.remove_zone(zone_id)
+
+
+async def get_index(db: AsyncSession) -> EligibilityIndex:
+    """Index des drones et des noms de zones, chargé depuis la base au premier appel"""
+    if not index.loaded:
+        async with _load_lock:
+            if not index.loaded:
+                drones = await db.execute(select(*DRONE_COLUMNS))
+                zones = await db.execute(select(ZoneDeVol.zone_id, ZoneDeVol.nom_zone))
+                index.load(DroneCandidate(*row) for row in drones)
+                for zone_id, nom_zone in zones:
+                    index.upsert_zone(zone_id, nom_zone)
+                index.loaded = True
+    return index
+
+
+async def available_mask(db: AsyncSession, eligibility: EligibilityIndex) -> int:
+    """Bits des drones disponibles ; les drones absents de l'index (autre processus) y sont ajoutés"""
+    ids = (await db.execute(select(Drone.drone_id).where(Drone.statut == StatutDrone.DISPONIBLE.value))).scalars().all()
+    missing = [drone_id for drone_id in ids if drone_id not in eligibility]
+    if missing:
+        for row in await db.execute(select(*DRONE_COLUMNS).where(Drone.drone_id.in_(missing))):
+            eligibility.upsert_drone(DroneCandidate(*row))
+    return eligibility.bits_of(ids)
+
+
+async def zone_names(db: AsyncSession, eligibility: EligibilityIndex, zone_ids: Iterable[int]) -> Dict[int, str]:
+    """Noms normalisés des zones ; les zones absentes de l'index sont lues en base"""
+    zone_ids = set(zone_ids)
+    missing = [zone_id for zone_id in zone_ids if zone_id not in eligibility.zone_names]
+    if missing:
+        for zone_id, nom_zone in await db.execute(
+            select(ZoneDeVol.zone_id, ZoneDeVol.nom_zone).where(ZoneDeVol.zone_id.in_(missing))
+        ):
+            eligibility.upsert_zone(zone_id, nom_zone)
+    return {zone_id: eligibility.zone_names[zone_id] for zone_id in zone_ids if zone_id in eligibility.zone_names}
+
+
+async def eligible_drones(
+    db: AsyncSession,
+    zone_id: Optional[int] = None,
+    weight: float = 0,
+    niveau_securite: int = 1,
+    distance: Optional[float] = None,
+    limit: int = 100,
+) -> Optional[List[int]]:
+    """IDs des drones disponibles compatibles, du plus ajusté au moins ajusté ; None si la zone n'existe pas"""
+    eligibility = await get_index(db)
+    zone = None
+    if zone_id is not None:
+        names = await zone_names(db, eligibility, [zone_id])
+        if zone_id not in names:
+            return None
+        zone = names[zone_id] or None
+    mask = await available_mask(db, eligibility) & eligibility.candidates(weight, niveau_securite, distance, zone)
+    found = []
+    for candidate in eligibility.iterate(mask, weight):
+        if len(found) >= limit:
+            break
+        found.append(candidate.drone_id)
+    return found
@@ -0,0 +1,129 @@
+"""
+Bus d'événements en mémoire pour la diffusion temps réel (SSE et WebSocket).
+
+Les routes publient après chaque commit ; chaque abonné possède une file bornée.
+Un abonné trop lent perd les événements les plus anciens et reçoit un événement
+`lagged` indiquant combien ont été perdus, afin de se resynchroniser par l'API REST.
+Les événements *.created et *.updated portent l'objet complet (schéma de réponse de
+l'API) ; les événements *.deleted, seulement l'identifiant.
+"""
+import asyncio
+import json
+import time
+from typing import Dict, Iterable, Optional
+from app.schemas.drone import DroneResponse
+from app.schemas.mission import MissionResponse
+
+QUEUE_SIZE = 1000
+
+MISSION_CREATED = "mission.created"
+MISSION_UPDATED = "mission.updated"
+MISSION_DELETED = "mission.deleted"
+DRONE_CREATED = "drone.created"
+DRONE_UPDATED = "drone.updated"
+DRONE_DELETED = "drone.deleted"
+LAGGED = "lagged"
+
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+class Event:
+    """Événement sérialisé une seule fois, quel que soit le nombre d'abonnés"""
+
+    __slots__ = ("type", "data", "message")
+
+    def __init__(self, type: str, data: dict):
+        self.type = type
+        self.data = data
+        self.message = json.dumps({"type": type, "data": data, "ts": time.time()}, default=_json_default)
+
+
+class Subscriber:
+    def __init__(self, filters: Optional[Dict[str, str]] = None, queue_size: int = QUEUE_SIZE):
+        # Filtres : type (mission/drone), status, category, drone_id ; None = tout accepter
+        self.filters = {key: str(value) for key, value in (filters or {}).items() if value is not None}
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def matches(self, event: Event) -> bool:
+        for key, expected in self.filters.items():
+            if key == "type":
+                if event.type.split(".", 1)[0] != expected:
+                    return False
+                continue
+            value = event.data.get(key)
+            if value is None or str(value) != expected:
+                return False
+        return True
+
+    def offer(self, event: Event):
+        """Dépose un événement sans jamais bloquer l'émetteur"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event.message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Prochain message, précédé d'un avis `lagged` si des événements ont été perdus"""
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return Event(LAGGED, {"dropped": dropped}).message
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventHub:
+    def __init__(self):
+        self.subscribers = set()
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, filters: Optional[Dict[str, str]] = None, queue_size: int = QUEUE_SIZE) -> Subscriber:
+        subscriber = Subscriber(filters, queue_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, type: str, data: dict):
+        if not self.subscribers:
+            return
+        event = Event(type, data)
+        self.published += 1
+        for subscriber in self.subscribers:
+            if subscriber.matches(event):
+                subscriber.offer(event)
+                self.delivered += 1
+
+    def publish_many(self, type: str, payloads: Iterable[dict]):
+        if not self.subscribers:
+            return
+        for data in payloads:
+            self.publish(type, data)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "queued": sum(subscriber.queue.qsize() for subscriber in self.subscribers),
+            "lagging": sum(1 for subscriber in self.subscribers if subscriber.dropped),
+        }
+
+
+hub = EventHub()
+
+
+def mission_payload(mission, **overrides) -> dict:
+    payload = MissionResponse.model_validate(mission).model_dump(mode="json")
+    payload.update(overrides)
+    return payload
+
+
+def drone_payload(drone) -> dict:
+    return DroneResponse.model_validate(drone).model_dump(mode="json")
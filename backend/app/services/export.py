@@ -0,0 +1,190 @@
+"""
+Export en flux de l'historique des missions, joint aux missions et aux drones.
+
+Les lignes sont lues par lots avec un curseur côté serveur (stream_results / yield_per)
+et encodées lot par lot dans un générateur asynchrone : la mémoire reste bornée par la
+taille d'un lot, quelle que soit la taille de la table.
+
+Formats :
+- ndjson : un objet JSON par ligne ;
+- csv : en-tête puis une ligne par enregistrement ;
+- colonnes : NDJSON en colonnes, une ligne par lot ({"colonne": [valeurs...], ...}) ;
+- parquet : un groupe de lignes par lot, si le paquet `pyarrow` est installé.
+"""
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+import orjson
+from sqlalchemy import Select, select
+from app.database import async_read_engine
+from app.models import Drone, HistoriqueMission, Mission
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # dépendance optionnelle
+    pyarrow = None
+
+BATCH_SIZE = 1000
+
+NDJSON = "ndjson"
+CSV = "csv"
+COLONNES = "colonnes"
+PARQUET = "parquet"
+
+MEDIA_TYPES = {
+    NDJSON: "application/x-ndjson",
+    CSV: "text/csv; charset=utf-8",
+    COLONNES: "application/x-ndjson",
+    PARQUET: "application/vnd.apache.parquet",
+}
+EXTENSIONS = {NDJSON: "ndjson", CSV: "csv", COLONNES: "ndjson", PARQUET: "parquet"}
+
+# Colonnes exportées, dans l'ordre
+COLUMNS = (
+    HistoriqueMission.historique_id,
+    HistoriqueMission.date,
+    HistoriqueMission.performance,
+    HistoriqueMission.commentaires,
+    HistoriqueMission.mission_id,
+    Mission.title.label("mission_title"),
+    Mission.category.label("mission_category"),
+    Mission.priority.label("mission_priority"),
+    Mission.status.label("mission_status"),
+    Mission.location.label("mission_location"),
+    HistoriqueMission.drone_id,
+    Drone.nom.label("drone_nom"),
+    Drone.statut.label("drone_statut"),
+)
+FIELDS = tuple(column.key for column in COLUMNS)
+
+
+class ExportUnavailable(Exception):
+    """Format demandé non disponible (dépendance optionnelle absente)"""
+
+
+def available_formats() -> List[str]:
+    formats = [NDJSON, CSV, COLONNES]
+    if pyarrow is not None:
+        formats.append(PARQUET)
+    return formats
+
+
+def build_query(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    drone_id: Optional[int] = None,
+    performance: Optional[str] = None,
+) -> Select:
+    """Historique joint aux missions et aux drones, filtré, dans l'ordre des IDs"""
+    query = (
+        select(*COLUMNS)
+        .join(Mission, Mission.mission_id == HistoriqueMission.mission_id)
+        .outerjoin(Drone, Drone.drone_id == HistoriqueMission.drone_id)
+        .order_by(HistoriqueMission.historique_id)
+    )
+    if date_from is not None:
+        query = query.where(HistoriqueMission.date >= date_from)
+    if date_to is not None:
+        query = query.where(HistoriqueMission.date < date_to)
+    if drone_id is not None:
+        query = query.where(HistoriqueMission.drone_id == drone_id)
+    if performance is not None:
+        query = query.where(HistoriqueMission.performance == performance)
+    return query
+
+
+async def batches(query: Select, batch_size: int = BATCH_SIZE) -> AsyncIterator[list]:
+    """
+    Lots de lignes (tuples) lus avec un curseur côté serveur, sans passer par l'ORM.
+    La connexion est propre à l'export : elle vit aussi longtemps que le flux.
+    """
+    async with async_read_engine.connect() as connection:
+        result = await connection.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+
+async def _ndjson(rows: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    async for batch in rows:
+        yield b"".join(orjson.dumps(dict(zip(FIELDS, row))) + b"\n" for row in batch)
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def _csv(rows: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    async for batch in rows:
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Table vide : seul l'en-tête a été écrit
+        yield buffer.getvalue().encode()
+
+
+async def _colonnes(rows: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    async for batch in rows:
+        yield orjson.dumps(dict(zip(FIELDS, (list(values) for values in zip(*batch))))) + b"\n"
+
+
+class _Sink(io.RawIOBase):
+    """Fichier en écriture seule vidé à chaque lot : ParquetWriter y écrit, le flux le draine"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _arrow_schema():
+    types = {
+        "historique_id": pyarrow.int64(), "mission_id": pyarrow.int64(), "drone_id": pyarrow.int64(),
+        "date": pyarrow.timestamp("us"),
+    }
+    return pyarrow.schema([(name, types.get(name, pyarrow.string())) for name in FIELDS])
+
+
+async def _parquet(rows: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    schema = _arrow_schema()
+    sink = _Sink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    async for batch in rows:
+        columns = [pyarrow.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+        writer.write_table(pyarrow.Table.from_arrays(columns, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {NDJSON: _ndjson, CSV: _csv, COLONNES: _colonnes, PARQUET: _parquet}
+
+
+def stream(format: str, query: Select, batch_size: int = BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Corps de la réponse d'export, produit lot par lot"""
+    if format not in available_formats():
+        raise ExportUnavailable(f"Format {format} indisponible (formats : {', '.join(available_formats())})")
+    return ENCODERS[format](batches(query, batch_size))
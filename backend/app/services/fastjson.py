@@ -0,0 +1,48 @@
+"""
+Chemin de lecture rapide des listes.
+
+Les routes de liste sélectionnent directement les colonnes du schéma de réponse
+(MissionResponse, DroneResponse...) et encodent les lignes avec orjson, sans instancier
+d'objets ORM ni valider chaque ligne avec Pydantic. Les champs, leur ordre et leur
+format (dates ISO 8601, nombres, null) sont ceux du schéma : le contrat est inchangé.
+Les valeurs sont lues telles quelles en base, déjà validées à l'écriture.
+"""
+import functools
+from typing import List, Optional
+import orjson
+from fastapi import Response
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+@functools.lru_cache(maxsize=None)
+def columns(schema, model) -> tuple:
+    """Colonnes du modèle correspondant aux champs du schéma, dans l'ordre du schéma"""
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def select_schema(schema, model) -> Select:
+    return select(*columns(schema, model))
+
+
+def to_dicts(result) -> List[dict]:
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+async def fetch(db: AsyncSession, query: Select) -> List[dict]:
+    return to_dicts(await db.execute(query))
+
+
+def dumps(rows) -> bytes:
+    return orjson.dumps(rows)
+
+
+def json_response(rows, response: Optional[Response] = None) -> Response:
+    """Réponse JSON ; reprend les en-têtes posés sur `response` (pagination)"""
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+    return Response(content=dumps(rows), media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,253 @@
+"""
+Métriques au format texte Prometheus (exposition 0.0.4), sans dépendance externe.
+
+- latence des requêtes HTTP par route (histogramme) et requêtes en cours (jauge) ;
+- nombre et durée des requêtes SQL, rattachées à la route qui les a émises ;
+- attente d'une connexion du pool et connexions empruntées ;
+- journal des requêtes SQL lentes (SLOW_QUERY_MS) avec la route d'origine.
+
+La route courante est portée par une ContextVar posée par MetricsMiddleware ; les
+événements SQLAlchemy s'exécutent dans le même contexte (greenlet de la session).
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import event
+
+logger = logging.getLogger("app.slow_query")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_SIZE = 100
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+HORS_ROUTE = "non_route"  # requêtes SQL hors requête HTTP, ou chemin inconnu (404)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+
+    def header(self) -> str:
+        return f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.type}\n"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> str:
+        with self.lock:
+            items = sorted(self.values.items())
+        return self.header() + "".join(f"{self.name}{_labels(self.label_names, k)} {v}\n" for k, v in items)
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        with self.lock:
+            self.values[labels] = float(value)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self.series: Dict[tuple, list] = {}  # labels -> [compte par seau..., somme, total]
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> str:
+        with self.lock:
+            items = sorted((k, list(v)) for k, v in self.series.items())
+        lines = [self.header()]
+        names = self.label_names + ("le",)
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (repr(bound),))} {cumulative}\n")
+            lines.append(f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {series[-1]}\n")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-2]}\n")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series[-1]}\n")
+        return "".join(lines)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self.metrics)
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status")))
+http_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP", ("method", "route")))
+http_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "Requêtes HTTP en cours", ("method",)))
+db_queries = registry.register(Counter(
+    "db_queries_total", "Requêtes SQL exécutées", ("route",)))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Durée des requêtes SQL", ("route",)))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "Requêtes SQL par requête HTTP", ("route",), buckets=COUNT_BUCKETS))
+db_slow_queries = registry.register(Counter(
+    "db_slow_queries_total", "Requêtes SQL plus longues que SLOW_QUERY_MS", ("route",)))
+db_pool_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Attente d'une connexion du pool"))
+db_pool_checked_out = registry.register(Gauge(
+    "db_pool_checked_out", "Connexions empruntées au pool"))
+
+
+class RequestMetrics:
+    """Compteurs de la requête HTTP en cours"""
+
+    __slots__ = ("scope", "queries")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or HORS_ROUTE
+
+
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+slow_queries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    request = current_request.get()
+    route = request.route if request is not None else HORS_ROUTE
+    if request is not None:
+        request.queries += 1
+    db_queries.inc(route)
+    db_query_duration.observe(duration, route)
+    if duration * 1000 >= SLOW_QUERY_MS:
+        db_slow_queries.inc(route)
+        sql = " ".join(statement.split())
+        slow_queries.append({"route": route, "duration_ms": round(duration * 1000, 3), "sql": sql, "ts": time.time()})
+        logger.warning("Requête lente (%.1f ms) sur %s : %s", duration * 1000, route, sql[:500])
+
+
+def _error(exception_context):
+    # Requête en échec : on retire le chronomètre posé par _before_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+
+def instrument_engine(engine):
+    """Branche les événements SQL et le chronométrage du pool sur un moteur (synchrone ou asynchrone)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_execute)
+    event.listen(sync_engine, "handle_error", _error)
+
+    pool = sync_engine.pool
+    event.listen(pool, "checkout", lambda *args: db_pool_checked_out.inc())
+    event.listen(pool, "checkin", lambda *args: db_pool_checked_out.dec())
+    # Le pool n'a pas d'événement « demande de connexion » : on chronomètre _do_get,
+    # qui attend une connexion libre (ou en ouvre une nouvelle)
+    do_get = pool._do_get
+
+    def timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - start)
+
+    pool._do_get = timed_do_get
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : durée, statut et requêtes SQL de chaque requête HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        request = RequestMetrics(scope)
+        token = current_request.set(request)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        http_in_progress.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            http_in_progress.dec(method)
+            current_request.reset(token)
+            route = request.route
+            http_requests.inc(method, route, str(status[0]))
+            http_duration.observe(duration, method, route)
+            db_queries_per_request.observe(request.queries, route)
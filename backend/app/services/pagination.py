@@ -0,0 +1,98 @@
+import base64
+import json
+import threading
+import time
+from typing import Optional
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services import fastjson
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+COUNT_TTL = 30.0  # secondes
+
+_lock = threading.Lock()
+_counts = {}  # nom de table -> (total, expiration)
+
+
+def encode_cursor(table: str, key) -> str:
+    """Encode la dernière clé lue dans un curseur opaque"""
+    raw = json.dumps({"t": table, "k": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(table: str, cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if data["t"] != table:
+            raise ValueError(data["t"])
+        # Clé d'une colonne entière ou texte : tout autre type JSON est un curseur forgé
+        if not isinstance(data["k"], (int, str)) or isinstance(data["k"], bool):
+            raise TypeError(data["k"])
+        return data["k"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    key_column,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    skip: int = 0,
+    descending: bool = False,
+):
+    """
+    Pagination par clé (keyset) : WHERE clé > dernière clé ORDER BY clé LIMIT n
+    (WHERE clé < dernière clé ORDER BY clé DESC avec `descending`).
+    Le coût ne dépend pas de la profondeur de la page, contrairement à OFFSET.
+    `query` sélectionne des colonnes (fastjson.select_schema) ; les lignes sont renvoyées
+    en dictionnaires et doivent inclure la colonne clé.
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
+    `skip` reste accepté pour les anciens clients et n'est utilisé que sans curseur.
+    """
+    # Le sens fait partie de la portée du curseur : un curseur croissant est refusé en décroissant
+    table = key_column.class_.__tablename__ + (":desc" if descending else "")
+    if descending:
+        query = query.order_by(key_column.desc())
+    else:
+        query = query.order_by(key_column)
+    if cursor:
+        last = decode_cursor(table, cursor)
+        query = query.where(key_column < last if descending else key_column > last)
+    elif skip:
+        query = query.offset(skip)
+
+    # Une ligne de plus que demandé indique s'il existe une page suivante
+    rows = fastjson.to_dicts(await db.execute(query.limit(limit + 1)))
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(table, rows[-1][key_column.key])
+    return rows
+
+
+async def count(db: AsyncSession, model) -> int:
+    """Nombre de lignes d'une table, mis en cache pendant COUNT_TTL secondes"""
+    table = model.__tablename__
+    with _lock:
+        cached = _counts.get(table)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+    total = (await db.execute(select(func.count()).select_from(model))).scalar()
+    with _lock:
+        _counts[table] = (total, time.monotonic() + COUNT_TTL)
+    return total
+
+
+async def set_total(response: Response, db: AsyncSession, model):
+    response.headers[TOTAL_COUNT_HEADER] = str(await count(db, model))
+
+
+def invalidate_count(model):
+    """À appeler après une insertion ou une suppression"""
+    with _lock:
+        _counts.pop(model.__tablename__, None)
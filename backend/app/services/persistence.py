@@ -0,0 +1,97 @@
+"""
+Écritures en une seule requête.
+
+UPDATE ... RETURNING et DELETE ... RETURNING remplacent la séquence
+SELECT (get) + UPDATE + SELECT (refresh) des routes d'écriture. Les valeurs par défaut
+des modèles sont calculées côté Python : après un INSERT, l'objet est déjà complet
+et n'a pas besoin d'être relu (la session ne l'expire pas au commit).
+
+Les tables à colonne `version` (missions, drones) voient cette colonne incrémentée par chaque
+UPDATE ; une version attendue ajoute `AND version = ?` (contrôle de concurrence optimiste).
+"""
+from typing import List, Optional
+from sqlalchemy import bindparam, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class VersionConflict(Exception):
+    """La ligne n'en est plus à la version attendue ; `current` est la ligne actuelle"""
+
+    def __init__(self, current):
+        super().__init__(f"version actuelle : {current.version}")
+        self.current = current
+
+
+def _primary_key(model):
+    return model.__mapper__.primary_key[0]
+
+
+def versioned(model, values: dict) -> dict:
+    """Ajoute l'incrément de `version` aux valeurs d'un UPDATE, si la table en a une"""
+    if "version" in model.__table__.c:
+        return {**values, "version": model.__table__.c.version + 1}
+    return values
+
+
+async def update_returning(db: AsyncSession, model, key, values: dict, expected_version: Optional[int] = None):
+    """
+    Met à jour une ligne et renvoie l'objet à jour, ou None si la clé n'existe pas.
+    Sans valeur à modifier, la ligne est simplement lue.
+    Avec `expected_version`, la ligne n'est modifiée que si elle en est toujours à cette
+    version ; sinon VersionConflict (une lecture de plus, seulement en cas d'échec).
+    """
+    if not values:
+        current = await db.get(model, key)
+        if current is not None and expected_version is not None and current.version != expected_version:
+            raise VersionConflict(current)
+        return current
+    statement = update(model).where(_primary_key(model) == key)
+    if expected_version is not None:
+        statement = statement.where(model.version == expected_version)
+    statement = (
+        statement
+        .values(**versioned(model, values))
+        .returning(model)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    updated = (await db.execute(statement)).scalar_one_or_none()
+    if updated is None and expected_version is not None:
+        current = await db.get(model, key)
+        if current is not None:
+            raise VersionConflict(current)
+    return updated
+
+
+async def update_many(db: AsyncSession, model, rows: List[dict], *criteria, expected_version: bool = False):
+    """
+    UPDATE groupé par clé primaire, en un seul executemany ; `version` est incrémentée.
+    Toutes les lignes doivent porter les mêmes colonnes. `criteria` s'ajoutent à la clé ;
+    avec `expected_version`, chaque ligne porte la version lue (`version`) et n'est modifiée
+    que si elle en est toujours là. Les lignes écartées ne sont pas signalées : à relire.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    key = _primary_key(model)
+    compared = {key.key, "version"} if expected_version else {key.key}
+    statement = update(table).where(key == bindparam("_pk"), *criteria)
+    if expected_version:
+        statement = statement.where(table.c.version == bindparam("_version"))
+    statement = statement.values(
+        **versioned(model, {name: bindparam(f"_{name}") for name in rows[0] if name not in compared})
+    )
+    parameters = [
+        {("_pk" if name == key.key else f"_{name}"): value for name, value in row.items()}
+        for row in rows
+    ]
+    await db.execute(statement, parameters)
+
+
+async def delete_returning(db: AsyncSession, model, key, *columns) -> Optional[object]:
+    """
+    Supprime une ligne et renvoie les colonnes demandées (ou la clé), None si elle n'existe pas.
+    À réserver aux tables sans enfants : la suppression ORM, elle, détache les lignes liées.
+    """
+    column = _primary_key(model)
+    statement = delete(model).where(column == key).returning(*(columns or (column,)))
+    return (await db.execute(statement.execution_options(synchronize_session=False))).first()
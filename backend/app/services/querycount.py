@@ -0,0 +1,48 @@
+"""
+Compteur de requêtes SQL, pour vérifier le nombre d'allers-retours d'une route.
+
+    with count_queries(async_engine) as counter:
+        client.patch("/api/drones/1", json={...})
+    counter.assert_at_most(2)
+
+Les instructions sont comptées au niveau du curseur DBAPI (événement
+before_cursor_execute), transactions (BEGIN/COMMIT) non comprises.
+Le compteur est global au moteur : à n'utiliser que sans requêtes concurrentes.
+"""
+from contextlib import contextmanager
+from typing import List
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, connection, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def assert_at_most(self, budget: int):
+        if self.count > budget:
+            detail = "\n".join(f"  {i + 1}. {' '.join(sql.split())[:160]}" for i, sql in enumerate(self.statements))
+            raise QueryBudgetExceeded(f"{self.count} requêtes pour un budget de {budget} :\n{detail}")
+
+
+@contextmanager
+def count_queries(engine):
+    """Compte les requêtes émises par le moteur (synchrone ou asynchrone) dans le bloc"""
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    counter = QueryCounter()
+    event.listen(sync_engine, "before_cursor_execute", counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", counter._record)
@@ -0,0 +1,314 @@
+"""
+Statistiques de performance par drone et par zone, cumulées depuis l'historique.
+
+Les tables statistiques_drones et statistiques_zones gardent, pour chaque drone et chaque
+zone survolée, le nombre de missions, les réussites / retards / échecs (d'après le champ
+`performance`), la somme des durées estimées et la date du dernier enregistrement. Sur
+SQLite et PostgreSQL, des triggers sur historique_missions les tiennent à jour à chaque
+INSERT, UPDATE ou DELETE, quelle que soit la route ou le script qui écrit, et un trigger
+sur missions.zone_id déplace l'historique d'une mission qui change de zone ; une lecture
+est alors une recherche par clé primaire. Ailleurs, les lectures agrègent l'historique de
+la clé demandée (index drone_id, date).
+
+La durée estimée est lue sur la mission à chaque écriture de l'historique : si elle change
+ensuite, les sommes de durées ne redeviennent exactes qu'après reconstruction (backfill) :
+
+    python -m app.services.rollups rebuild
+"""
+import argparse
+import logging
+from typing import Optional
+from sqlalchemy import case, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Drone, HistoriqueMission, Mission, StatistiquesDrone, StatistiquesZone, ZoneDeVol
+
+logger = logging.getLogger(__name__)
+
+# Valeurs de `performance` reconnues, en minuscules (lower() de SQLite ne traite que l'ASCII)
+REUSSIES = ("réussie", "reussie", "réussi", "reussi", "succès", "succes", "success", "ok")
+RETARDS = ("retard", "en retard", "retardée", "retardee", "delay", "delayed")
+ECHECS = ("échec", "echec", "échouée", "echouee", "failed", "failure")
+CATEGORIES = (("reussies", REUSSIES), ("retards", RETARDS), ("echecs", ECHECS))
+RECONNUES = REUSSIES + RETARDS + ECHECS
+
+COUNTERS = ("missions", "reussies", "retards", "echecs", "autres", "duree_totale", "durees")
+# SQLite : un trigger par opération ; PostgreSQL : une fonction et un trigger par table
+TRIGGERS = (
+    "statistiques_historique_ai", "statistiques_historique_ad", "statistiques_historique_au",
+    "statistiques_missions_zone_au",
+)
+PG_TRIGGERS = ("statistiques_historique", "statistiques_missions_zone")
+DIALECTS = ("sqlite", "postgresql")
+
+
+# --- triggers (SQLite, PostgreSQL) ---
+
+def _quoted(values) -> str:
+    return ", ".join("'" + value.replace("'", "''") + "'" for value in values)
+
+
+def _contribution(row: str, duration: str) -> dict:
+    """Expressions SQL de la contribution d'une ligne d'historique à chaque compteur"""
+    performance = f"lower(trim({row}.performance))"
+    values = {"missions": "1"}
+    for name, accepted in CATEGORIES:
+        values[name] = f"CASE WHEN {performance} IN ({_quoted(accepted)}) THEN 1 ELSE 0 END"
+    values["autres"] = f"CASE WHEN {performance} IN ({_quoted(RECONNUES)}) THEN 0 ELSE 1 END"
+    values["duree_totale"] = f"coalesce({duration}, 0)"
+    values["durees"] = f"CASE WHEN {duration} IS NULL THEN 0 ELSE 1 END"
+    return values
+
+
+def _upsert_sql(table: str, key: str, selected: list, source: str) -> str:
+    """INSERT ... SELECT ajoutant des compteurs (clé, COUNTERS, date) à la ligne existante"""
+    columns = ", ".join((key,) + COUNTERS + ("derniere_mission",))
+    updates = ", ".join(f"{name} = {table}.{name} + excluded.{name}" for name in COUNTERS)
+    return (
+        f"INSERT INTO {table} ({columns}) SELECT {', '.join(selected)} {source} "
+        f"ON CONFLICT({key}) DO UPDATE SET {updates}, derniere_mission = CASE "
+        f"WHEN {table}.derniere_mission IS NULL OR excluded.derniere_mission > {table}.derniere_mission "
+        f"THEN excluded.derniere_mission ELSE {table}.derniere_mission END;"
+    )
+
+
+def _add_sql(table: str, key: str, key_value: str, source: str) -> str:
+    """Ajoute la ligne NEW (UPSERT) ; `source` fournit m.estimated_duration"""
+    values = _contribution("NEW", "m.estimated_duration")
+    return _upsert_sql(table, key, [key_value] + [values[name] for name in COUNTERS] + ["NEW.date"], source)
+
+
+def _remove_sql(table: str, key: str, key_value: str, latest: str) -> str:
+    """
+    Retire la ligne OLD ; la dernière date n'est relue que si OLD était la plus récente.
+    Une ligne revenue à zéro est supprimée : elle ne bloque pas la suppression du drone.
+    """
+    values = _contribution("OLD", "(SELECT estimated_duration FROM missions WHERE mission_id = OLD.mission_id)")
+    updates = ", ".join(f"{name} = {name} - {values[name]}" for name in COUNTERS)
+    return (
+        f"UPDATE {table} SET {updates}, derniere_mission = CASE "
+        f"WHEN OLD.date < derniere_mission THEN derniere_mission ELSE ({latest}) END "
+        f"WHERE {key} = {key_value}; "
+        f"DELETE FROM {table} WHERE {key} = {key_value} AND missions = 0;"
+    )
+
+
+def _history_sql() -> tuple:
+    """(ajout de NEW, retrait de OLD) pour une ligne de historique_missions"""
+    add = (
+        _add_sql("statistiques_drones", "drone_id", "NEW.drone_id",
+                 "FROM (SELECT NEW.mission_id AS mission_id) AS h LEFT JOIN missions m ON m.mission_id = h.mission_id "
+                 "WHERE true")
+        + " "
+        + _add_sql("statistiques_zones", "zone_id", "m.zone_id",
+                   "FROM missions m WHERE m.mission_id = NEW.mission_id AND m.zone_id IS NOT NULL")
+    )
+    remove = (
+        _remove_sql("statistiques_drones", "drone_id", "OLD.drone_id",
+                    "SELECT max(date) FROM historique_missions WHERE drone_id = OLD.drone_id")
+        + " "
+        + _remove_sql("statistiques_zones", "zone_id",
+                      "(SELECT zone_id FROM missions WHERE mission_id = OLD.mission_id)",
+                      "SELECT max(h.date) FROM historique_missions h JOIN missions m ON m.mission_id = h.mission_id "
+                      "WHERE m.zone_id = statistiques_zones.zone_id")
+    )
+    return add, remove
+
+
+def _zone_move_sql() -> str:
+    """
+    Mission passée de OLD.zone_id à NEW.zone_id (ligne de missions) : son historique quitte
+    l'ancienne zone et rejoint la nouvelle, sinon les compteurs des deux zones dériveraient.
+    """
+    old = _contribution("h", "OLD.estimated_duration")
+    sums = ", ".join(f"coalesce(sum({old[name]}), 0) AS {name}" for name in COUNTERS)
+    updates = ", ".join(f"{name} = statistiques_zones.{name} - s.{name}" for name in COUNTERS)
+    remove = (
+        f"UPDATE statistiques_zones SET {updates}, derniere_mission = ("
+        f"SELECT max(h.date) FROM historique_missions h JOIN missions m ON m.mission_id = h.mission_id "
+        f"WHERE m.zone_id = OLD.zone_id) "
+        f"FROM (SELECT {sums} FROM historique_missions h WHERE h.mission_id = OLD.mission_id) AS s "
+        f"WHERE statistiques_zones.zone_id = OLD.zone_id; "
+        f"DELETE FROM statistiques_zones WHERE zone_id = OLD.zone_id AND missions = 0;"
+    )
+    new = _contribution("h", "NEW.estimated_duration")
+    add = _upsert_sql(
+        "statistiques_zones", "zone_id",
+        ["NEW.zone_id"] + [f"sum({new[name]})" for name in COUNTERS] + ["max(h.date)"],
+        "FROM historique_missions h WHERE h.mission_id = NEW.mission_id AND NEW.zone_id IS NOT NULL "
+        "GROUP BY h.mission_id",
+    )
+    return f"{remove} {add}"
+
+
+def trigger_ddl(dialect: str = "sqlite") -> list:
+    add, remove = _history_sql()
+    move = _zone_move_sql()
+    if dialect == "postgresql":
+        history, missions = PG_TRIGGERS
+        return [
+            f"CREATE OR REPLACE FUNCTION {history}() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+            f"IF TG_OP <> 'INSERT' THEN {remove} END IF; "
+            f"IF TG_OP <> 'DELETE' THEN {add} END IF; "
+            f"RETURN NULL; END $$",
+            f"DROP TRIGGER IF EXISTS {history} ON historique_missions",
+            # Les commentaires ne comptent pas : seules ces colonnes déplacent les compteurs
+            f"CREATE TRIGGER {history} AFTER INSERT OR DELETE OR UPDATE OF drone_id, mission_id, performance, date "
+            f"ON historique_missions FOR EACH ROW EXECUTE FUNCTION {history}()",
+            f"CREATE OR REPLACE FUNCTION {missions}() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+            f"{move} RETURN NULL; END $$",
+            f"DROP TRIGGER IF EXISTS {missions} ON missions",
+            f"CREATE TRIGGER {missions} AFTER UPDATE OF zone_id ON missions FOR EACH ROW "
+            f"WHEN (OLD.zone_id IS DISTINCT FROM NEW.zone_id) EXECUTE FUNCTION {missions}()",
+        ]
+    insert_trigger, delete_trigger, update_trigger, zone_trigger = TRIGGERS
+    return [f"DROP TRIGGER IF EXISTS {name}" for name in TRIGGERS] + [
+        f"CREATE TRIGGER {insert_trigger} AFTER INSERT ON historique_missions BEGIN {add} END",
+        f"CREATE TRIGGER {delete_trigger} AFTER DELETE ON historique_missions BEGIN {remove} END",
+        # Les commentaires ne comptent pas : seules ces colonnes déplacent les compteurs
+        f"CREATE TRIGGER {update_trigger} AFTER UPDATE OF drone_id, mission_id, performance, date "
+        f"ON historique_missions BEGIN {remove} {add} END",
+        f"CREATE TRIGGER {zone_trigger} AFTER UPDATE OF zone_id ON missions "
+        f"WHEN OLD.zone_id IS NOT NEW.zone_id BEGIN {move} END",
+    ]
+
+
+def install(connection) -> bool:
+    """Crée les tables et, sur SQLite et PostgreSQL, les triggers ; puis remplit les tables (migration)"""
+    for model in (StatistiquesDrone, StatistiquesZone):
+        model.__table__.create(connection, checkfirst=True)
+    installed = connection.dialect.name in DIALECTS
+    if installed:
+        for statement in trigger_ddl(connection.dialect.name):
+            connection.execute(text(statement))
+    else:
+        logger.warning("Statistiques par drone et par zone sans triggers : calculées à la lecture")
+    rebuild(connection)
+    return installed
+
+
+# --- agrégation (reconstruction, et lecture sans triggers) ---
+
+def aggregate_query(model):
+    """Compteurs de chaque drone (ou zone) calculés depuis l'historique, mêmes règles que les triggers"""
+    performance = func.lower(func.trim(HistoriqueMission.performance))
+    if model is StatistiquesDrone:
+        key = HistoriqueMission.drone_id
+        joined = select().select_from(HistoriqueMission).outerjoin(Mission, Mission.mission_id == HistoriqueMission.mission_id)
+    else:
+        key = Mission.zone_id
+        joined = (
+            select().select_from(HistoriqueMission)
+            .join(Mission, Mission.mission_id == HistoriqueMission.mission_id)
+            .where(Mission.zone_id.is_not(None))
+        )
+    return joined.add_columns(
+        key.label(model.__mapper__.primary_key[0].key),
+        func.count().label("missions"),
+        *(func.sum(case((performance.in_(accepted), 1), else_=0)).label(name) for name, accepted in CATEGORIES),
+        func.sum(case((performance.in_(RECONNUES), 0), else_=1)).label("autres"),
+        func.coalesce(func.sum(Mission.estimated_duration), 0).label("duree_totale"),
+        func.count(Mission.estimated_duration).label("durees"),
+        func.max(HistoriqueMission.date).label("derniere_mission"),
+    ).group_by(key)
+
+
+def rebuild(connection):
+    """Recalcule les deux tables depuis l'historique (après un import hors triggers, par exemple)"""
+    for model in (StatistiquesDrone, StatistiquesZone):
+        query = aggregate_query(model)
+        connection.execute(delete(model))
+        connection.execute(insert(model).from_select([column.name for column in query.selected_columns], query))
+
+
+# --- lecture ---
+
+_maintained: Optional[bool] = None
+
+
+async def is_maintained(db: AsyncSession) -> bool:
+    """Vrai si les triggers tiennent les tables à jour (déterminé une fois par processus)"""
+    global _maintained
+    if _maintained is None:
+        _maintained = False
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            found = await db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :name"), {"name": TRIGGERS[0]}
+            )
+            _maintained = found.first() is not None
+        elif dialect == "postgresql":
+            found = await db.execute(text("SELECT 1 FROM pg_trigger WHERE tgname = :name"), {"name": PG_TRIGGERS[0]})
+            _maintained = found.first() is not None
+    return _maintained
+
+
+def summary(row) -> dict:
+    """Compteurs d'une ligne, avec les taux et la durée moyenne"""
+    return _summary({name: getattr(row, name) or 0 for name in COUNTERS}, getattr(row, "derniere_mission", None))
+
+
+def _summary(values: dict, derniere_mission) -> dict:
+    missions = values["missions"]
+    return {
+        **{name: int(values[name]) for name in COUNTERS if name != "duree_totale"},
+        "taux_reussite": values["reussies"] / missions if missions else 0.0,
+        "taux_retard": values["retards"] / missions if missions else 0.0,
+        "taux_echec": values["echecs"] / missions if missions else 0.0,
+        "duree_moyenne": values["duree_totale"] / values["durees"] if values["durees"] else None,
+        "derniere_mission": derniere_mission,
+    }
+
+
+async def _get(db: AsyncSession, model, parent, key: int) -> Optional[dict]:
+    name = model.__mapper__.primary_key[0].key
+    if await is_maintained(db):
+        row = await db.get(model, key)
+    else:
+        query = aggregate_query(model)
+        row = (await db.execute(query.where(query.selected_columns[name] == key))).first()
+    if row is None:
+        # Pas encore d'historique : compteurs à zéro, si le drone (ou la zone) existe
+        if await db.get(parent, key) is None:
+            return None
+        return {name: key, **_summary(dict.fromkeys(COUNTERS, 0), None)}
+    return {name: key, **summary(row)}
+
+
+async def get_drone(db: AsyncSession, drone_id: int) -> Optional[dict]:
+    return await _get(db, StatistiquesDrone, Drone, drone_id)
+
+
+async def get_zone(db: AsyncSession, zone_id: int) -> Optional[dict]:
+    return await _get(db, StatistiquesZone, ZoneDeVol, zone_id)
+
+
+async def list_all(db: AsyncSession, model) -> list:
+    """Compteurs de tous les drones (ou zones) ayant un historique, par clé croissante"""
+    name = model.__mapper__.primary_key[0].key
+    if await is_maintained(db):
+        query = select(model).order_by(model.__mapper__.primary_key[0])
+        rows = (await db.execute(query)).scalars()
+    else:
+        rows = await db.execute(aggregate_query(model).order_by(text(name)))
+    return [{name: getattr(row, name), **summary(row)} for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistiques de performance par drone et par zone")
+    parser.add_argument("command", choices=["rebuild"], help="rebuild : recalcule les tables depuis l'historique")
+    parser.parse_args()
+
+    from app.database import engine, init_db
+
+    # Base pas encore migrée : les tables (et les triggers) sont créées d'abord
+    init_db()
+    with engine.begin() as connection:
+        rebuild(connection)
+    with engine.connect() as connection:
+        drones = connection.execute(select(func.count()).select_from(StatistiquesDrone)).scalar()
+        zones = connection.execute(select(func.count()).select_from(StatistiquesZone)).scalar()
+    print(f"Statistiques reconstruites : {drones} drones, {zones} zones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Planification de trajets évitant les zones à risque.
+
+Une grille de coût est construite autour du départ et de l'arrivée à partir de
+l'index spatial des zones : chaque cellule coûte 1 + le poids de risque de la zone
+la plus risquée qui la couvre, et les zones interdites sont infranchissables.
+A* (8 voisins, heuristique octile admissible) y cherche le trajet de moindre coût.
+
+Les trajets sont mis en cache par (départ, arrivée, version de l'index des zones) :
+toute modification d'une zone change la version et rend les anciens trajets inaccessibles.
+"""
+import heapq
+import math
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+from app.services.spatial import IndexedZone, Point, ZoneIndex
+
+KM_PAR_DEGRE = 111.32
+MAX_CELLS = 96  # cellules sur le plus grand côté de la grille
+MARGINS = (0.3, 1.0)  # marges successives autour du trajet direct, en fraction de sa longueur
+MIN_MARGIN_KM = 1.0
+RISQUE_INTERDIT = 5  # zones de ce niveau de risque ou plus : survol interdit
+RISK_WEIGHTS = {1: 0.0, 2: 0.5, 3: 2.0, 4: 8.0}
+CACHE_SIZE = 2048
+
+SQRT2 = math.sqrt(2)
+NEIGHBOURS = [(-1, -1, SQRT2), (-1, 0, 1.0), (-1, 1, SQRT2), (0, -1, 1.0),
+              (0, 1, 1.0), (1, -1, SQRT2), (1, 0, 1.0), (1, 1, SQRT2)]
+
+
+class NoRouteError(Exception):
+    """Aucun trajet ne relie le départ à l'arrivée sans traverser de zone interdite"""
+
+
+def _normalise(text: str) -> str:
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+
+
+def zone_weight(zone: IndexedZone) -> float:
+    """Surcoût par km dans la zone ; math.inf si le survol est interdit"""
+    risque = zone.data.get("risque") or 1
+    restrictions = zone.data.get("restrictions") or ""
+    if risque >= RISQUE_INTERDIT or "interdit" in _normalise(restrictions):
+        return math.inf
+    return RISK_WEIGHTS.get(risque, 0.0)
+
+
+def distance_km(a: Point, b: Point) -> float:
+    """Distance équirectangulaire, suffisante à l'échelle d'une ville"""
+    lat0 = math.radians((a[0] + b[0]) / 2)
+    d_lat = (b[0] - a[0]) * KM_PAR_DEGRE
+    d_lon = (b[1] - a[1]) * KM_PAR_DEGRE * math.cos(lat0)
+    return math.hypot(d_lat, d_lon)
+
+
+class CostGrid:
+    def __init__(
+        self, a: Point, b: Point, margin: float, zones: Sequence[IndexedZone] = (),
+        endpoints: Sequence[int] = (), max_cells: int = MAX_CELLS
+    ):
+        lat0 = math.radians((a[0] + b[0]) / 2)
+        km_lon = KM_PAR_DEGRE * math.cos(lat0)
+        margin_km = max(distance_km(a, b) * margin, MIN_MARGIN_KM)
+        self.min_lat = min(a[0], b[0]) - margin_km / KM_PAR_DEGRE
+        self.min_lon = min(a[1], b[1]) - margin_km / km_lon
+        max_lat = max(a[0], b[0]) + margin_km / KM_PAR_DEGRE
+        max_lon = max(a[1], b[1]) + margin_km / km_lon
+
+        height_km = (max_lat - self.min_lat) * KM_PAR_DEGRE
+        width_km = (max_lon - self.min_lon) * km_lon
+        self.cell_km = max(height_km, width_km) / max_cells
+        self.step_lat = self.cell_km / KM_PAR_DEGRE
+        self.step_lon = self.cell_km / km_lon
+        self.rows = max(int(math.ceil(height_km / self.cell_km)), 1)
+        self.cols = max(int(math.ceil(width_km / self.cell_km)), 1)
+        self.bbox = (self.min_lat, self.min_lon, max_lat, max_lon)
+        self.costs = [1.0] * (self.rows * self.cols)
+        for zone in zones:
+            weight = zone_weight(zone)
+            if weight == math.inf and zone.zone_id in endpoints:
+                # Départ ou arrivée dans une zone interdite : on doit pouvoir en sortir
+                weight = max(RISK_WEIGHTS.values())
+            self._rasterise(zone, weight)
+
+    def _rasterise(self, zone: IndexedZone, weight: float):
+        """Remplissage par balayage : intersections du contour avec la ligne médiane de chaque rangée"""
+        if weight == 0:
+            return
+        cost = 1.0 + weight
+        costs, cols, rows = self.costs, self.cols, self.rows
+        min_lat, min_lon, step_lat, step_lon = self.min_lat, self.min_lon, self.step_lat, self.step_lon
+        crossings = {}
+        polygon = zone.polygon
+        for (lat1, lon1), (lat2, lon2) in zip(polygon, polygon[1:] + polygon[:1]):
+            if lat1 == lat2:
+                continue
+            # Rangées dont la ligne médiane est coupée par l'arête
+            low, high = (lat1, lat2) if lat1 < lat2 else (lat2, lat1)
+            row_start = max(int(math.ceil((low - min_lat) / step_lat - 0.5)), 0)
+            row_end = min(int(math.ceil((high - min_lat) / step_lat - 0.5)) - 1, rows - 1)
+            slope = (lon2 - lon1) / (lat2 - lat1)
+            for row in range(row_start, row_end + 1):
+                lat = min_lat + (row + 0.5) * step_lat
+                crossings.setdefault(row, []).append(lon1 + (lat - lat1) * slope)
+        for row, lons in crossings.items():
+            lons.sort()
+            base = row * cols
+            for west, east in zip(lons[::2], lons[1::2]):
+                # Cellules dont le centre est entre les deux intersections
+                col_start = max(int(math.ceil((west - min_lon) / step_lon - 0.5)), 0)
+                col_end = min(int(math.floor((east - min_lon) / step_lon - 0.5)), cols - 1)
+                for k in range(base + col_start, base + col_end + 1):
+                    if costs[k] < cost:
+                        costs[k] = cost
+
+    def cell(self, point: Point) -> Tuple[int, int]:
+        row = min(max(int((point[0] - self.min_lat) / self.step_lat), 0), self.rows - 1)
+        col = min(max(int((point[1] - self.min_lon) / self.step_lon), 0), self.cols - 1)
+        return row, col
+
+    def center(self, row: int, col: int) -> Point:
+        return (self.min_lat + (row + 0.5) * self.step_lat, self.min_lon + (col + 0.5) * self.step_lon)
+
+
+def astar(grid: CostGrid, start: Tuple[int, int], goal: Tuple[int, int]) -> Tuple[List[Tuple[int, int]], float]:
+    """Plus court chemin pondéré ; les cellules de départ et d'arrivée sont toujours franchissables"""
+    rows, cols, cell_km = grid.rows, grid.cols, grid.cell_km
+    # Grille bordée d'une rangée infranchissable : plus aucun test de limites dans la boucle
+    width = cols + 2
+    costs = [math.inf] * (width * (rows + 2))
+    for row in range(rows):
+        base = (row + 1) * width + 1
+        costs[base:base + cols] = grid.costs[row * cols:(row + 1) * cols]
+    start_k = (start[0] + 1) * width + start[1] + 1
+    goal_k = (goal[0] + 1) * width + goal[1] + 1
+    costs[start_k] = costs[goal_k] = 1.0
+    goal_row, goal_col = divmod(goal_k, width)
+    steps = [(d_row * width + d_col, length * cell_km / 2) for d_row, d_col, length in NEIGHBOURS]
+    diagonal = (SQRT2 - 1) * cell_km
+
+    best = [math.inf] * len(costs)
+    parent = {start_k: -1}
+    best[start_k] = 0.0
+    frontier = [(0.0, 0.0, start_k)]
+    push, pop = heapq.heappush, heapq.heappop
+    while frontier:
+        _, g, k = pop(frontier)
+        if k == goal_k:
+            path = []
+            while k != -1:
+                row, col = divmod(k, width)
+                path.append((row - 1, col - 1))
+                k = parent[k]
+            return path[::-1], g
+        if g > best[k]:
+            continue
+        here = costs[k]
+        for offset, half_length in steps:
+            n_k = k + offset
+            there = costs[n_k]
+            if there == math.inf:
+                continue
+            n_g = g + half_length * (here + there)
+            if n_g < best[n_k]:
+                best[n_k] = n_g
+                parent[n_k] = k
+                n_row, n_col = divmod(n_k, width)
+                d_row = abs(n_row - goal_row)
+                d_col = abs(n_col - goal_col)
+                # Heuristique octile : admissible car une cellule coûte au moins 1
+                if d_row > d_col:
+                    h = d_row * cell_km + d_col * diagonal
+                else:
+                    h = d_col * cell_km + d_row * diagonal
+                push(frontier, (n_g + h, n_g, n_k))
+    raise NoRouteError("Aucun trajet possible sans traverser de zone interdite")
+
+
+def _simplify(cells: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Ne garde que les cellules où le trajet change de direction"""
+    if len(cells) <= 2:
+        return cells
+    kept = [cells[0]]
+    for previous, current, following in zip(cells, cells[1:], cells[2:]):
+        if (current[0] - previous[0], current[1] - previous[1]) != (following[0] - current[0], following[1] - current[1]):
+            kept.append(current)
+    kept.append(cells[-1])
+    return kept
+
+
+class Route:
+    __slots__ = ("points", "distance_km", "cost", "zone_ids")
+
+    def __init__(self, points: List[Point], cost: float, zone_ids: List[int]):
+        self.points = points
+        self.distance_km = sum(distance_km(p, q) for p, q in zip(points, points[1:]))
+        self.cost = cost
+        self.zone_ids = zone_ids
+
+
+class RoutePlanner:
+    def __init__(self, index: ZoneIndex, cache_size: int = CACHE_SIZE):
+        self.index = index
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[tuple, Optional[Route]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def plan(self, departure: Point, arrival: Point) -> Route:
+        # Appelé aussi depuis le pool de threads : index et cache ne changent pas pendant le calcul
+        with self.index.lock:
+            route = self._plan(departure, arrival)
+        if route is None:
+            raise NoRouteError("Aucun trajet possible sans traverser de zone interdite")
+        return route
+
+    def _plan(self, departure: Point, arrival: Point) -> Optional[Route]:
+        key = (round(departure[0], 5), round(departure[1], 5), round(arrival[0], 5), round(arrival[1], 5), self.index.version)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            route = self.cache[key]
+        else:
+            self.misses += 1
+            try:
+                route = self._compute(departure, arrival)
+            except NoRouteError:
+                route = None  # l'absence de trajet est aussi mise en cache
+            self.cache[key] = route
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return route
+
+    def _compute(self, departure: Point, arrival: Point) -> Route:
+        # Cas fréquent : le trajet direct ne traverse aucune zone pénalisante
+        direct = self.index.zones_crossed([departure, arrival])
+        if all(zone_weight(zone) == 0 for zone in direct):
+            return Route([departure, arrival], distance_km(departure, arrival), [zone.zone_id for zone in direct])
+
+        endpoints = {zone.zone_id for point in (departure, arrival) for zone in self.index.zones_at(*point)}
+        # Grille serrée d'abord ; si les zones interdites la barrent, on élargit
+        for margin in MARGINS:
+            probe = CostGrid(departure, arrival, margin)
+            grid = CostGrid(departure, arrival, margin, self.index.zones_in_bbox(probe.bbox), endpoints)
+            try:
+                cells, cost = astar(grid, grid.cell(departure), grid.cell(arrival))
+                break
+            except NoRouteError:
+                if margin == MARGINS[-1]:
+                    raise
+        middle = [grid.center(*cell) for cell in _simplify(cells)[1:-1]]
+        points = [departure, *middle, arrival]
+        return Route(points, cost, [zone.zone_id for zone in self.index.zones_crossed(points)])
+
+
+_planner: Optional[RoutePlanner] = None
+
+
+def get_planner(index: ZoneIndex) -> RoutePlanner:
+    global _planner
+    if _planner is None or _planner.index is not index:
+        _planner = RoutePlanner(index)
+    return _planner
@@ -0,0 +1,350 @@
+"""
+Planificateur d'attribution : file de priorité en mémoire des missions en attente.
+
+Deux tas binaires, avec suppression paresseuse :
+- `ready` : missions dont la date de début est atteinte, triées par priorité (CRITICAL
+  d'abord), puis date de début (ou de création à défaut), puis ancienneté ;
+- `delayed` : missions planifiées plus tard, triées par date de début ; elles passent
+  dans `ready` quand leur date est atteinte.
+
+Les routes d'écriture tiennent la file à jour (push, discard, sync) ; une tâche asyncio
+exécute un tour d'attribution toutes les SCHEDULER_TICK secondes, ou dès qu'un drone se
+libère ou qu'une mission arrive (wake). Un tour ne relit pas la table des missions : il
+charge les drones disponibles (moteur de lecture), dépile les missions les plus urgentes et
+écrit les attributions en un lot, soumis à la file d'écriture. Au démarrage, la file est reconstruite en une requête (heapify).
+
+Un seul processus doit faire tourner le planificateur (SCHEDULER_ENABLED=0 sur les autres).
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import or_, select
+from app.database import AsyncReadSessionLocal
+from app.models.mission import Mission, StatutMission
+from app.services import assignment, cache, stats
+from app.services.writer import writer
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+SCHEDULER_TICK = float(os.getenv("SCHEDULER_TICK", "1.0"))  # secondes
+DISPATCH_BATCH = int(os.getenv("SCHEDULER_BATCH", "500"))  # attributions au plus par tour
+DISPATCH_SCAN = int(os.getenv("SCHEDULER_SCAN", "5000"))  # missions examinées au plus par tour
+
+# Colonnes nécessaires à l'ordonnancement et à l'attribution (mission_requirement)
+QUEUE_COLUMNS = (
+    Mission.mission_id, Mission.priority, Mission.start_date, Mission.created_at,
+    Mission.zone_id, Mission.weight, Mission.risk, Mission.estimated_duration, Mission.version,
+)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Les dates en base sont naïves (UTC) ; une date reçue avec fuseau n'est pas comparable
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class QueuedMission:
+    """Mission en attente telle que la voit la file : assez pour l'ordonner et lui trouver un drone"""
+
+    __slots__ = tuple(column.key for column in QUEUE_COLUMNS)
+
+    def __init__(self, mission_id, priority, start_date, created_at, zone_id, weight, risk, estimated_duration,
+                 version=1):
+        self.mission_id = mission_id
+        self.priority = priority
+        self.start_date = _naive_utc(start_date)
+        self.created_at = _naive_utc(created_at) or datetime.utcnow()
+        self.zone_id = zone_id
+        self.weight = weight
+        self.risk = risk
+        self.estimated_duration = estimated_duration
+        self.version = version or 1
+
+    @classmethod
+    def of(cls, mission) -> "QueuedMission":
+        """Depuis un objet Mission ou une ligne ayant les mêmes attributs"""
+        return cls(*(getattr(mission, name) for name in cls.__slots__))
+
+    def ready_key(self) -> tuple:
+        return (
+            assignment.PRIORITY_RANK.get(self.priority, len(assignment.PRIORITY_RANK)),
+            self.start_date or self.created_at,
+            self.created_at,
+            self.mission_id,
+        )
+
+
+def is_queued(mission) -> bool:
+    """La mission attend un drone : en attente et sans drone attribué"""
+    return mission.status == StatutMission.PENDING.value and (
+        mission.drone_id is None or mission.drone_id in assignment.PLACEHOLDER_DRONE_IDS
+    )
+
+
+def queued_missions_query():
+    """Colonnes de file des missions qui attendent un drone, quelle que soit leur date de début"""
+    return select(*QUEUE_COLUMNS).where(
+        Mission.status == StatutMission.PENDING.value,
+        or_(Mission.drone_id.is_(None), Mission.drone_id.in_(assignment.PLACEHOLDER_DRONE_IDS)),
+    )
+
+
+class MissionQueue:
+    """
+    File de priorité des missions en attente.
+    push, discard et pop sont en O(log n) amorti ; une entrée remplacée ou retirée reste
+    dans le tas et est ignorée au dépilement, le tas est compacté quand elles dominent.
+    Un numéro de séquence départage deux entrées de même clé (mission réinsérée).
+    """
+
+    def __init__(self):
+        self.entries: Dict[int, QueuedMission] = {}
+        self.ready: List[Tuple[tuple, int, QueuedMission]] = []
+        self.delayed: List[Tuple[datetime, int, QueuedMission]] = []
+        self.sequence = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, mission_id):
+        return mission_id in self.entries
+
+    def _live(self, entry: QueuedMission) -> bool:
+        return self.entries.get(entry.mission_id) is entry
+
+    def rebuild(self, missions, now: Optional[datetime] = None):
+        """Remplace le contenu de la file en O(n)"""
+        now = now or datetime.utcnow()
+        self.entries = {mission.mission_id: mission for mission in missions}
+        self.ready, self.delayed = [], []
+        for mission in self.entries.values():
+            if mission.start_date is not None and mission.start_date > now:
+                self.delayed.append((mission.start_date, next(self.sequence), mission))
+            else:
+                self.ready.append((mission.ready_key(), next(self.sequence), mission))
+        heapq.heapify(self.ready)
+        heapq.heapify(self.delayed)
+
+    def push(self, mission: QueuedMission, now: Optional[datetime] = None):
+        """Ajoute (ou remplace) une mission"""
+        now = now or datetime.utcnow()
+        self.entries[mission.mission_id] = mission
+        if mission.start_date is not None and mission.start_date > now:
+            heapq.heappush(self.delayed, (mission.start_date, next(self.sequence), mission))
+        else:
+            heapq.heappush(self.ready, (mission.ready_key(), next(self.sequence), mission))
+        self._compact()
+
+    def discard(self, mission_id: int) -> Optional[QueuedMission]:
+        entry = self.entries.pop(mission_id, None)
+        self._compact()
+        return entry
+
+    def promote(self, now: Optional[datetime] = None) -> int:
+        """Fait passer dans `ready` les missions dont la date de début est atteinte"""
+        now = now or datetime.utcnow()
+        promoted = 0
+        while self.delayed and self.delayed[0][0] <= now:
+            _, _, entry = heapq.heappop(self.delayed)
+            if self._live(entry):
+                heapq.heappush(self.ready, (entry.ready_key(), next(self.sequence), entry))
+                promoted += 1
+        return promoted
+
+    def pop(self) -> Optional[QueuedMission]:
+        """Retire et retourne la mission prête la plus urgente"""
+        while self.ready:
+            _, _, entry = heapq.heappop(self.ready)
+            if self._live(entry):
+                del self.entries[entry.mission_id]
+                return entry
+        return None
+
+    def ready_count(self) -> int:
+        return sum(1 for _, _, entry in self.ready if self._live(entry))
+
+    def _compact(self):
+        # Les entrées mortes sont retirées quand elles dépassent la moitié des deux tas
+        if len(self.ready) + len(self.delayed) > 2 * len(self.entries) + 64:
+            self.ready = [item for item in self.ready if self._live(item[2])]
+            self.delayed = [item for item in self.delayed if self._live(item[2])]
+            heapq.heapify(self.ready)
+            heapq.heapify(self.delayed)
+
+
+class Scheduler:
+    def __init__(self, tick: float = SCHEDULER_TICK, batch: int = DISPATCH_BATCH, scan: int = DISPATCH_SCAN):
+        self.queue = MissionQueue()
+        self.tick_interval = tick
+        self.batch = batch
+        self.scan = max(scan, batch)
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.ticks = 0
+        self.dispatched = 0
+        self.last_tick_ms = 0.0
+        self.rebuild_ms = 0.0
+
+    def push(self, mission):
+        self.queue.push(QueuedMission.of(mission))
+        self.wake()
+
+    def push_many(self, entries: Iterable[QueuedMission]):
+        for entry in entries:
+            self.queue.push(entry)
+        self.wake()
+
+    def discard(self, *mission_ids: int):
+        for mission_id in mission_ids:
+            self.queue.discard(mission_id)
+
+    def sync(self, mission):
+        """Après une mise à jour : (ré)insère la mission si elle attend un drone, la retire sinon"""
+        if is_queued(mission):
+            self.push(mission)
+        else:
+            self.queue.discard(mission.mission_id)
+
+    async def reload(self, db, mission_ids: Iterable[int]):
+        """Relit quelques missions modifiées en lot : réinsère celles qui attendent un drone, retire les autres"""
+        mission_ids = list(mission_ids)
+        if not mission_ids:
+            return
+        query = queued_missions_query().where(Mission.mission_id.in_(mission_ids))
+        rows = (await db.execute(query)).all()
+        self.discard(*mission_ids)
+        self.push_many(QueuedMission(*row) for row in rows)
+
+    def wake(self):
+        """Avance le prochain tour (drone libéré, nouvelle mission)"""
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def rebuild(self):
+        """Recharge la file depuis la base : une requête sur les seules colonnes utiles"""
+        start = time.perf_counter()
+        query = queued_missions_query()
+        async with AsyncReadSessionLocal() as db:
+            rows = (await db.execute(query)).all()
+        self.queue.rebuild(QueuedMission(*row) for row in rows)
+        self.rebuild_ms = (time.perf_counter() - start) * 1000
+
+    async def start(self):
+        await self.rebuild()
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+        self.wakeup = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.tick_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            try:
+                await self.dispatch()
+            except Exception:
+                logger.exception("Échec d'un tour d'attribution")
+
+    async def dispatch(self) -> List[Tuple[int, int]]:
+        """
+        Un tour : dépile les missions prêtes par ordre d'urgence et attribue à chacune le
+        drone disponible le plus ajusté, jusqu'à `batch` attributions. Une mission sans drone
+        compatible (charge, autonomie, zone) ne bloque pas les suivantes : le tour continue
+        tant qu'il reste des drones, dans la limite de `scan` missions examinées, et les
+        missions écartées retournent dans la file. Retourne les couples (mission_id, drone_id) attribués.
+        """
+        start = time.perf_counter()
+        self.ticks += 1
+        self.queue.promote()
+        if not self.queue.ready:
+            return []
+
+        # Lecture (drones, zones) hors de la connexion d'écriture ; seuls les UPDATE passent
+        # par la file d'écriture, qui écarte les couples devenus obsolètes entre-temps
+        async with AsyncReadSessionLocal() as db:
+            index = await assignment.load_drone_index(db)
+            if not index:
+                self.last_tick_ms = (time.perf_counter() - start) * 1000
+                return []
+            assignments, waiting = [], []
+            while index and len(assignments) < self.batch and len(assignments) + len(waiting) < self.scan:
+                candidates = []
+                while len(candidates) < min(self.batch - len(assignments), self.scan - len(assignments) - len(waiting)):
+                    entry = self.queue.pop()
+                    if entry is None:
+                        break
+                    candidates.append(entry)
+                if not candidates:
+                    break
+                zone_names = await assignment.load_zone_names(db, candidates)
+                for entry in candidates:
+                    candidate = index.pop(**assignment.mission_requirement(entry, zone_names)) if index else None
+                    if candidate is None:
+                        waiting.append(entry)
+                    else:
+                        assignments.append((entry, candidate.drone_id))
+        # Une mission modifiée par une route pendant le tour a déjà été réinsérée (ou retirée)
+        for entry in waiting:
+            if entry.mission_id not in self.queue:
+                self.queue.push(entry)
+        if not assignments:
+            self.last_tick_ms = (time.perf_counter() - start) * 1000
+            return []
+
+        try:
+            written = await writer.submit(lambda db: assignment.apply_assignments(db, assignments))
+        except Exception:
+            # Les missions retournent dans la file ; le tour suivant réessaiera
+            for entry, _ in assignments:
+                if entry.mission_id not in self.queue:
+                    self.queue.push(entry)
+            raise
+        # Couples écartés (mission modifiée ou drone pris entre-temps) : état relu en base
+        stale = {entry.mission_id for entry, _ in assignments} - {entry.mission_id for entry, _ in written}
+        assigned = [(entry.mission_id, drone_id) for entry, drone_id in written]
+        async with AsyncReadSessionLocal() as db:
+            await self.reload(db, stale)
+            if not assigned:
+                self.last_tick_ms = (time.perf_counter() - start) * 1000
+                return []
+            self.discard(*(mission_id for mission_id, _ in assigned))
+            await assignment.publish_assignments(db, assigned)
+
+        stats.invalidate()
+        await cache.invalidate(cache.DRONES)
+        self.dispatched += len(assigned)
+        self.last_tick_ms = (time.perf_counter() - start) * 1000
+        return assigned
+
+    def status(self) -> dict:
+        return {
+            "running": self.task is not None and not self.task.done(),
+            "queued": len(self.queue),
+            "ready": self.queue.ready_count(),
+            "delayed": len(self.queue) - self.queue.ready_count(),
+            "ticks": self.ticks,
+            "dispatched": self.dispatched,
+            "last_tick_ms": round(self.last_tick_ms, 3),
+            "rebuild_ms": round(self.rebuild_ms, 3),
+        }
+
+
+scheduler = Scheduler()
@@ -0,0 +1,227 @@
+"""
+Recherche plein texte dans les missions (titre, description, localisation) et les
+commentaires de l'historique.
+
+Deux moteurs, choisis au premier appel (SEARCH_BACKEND=auto, fts5 ou like) :
+- fts5 (SQLite) : index inversés FTS5 à contenu externe, tenus à jour par des triggers
+  sur les tables sources (toute écriture, y compris les INSERT et UPDATE en lot).
+  Tokenizer unicode61 sans diacritiques : « securite » trouve « Sécurité ». Chaque mot
+  de la requête est cherché en préfixe (index de préfixes 2 et 3 lettres) et les
+  résultats sont classés par BM25 (le titre pèse plus que la description), parmi les
+  SEARCH_WINDOW documents correspondants les plus récents ;
+- like : repli pour les autres bases, par LIKE sur chaque colonne, sans classement.
+  Un moteur dédié (tsvector PostgreSQL, moteur externe) peut prendre sa place en
+  implémentant `search`.
+"""
+import logging
+import os
+import re
+from typing import List, Optional, Sequence
+from sqlalchemy import or_, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import HistoriqueMission, Mission
+
+logger = logging.getLogger(__name__)
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+SEARCH_WINDOW = int(os.getenv("SEARCH_WINDOW", "2000"))  # documents classés au plus par requête ; 0 = tous
+
+MISSION = "mission"
+HISTORIQUE = "historique"
+KINDS = (MISSION, HISTORIQUE)
+
+HIGHLIGHT = ("<mark>", "</mark>")
+SNIPPET_TOKENS = 12
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class FtsIndex:
+    """Index FTS5 à contenu externe sur une table et ses colonnes texte"""
+
+    def __init__(self, name: str, table: str, key: str, columns: Sequence[str], weights: Sequence[float]):
+        self.name = name
+        self.table = table
+        self.key = key
+        self.columns = tuple(columns)
+        self.weights = tuple(weights)
+
+    def ddl(self) -> List[str]:
+        cols = ", ".join(self.columns)
+        new = ", ".join(f"new.{column}" for column in self.columns)
+        old = ", ".join(f"old.{column}" for column in self.columns)
+        insert = f"INSERT INTO {self.name}(rowid, {cols}) VALUES (new.{self.key}, {new});"
+        delete = f"INSERT INTO {self.name}({self.name}, rowid, {cols}) VALUES ('delete', old.{self.key}, {old});"
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING fts5({cols}, content='{self.table}', "
+            f"content_rowid='{self.key}', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ai AFTER INSERT ON {self.table} BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ad AFTER DELETE ON {self.table} BEGIN {delete} END",
+            # Seules les mises à jour des colonnes indexées réécrivent l'index
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_au AFTER UPDATE OF {cols} ON {self.table} "
+            f"BEGIN {delete} {insert} END",
+        ]
+
+    def rebuild_sql(self) -> str:
+        return f"INSERT INTO {self.name}({self.name}) VALUES ('rebuild')"
+
+
+MISSIONS_FTS = FtsIndex("missions_fts", "missions", "mission_id", ("title", "description", "location"), (10.0, 1.0, 4.0))
+HISTORIQUE_FTS = FtsIndex("historique_fts", "historique_missions", "historique_id", ("commentaires",), (1.0,))
+FTS_INDEXES = (MISSIONS_FTS, HISTORIQUE_FTS)
+
+
+def install(connection) -> bool:
+    """
+    Crée les index FTS5 et leurs triggers, puis les remplit (migration).
+    Sans effet hors SQLite ou si SQLite n'a pas été compilé avec FTS5.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    try:
+        connection.execute(text("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)"))
+        connection.execute(text("DROP TABLE temp.fts5_probe"))
+    except OperationalError:
+        logger.warning("SQLite sans FTS5 : la recherche utilisera LIKE")
+        return False
+    for index in FTS_INDEXES:
+        for statement in index.ddl():
+            connection.execute(text(statement))
+    rebuild(connection)
+    return True
+
+
+def rebuild(connection):
+    """Reconstruit les index depuis les tables sources (après un import hors triggers, par exemple)"""
+    for index in FTS_INDEXES:
+        connection.execute(text(index.rebuild_sql()))
+
+
+def terms(query: str) -> List[str]:
+    return _WORD.findall(query)
+
+
+def match_expression(query: str) -> Optional[str]:
+    """
+    Expression MATCH FTS5 : tous les mots, chacun en préfixe.
+    Les mots sont entre guillemets, la syntaxe FTS5 de l'utilisateur n'est pas interprétée.
+    """
+    words = terms(query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class Fts5Backend:
+    """
+    Classement BM25 borné : quand une requête trouve plus de `window` documents, seuls les
+    `window` plus récents (rowid les plus grands) sont classés. Le coût d'un mot très
+    fréquent reste ainsi celui de `window` documents, pas de toute la table.
+    """
+
+    name = "fts5"
+
+    def __init__(self, window: int = SEARCH_WINDOW):
+        self.window = window
+        self.queries = {index.name: self._queries(index) for index in FTS_INDEXES}
+
+    @staticmethod
+    def _queries(index: FtsIndex):
+        fts = index.name
+        bm25 = f"bm25({fts}, {', '.join(map(str, index.weights))})"
+        snippet = f"snippet({fts}, -1, '{HIGHLIGHT[0]}', '{HIGHLIGHT[1]}', '…', {SNIPPET_TOKENS})"
+        if index is MISSIONS_FTS:
+            columns = "m.mission_id AS id, m.mission_id, m.title, m.status"
+            joins = f"JOIN missions m ON m.mission_id = {fts}.rowid"
+        else:
+            columns = "h.historique_id AS id, h.mission_id, m.title, m.status"
+            joins = (f"JOIN historique_missions h ON h.historique_id = {fts}.rowid "
+                     f"JOIN missions m ON m.mission_id = h.mission_id")
+        # Rowid du `window`-ième document le plus récent : borne basse de la fenêtre classée
+        floor = text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :match ORDER BY rowid DESC LIMIT 1 OFFSET :offset")
+        ranked = text(
+            f"SELECT {columns}, -{bm25} AS score, {snippet} AS extrait FROM {fts} {joins} "
+            f"WHERE {fts} MATCH :match AND {fts}.rowid >= :floor ORDER BY {bm25} LIMIT :limit"
+        )
+        return floor, ranked
+
+    async def _search_index(self, db: AsyncSession, index: FtsIndex, match: str, limit: int):
+        floor_sql, ranked_sql = self.queries[index.name]
+        floor = None
+        if self.window:
+            floor = (await db.execute(floor_sql, {"match": match, "offset": self.window - 1})).scalar()
+        rows = await db.execute(ranked_sql, {"match": match, "floor": floor or 0, "limit": limit})
+        return rows.mappings()
+
+    async def search(self, db: AsyncSession, query: str, kinds: Sequence[str], limit: int) -> List[dict]:
+        match = match_expression(query)
+        if match is None:
+            return []
+        hits = []
+        for kind, index in ((MISSION, MISSIONS_FTS), (HISTORIQUE, HISTORIQUE_FTS)):
+            if kind in kinds:
+                hits.extend(dict(row, type=kind) for row in await self._search_index(db, index, match, limit))
+        return hits
+
+
+class LikeBackend:
+    name = "like"
+
+    @staticmethod
+    def _where(columns, words):
+        return [or_(*(column.ilike(f"%{word}%") for column in columns)) for word in words]
+
+    async def search(self, db: AsyncSession, query: str, kinds: Sequence[str], limit: int) -> List[dict]:
+        words = terms(query)
+        if not words:
+            return []
+        hits = []
+        if MISSION in kinds:
+            rows = await db.execute(
+                select(Mission.mission_id.label("id"), Mission.mission_id, Mission.title, Mission.status)
+                .where(*self._where((Mission.title, Mission.description, Mission.location), words))
+                .order_by(Mission.mission_id.desc())
+                .limit(limit)
+            )
+            hits.extend(dict(row, type=MISSION, score=0.0, extrait=None) for row in rows.mappings())
+        if HISTORIQUE in kinds:
+            rows = await db.execute(
+                select(HistoriqueMission.historique_id.label("id"), HistoriqueMission.mission_id, Mission.title,
+                       Mission.status, HistoriqueMission.commentaires.label("extrait"))
+                .join(Mission, Mission.mission_id == HistoriqueMission.mission_id)
+                .where(*self._where((HistoriqueMission.commentaires,), words))
+                .order_by(HistoriqueMission.historique_id.desc())
+                .limit(limit)
+            )
+            hits.extend(dict(row, type=HISTORIQUE, score=0.0) for row in rows.mappings())
+        return hits
+
+
+_backend = None
+
+
+async def get_backend(db: AsyncSession):
+    """Moteur de recherche, déterminé une fois par processus"""
+    global _backend
+    if _backend is None:
+        choice = SEARCH_BACKEND
+        if choice == "auto":
+            choice = "like"
+            if db.get_bind().dialect.name == "sqlite":
+                found = await db.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": MISSIONS_FTS.name},
+                )
+                if found.first() is not None:
+                    choice = "fts5"
+        _backend = Fts5Backend() if choice == "fts5" else LikeBackend()
+    return _backend
+
+
+async def search(db: AsyncSession, query: str, kinds: Sequence[str] = KINDS, limit: int = 20) -> List[dict]:
+    """Les `limit` meilleurs résultats, tous types confondus, du plus pertinent au moins pertinent"""
+    backend = await get_backend(db)
+    hits = await backend.search(db, query, kinds, limit)
+    hits.sort(key=lambda hit: hit["score"], reverse=True)
+    return hits[:limit]
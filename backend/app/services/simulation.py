@@ -0,0 +1,304 @@
+"""
+Simulateur Monte-Carlo de capacité de la flotte (planification « et si »).
+
+Question : combien de drones faut-il pour livrer N missions critiques en X minutes ?
+Chaque tirage génère N missions (poids, distance) arrivant sur `fenetre` minutes et les
+attribue au fil de l'eau au drone compatible (charge, autonomie aller-retour) qui livre le
+plus tôt. Un drone est occupé le temps de l'aller-retour, de la manutention et de la
+recharge. On en tire, pour chaque taille de flotte testée, la part des tirages où toutes
+les missions sont livrées dans le délai, le débit et les distributions d'attente.
+
+Les missions sont tirées dans un catalogue de profils : les missions de l'historique
+(poids et coordonnées, source `historique`) ou des profils synthétiques. Pour chaque
+profil, le temps de livraison et d'occupation de chaque drone est calculé une fois (la
+valeur est infinie si le drone ne peut pas voler la mission). La simulation avance mission
+par mission pour des blocs de RUN_BLOCK tirages à la fois : l'état est un tableau NumPy
+(tirages × drones) des instants où chaque drone se libère, et le choix du drone un argmin
+par ligne ; aucune boucle Python par tirage ni par drone. Les blocs ont chacun leur graine :
+le résultat ne dépend pas du nombre de processus (`workers`).
+
+    python -m app.services.simulation --missions 200 --delai 60 --flotte 50 100 200 --runs 10000
+
+NumPy est une dépendance optionnelle ; sans elle, la simulation est indisponible.
+"""
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Drone, HistoriqueMission, Mission, StatutDrone
+from app.services import routing
+
+try:
+    import numpy as np
+except ImportError:  # dépendance optionnelle
+    np = None
+
+HISTORIQUE = "historique"
+SYNTHETIQUE = "synthetique"
+SOURCES = (HISTORIQUE, SYNTHETIQUE)
+
+MANUTENTION = 5.0  # minutes de chargement et de dépôt par mission
+RECHARGE_RATIO = 0.5  # minutes de recharge par minute de vol
+PROFILS_SYNTHETIQUES = 512
+MAX_PROFILS = 10_000  # missions de l'historique gardées dans le catalogue
+RUN_BLOCK = 256  # tirages simulés ensemble (état de quelques centaines de Ko, tenu en cache)
+MAX_CELLULES = 10_000_000_000  # tirages × missions × drones par simulation (~25 s sur un cœur)
+PERCENTILES = (50, 90, 99)
+
+
+class SimulationUnavailable(Exception):
+    pass
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _require_numpy():
+    if np is None:
+        raise SimulationUnavailable("Simulation indisponible : le paquet numpy n'est pas installé")
+
+
+# --- données : flotte et catalogue de missions ---
+
+def fleet_query():
+    """Caractéristiques des drones en service"""
+    return select(Drone.vitesse_max, Drone.autonomie_max, Drone.poids_max).where(
+        Drone.statut != StatutDrone.HORS_SERVICE.value
+    )
+
+
+def catalog_query(limit: int = MAX_PROFILS):
+    """Missions déjà passées dans l'historique, avec leurs coordonnées"""
+    flown = select(HistoriqueMission.mission_id)
+    return (
+        select(Mission.weight, Mission.departure_lat, Mission.departure_lon, Mission.arrival_lat, Mission.arrival_lon)
+        .where(
+            Mission.mission_id.in_(flown),
+            Mission.departure_lat.is_not(None), Mission.departure_lon.is_not(None),
+            Mission.arrival_lat.is_not(None), Mission.arrival_lon.is_not(None),
+        )
+        .order_by(Mission.mission_id.desc())
+        .limit(limit)
+    )
+
+
+def catalog_from_rows(rows) -> list:
+    """(poids, distance) de chaque mission ; poids absent : 1 kg"""
+    return [
+        (weight or 1.0, routing.distance_km((dep_lat, dep_lon), (arr_lat, arr_lon)))
+        for weight, dep_lat, dep_lon, arr_lat, arr_lon in rows
+    ]
+
+
+async def load(db: AsyncSession, source: str = HISTORIQUE) -> tuple:
+    """Flotte [(vitesse, autonomie, poids_max)] et catalogue [(poids, distance)] lus en base"""
+    fleet = [tuple(row) for row in await db.execute(fleet_query())]
+    catalog = catalog_from_rows(await db.execute(catalog_query())) if source == HISTORIQUE else []
+    return fleet, catalog
+
+
+def synthetic_catalog(seed: Optional[int] = None, size: int = PROFILS_SYNTHETIQUES) -> list:
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+    weights = np.clip(rng.gamma(2.0, 2.0, size), 0.1, 25.0)
+    distances = rng.uniform(1.0, 20.0, size)
+    return list(zip(weights.tolist(), distances.tolist()))
+
+
+# --- simulation ---
+
+def profile_costs(fleet, catalog) -> tuple:
+    """
+    Pour chaque profil (ligne) et chaque drone (colonne) : minutes jusqu'à la livraison et
+    minutes d'occupation du drone ; infini si le drone ne peut pas voler la mission.
+    """
+    vitesse, autonomie, poids_max = (np.asarray(column, dtype=np.float64)[None, :] for column in zip(*fleet))
+    poids, distance = (np.asarray(column, dtype=np.float64)[:, None] for column in zip(*catalog))
+    aller = distance / vitesse * 60
+    livraison = aller + MANUTENTION
+    occupation = 2 * aller * (1 + RECHARGE_RATIO) + MANUTENTION
+    impossible = (poids > poids_max) | (2 * distance > autonomie)
+    livraison[impossible] = np.inf
+    occupation[impossible] = np.inf
+    return livraison.astype(np.float32), occupation.astype(np.float32)
+
+
+def simulate_block(livraison, occupation, missions: int, fenetre: float, runs: int, seed) -> tuple:
+    """
+    `runs` tirages de `missions` missions. Retourne, par tirage et par mission, l'attente
+    avant départ et l'instant de livraison (minutes depuis le début ; infini si aucun drone
+    ne peut la voler).
+    """
+    rng = np.random.default_rng(seed)
+    drones = livraison.shape[1]
+    profiles = rng.integers(0, livraison.shape[0], (runs, missions))
+    if fenetre > 0:
+        arrivals = np.sort(rng.uniform(0, fenetre, (runs, missions)), axis=1).astype(np.float32)
+    else:
+        arrivals = np.zeros((runs, missions), dtype=np.float32)
+
+    free = np.zeros((runs, drones), dtype=np.float32)  # instant où chaque drone se libère
+    done = np.empty((runs, drones), dtype=np.float32)
+    cost = np.empty((runs, drones), dtype=np.float32)
+    waits = np.empty((runs, missions), dtype=np.float32)
+    delivered = np.empty((runs, missions), dtype=np.float32)
+    rows = np.arange(runs)
+    for j in range(missions):
+        arrival = arrivals[:, j]
+        np.maximum(free, arrival[:, None], out=done)
+        np.take(livraison, profiles[:, j], axis=0, out=cost)
+        done += cost
+        chosen = done.argmin(axis=1)
+        start = np.maximum(free[rows, chosen], arrival)
+        delivered[:, j] = done[rows, chosen]
+        waits[:, j] = start - arrival
+        # Mission impossible : aucun drone n'est occupé (l'occupation est infinie)
+        served = np.isfinite(delivered[:, j])
+        waits[~served, j] = np.inf
+        free[rows[served], chosen[served]] = start[served] + occupation[profiles[served, j], chosen[served]]
+    return waits, delivered
+
+
+def _run_blocks(livraison, occupation, missions, fenetre, blocks) -> tuple:
+    results = [simulate_block(livraison, occupation, missions, fenetre, runs, seed) for runs, seed in blocks]
+    return np.concatenate([w for w, _ in results]), np.concatenate([d for _, d in results])
+
+
+def _resample_fleet(fleet, size: int, rng) -> list:
+    """Flotte de `size` drones tirés (avec remise) parmi les modèles de la flotte réelle"""
+    if size == len(fleet):
+        return list(fleet)
+    return [fleet[i] for i in rng.integers(0, len(fleet), size)]
+
+
+def _percentiles(values) -> dict:
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return {f"p{q}": None for q in PERCENTILES}
+    return {f"p{q}": round(float(v), 2) for q, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def summarise(waits, delivered, delai: float) -> dict:
+    served = np.isfinite(delivered)
+    all_served = served.all(axis=1)
+    makespan = np.where(served, delivered, 0).max(axis=1)
+    on_time = (delivered <= delai).sum(axis=1)
+    missions = delivered.shape[1]
+    # Débit : missions livrées par heure, jusqu'à la dernière livraison du tirage
+    throughput = np.divide(served.sum(axis=1) * 60.0, makespan, out=np.zeros(len(makespan)), where=makespan > 0)
+    return {
+        "taux_reussite": round(float((all_served & (makespan <= delai)).mean()), 4),
+        "livrees_dans_delai": round(float(on_time.mean() / missions), 4),
+        "non_servies": round(float((~served).sum(axis=1).mean()), 3),
+        "debit_par_heure": round(float(throughput.mean()), 2),
+        "attente_min": _percentiles(waits),
+        "derniere_livraison_min": _percentiles(np.where(all_served, makespan, np.inf)),
+    }
+
+
+def run(
+    fleet: Sequence[tuple],
+    catalog: Sequence[tuple],
+    missions: int,
+    delai: float,
+    fenetre: float = 0.0,
+    runs: int = 1000,
+    tailles: Optional[Sequence[int]] = None,
+    objectif: float = 0.95,
+    seed: Optional[int] = None,
+    workers: int = 1,
+) -> dict:
+    """
+    Simule chaque taille de flotte (`tailles` ; par défaut la flotte actuelle) et retourne
+    les résultats par taille, et la plus petite taille atteignant `objectif`.
+    """
+    _require_numpy()
+    if not fleet:
+        raise ValueError("Aucun drone en service à simuler")
+    if not catalog:
+        raise ValueError("Catalogue de missions vide")
+    sequence = np.random.SeedSequence(seed)
+    fleet_rng = np.random.default_rng(sequence.spawn(1)[0])
+    sizes = sorted(set(tailles)) if tailles else [len(fleet)]
+    if sizes[0] < 1:
+        raise ValueError("Une flotte doit compter au moins un drone")
+    if runs * missions * sum(sizes) > MAX_CELLULES:
+        raise ValueError(
+            f"Simulation trop lourde : tirages × missions × drones dépasse {MAX_CELLULES:,} ; "
+            "réduire runs, missions ou les tailles de flotte"
+        )
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    results = []
+    try:
+        for size in sizes:
+            livraison, occupation = profile_costs(_resample_fleet(fleet, size, fleet_rng), catalog)
+            blocks = [
+                (min(RUN_BLOCK, runs - start), block_seed)
+                for start, block_seed in zip(range(0, runs, RUN_BLOCK), sequence.spawn(math.ceil(runs / RUN_BLOCK)))
+            ]
+            if pool is None:
+                waits, delivered = _run_blocks(livraison, occupation, missions, fenetre, blocks)
+            else:
+                parts = [blocks[i::workers] for i in range(workers) if blocks[i::workers]]
+                futures = [pool.submit(_run_blocks, livraison, occupation, missions, fenetre, part) for part in parts]
+                outputs = [future.result() for future in futures]
+                waits = np.concatenate([w for w, _ in outputs])
+                delivered = np.concatenate([d for _, d in outputs])
+            results.append({"drones": size, **summarise(waits, delivered, delai)})
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    recommended = next((result["drones"] for result in results if result["taux_reussite"] >= objectif), None)
+    return {
+        "missions": missions,
+        "delai": delai,
+        "fenetre": fenetre,
+        "runs": runs,
+        "profils": len(catalog),
+        "objectif": objectif,
+        "recommandation": recommended,
+        "resultats": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulateur Monte-Carlo de capacité de la flotte")
+    parser.add_argument("--missions", type=int, default=100, help="missions critiques à livrer")
+    parser.add_argument("--delai", type=float, default=60.0, help="délai pour tout livrer (minutes)")
+    parser.add_argument("--fenetre", type=float, default=0.0, help="durée d'arrivée des missions (0 : toutes à t=0)")
+    parser.add_argument("--runs", type=int, default=1000, help="tirages Monte-Carlo par taille de flotte")
+    parser.add_argument("--flotte", type=int, nargs="*", help="tailles de flotte à tester (défaut : flotte actuelle)")
+    parser.add_argument("--objectif", type=float, default=0.95, help="part des tirages à réussir")
+    parser.add_argument("--source", choices=SOURCES, default=HISTORIQUE)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int, default=1, help="processus de simulation")
+    args = parser.parse_args()
+
+    from app.database import engine, init_db
+
+    init_db()
+    with engine.connect() as connection:
+        fleet = [tuple(row) for row in connection.execute(fleet_query())]
+        catalog = catalog_from_rows(connection.execute(catalog_query())) if args.source == HISTORIQUE else []
+    if not catalog:
+        catalog = synthetic_catalog(args.seed)
+    result = run(
+        fleet, catalog, args.missions, args.delai, fenetre=args.fenetre, runs=args.runs, tailles=args.flotte,
+        objectif=args.objectif, seed=args.seed, workers=max(1, min(args.workers, os.cpu_count() or 1)),
+    )
+    print(f"{result['missions']} missions en {result['delai']:g} min, {result['runs']} tirages, "
+          f"{result['profils']} profils de mission")
+    for row in result["resultats"]:
+        print(f"  {row['drones']:>5} drones : réussite {row['taux_reussite']:.1%}, "
+              f"attente p90 {row['attente_min']['p90']} min, débit {row['debit_par_heure']}/h")
+    print(f"Plus petite flotte atteignant {result['objectif']:.0%} : {result['recommandation'] or 'aucune'}")
+
+
+if __name__ == "__main__":
+    main()
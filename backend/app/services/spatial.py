@@ -0,0 +1,271 @@
+"""
+Index spatial en mémoire des zones de vol.
+
+Les zones sont rangées dans une grille régulière (cellules de CELL_SIZE degrés) :
+une recherche ne teste que les zones des cellules concernées, puis applique
+le test exact (point dans polygone, intersection segment/polygone). Une zone dont l'emprise
+couvre plus de MAX_ZONE_CELLS cellules (une région entière) n'est pas découpée : elle va
+dans une liste à part, testée à chaque recherche sur son seul rectangle englobant.
+Les coordonnées sont traitées comme planes, ce qui convient à l'échelle d'une ville.
+
+L'index est chargé une fois depuis la base puis tenu à jour par les routes des zones.
+`version` est incrémenté à chaque modification (clé de cache pour la planification de trajets).
+Les modifications prennent `lock`, que la planification tient pendant chaque trajet : les
+trajets en lot sont calculés dans le pool de threads, hors de la boucle d'événements.
+"""
+import asyncio
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.zone_vol import ZoneDeVol
+
+CELL_SIZE = 0.01  # degrés, environ 1 km
+MAX_ZONE_CELLS = 4096  # au-delà (environ 64 km de côté), la zone va dans la liste des grandes zones
+
+Point = Tuple[float, float]  # (latitude, longitude)
+
+
+def point_in_polygon(lat: float, lon: float, polygon: Sequence[Point]) -> bool:
+    """Test du rayon (ray casting) ; les points sur un bord comptent comme intérieurs"""
+    inside = False
+    count = len(polygon)
+    for i in range(count):
+        lat1, lon1 = polygon[i]
+        lat2, lon2 = polygon[(i + 1) % count]
+        if _on_segment(lat, lon, lat1, lon1, lat2, lon2):
+            return True
+        if (lon1 > lon) != (lon2 > lon):
+            crossing = lat1 + (lon - lon1) * (lat2 - lat1) / (lon2 - lon1)
+            if lat < crossing:
+                inside = not inside
+    return inside
+
+
+def _cross(ax, ay, bx, by, cx, cy) -> float:
+    return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+
+def _on_segment(px, py, ax, ay, bx, by) -> bool:
+    return (
+        abs(_cross(ax, ay, bx, by, px, py)) < 1e-12
+        and min(ax, bx) <= px <= max(ax, bx)
+        and min(ay, by) <= py <= max(ay, by)
+    )
+
+
+def segments_intersect(a: Point, b: Point, c: Point, d: Point) -> bool:
+    d1 = _cross(*c, *d, *a)
+    d2 = _cross(*c, *d, *b)
+    d3 = _cross(*a, *b, *c)
+    d4 = _cross(*a, *b, *d)
+    if ((d1 > 0) != (d2 > 0)) and ((d3 > 0) != (d4 > 0)) and d1 and d2 and d3 and d4:
+        return True
+    return (
+        _on_segment(*a, *c, *d) or _on_segment(*b, *c, *d)
+        or _on_segment(*c, *a, *b) or _on_segment(*d, *a, *b)
+    )
+
+
+def segment_crosses_polygon(a: Point, b: Point, polygon: Sequence[Point]) -> bool:
+    if point_in_polygon(*a, polygon) or point_in_polygon(*b, polygon):
+        return True
+    count = len(polygon)
+    return any(segments_intersect(a, b, polygon[i], polygon[(i + 1) % count]) for i in range(count))
+
+
+class IndexedZone:
+    __slots__ = ("zone_id", "polygon", "bbox", "data")
+
+    def __init__(self, zone_id: int, polygon: Sequence[Sequence[float]], data: dict):
+        self.zone_id = zone_id
+        self.polygon = [(float(lat), float(lon)) for lat, lon in polygon]
+        lats = [lat for lat, _ in self.polygon]
+        lons = [lon for _, lon in self.polygon]
+        self.bbox = (min(lats), min(lons), max(lats), max(lons))
+        self.data = data
+
+    def contains(self, lat: float, lon: float) -> bool:
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+        return point_in_polygon(lat, lon, self.polygon)
+
+    def crosses(self, a: Point, b: Point) -> bool:
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if max(a[0], b[0]) < min_lat or min(a[0], b[0]) > max_lat:
+            return False
+        if max(a[1], b[1]) < min_lon or min(a[1], b[1]) > max_lon:
+            return False
+        return segment_crosses_polygon(a, b, self.polygon)
+
+
+def _cell(value: float, cell_size: float) -> int:
+    return math.floor(value / cell_size)
+
+
+class ZoneIndex:
+    def __init__(self, cell_size: float = CELL_SIZE, max_zone_cells: int = MAX_ZONE_CELLS):
+        self.cell_size = cell_size
+        self.max_zone_cells = max_zone_cells
+        self.zones: Dict[int, IndexedZone] = {}
+        self.grid: Dict[Tuple[int, int], set] = {}
+        self.large: set = set()  # zones trop étendues pour la grille
+        self.lock = threading.RLock()
+        self.version = 0
+        self.loaded = False
+
+    def __len__(self):
+        return len(self.zones)
+
+    def _cells(self, bbox) -> Iterable[Tuple[int, int]]:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        for i in range(_cell(min_lat, self.cell_size), _cell(max_lat, self.cell_size) + 1):
+            for j in range(_cell(min_lon, self.cell_size), _cell(max_lon, self.cell_size) + 1):
+                yield i, j
+
+    def _cell_count(self, bbox) -> int:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        rows = _cell(max_lat, self.cell_size) - _cell(min_lat, self.cell_size) + 1
+        return rows * (_cell(max_lon, self.cell_size) - _cell(min_lon, self.cell_size) + 1)
+
+    def upsert(self, zone_id: int, polygon: Optional[Sequence[Sequence[float]]], data: dict):
+        with self.lock:
+            self.remove(zone_id, bump=False)
+            if polygon:
+                zone = IndexedZone(zone_id, polygon, data)
+                self.zones[zone_id] = zone
+                if self._cell_count(zone.bbox) > self.max_zone_cells:
+                    self.large.add(zone_id)
+                else:
+                    for cell in self._cells(zone.bbox):
+                        self.grid.setdefault(cell, set()).add(zone_id)
+            self.version += 1
+
+    def remove(self, zone_id: int, bump: bool = True):
+        with self.lock:
+            zone = self.zones.pop(zone_id, None)
+            if zone_id in self.large:
+                self.large.discard(zone_id)
+            elif zone is not None:
+                for cell in self._cells(zone.bbox):
+                    members = self.grid.get(cell)
+                    if members is not None:
+                        members.discard(zone_id)
+                        if not members:
+                            del self.grid[cell]
+            if bump:
+                self.version += 1
+
+    def clear(self):
+        with self.lock:
+            self.zones.clear()
+            self.grid.clear()
+            self.large.clear()
+            self.version += 1
+
+    def zones_in_bbox(self, bbox) -> List[IndexedZone]:
+        """Zones dont l'emprise recoupe le rectangle (min_lat, min_lon, max_lat, max_lon)"""
+        min_lat, min_lon, max_lat, max_lon = bbox
+        if self._cell_count(bbox) > len(self.zones):
+            # Rectangle plus étendu que la liste des zones : la parcourir coûte moins que la grille
+            candidates = set(self.zones)
+        else:
+            candidates = set(self.large)
+            for cell in self._cells(bbox):
+                candidates.update(self.grid.get(cell, ()))
+        result = []
+        for zone_id in sorted(candidates):
+            z_min_lat, z_min_lon, z_max_lat, z_max_lon = self.zones[zone_id].bbox
+            if z_min_lat <= max_lat and z_max_lat >= min_lat and z_min_lon <= max_lon and z_max_lon >= min_lon:
+                result.append(self.zones[zone_id])
+        return result
+
+    def zones_at(self, lat: float, lon: float) -> List[IndexedZone]:
+        candidates = self.large.union(self.grid.get((_cell(lat, self.cell_size), _cell(lon, self.cell_size)), ()))
+        return sorted(
+            (self.zones[zone_id] for zone_id in candidates if self.zones[zone_id].contains(lat, lon)),
+            key=lambda zone: zone.zone_id
+        )
+
+    def _segment_cells(self, a: Point, b: Point) -> List[Tuple[int, int]]:
+        """Cellules traversées par le segment (parcours de grille d'Amanatides et Woo)"""
+        size = self.cell_size
+        i, j = _cell(a[0], size), _cell(a[1], size)
+        end_i, end_j = _cell(b[0], size), _cell(b[1], size)
+        d_lat, d_lon = b[0] - a[0], b[1] - a[1]
+        step_i = 1 if d_lat > 0 else -1
+        step_j = 1 if d_lon > 0 else -1
+        # Fraction du segment à parcourir pour franchir la prochaine frontière de cellule
+        if d_lat:
+            next_i = ((i + (step_i > 0)) * size - a[0]) / d_lat
+            delta_i = size / abs(d_lat)
+        else:
+            next_i = delta_i = math.inf
+        if d_lon:
+            next_j = ((j + (step_j > 0)) * size - a[1]) / d_lon
+            delta_j = size / abs(d_lon)
+        else:
+            next_j = delta_j = math.inf
+        cells = [(i, j)]
+        for _ in range(abs(end_i - i) + abs(end_j - j)):
+            if next_i < next_j:
+                i += step_i
+                next_i += delta_i
+            else:
+                j += step_j
+                next_j += delta_j
+            cells.append((i, j))
+        return cells
+
+    def zones_crossed(self, points: Sequence[Point]) -> List[IndexedZone]:
+        """Zones traversées par une ligne brisée (départ, ..., arrivée)"""
+        found = {}
+        for a, b in zip(points, points[1:]):
+            candidates = set(self.large)
+            for cell in self._segment_cells(a, b):
+                candidates.update(self.grid.get(cell, ()))
+            for zone_id in candidates:
+                if zone_id not in found and self.zones[zone_id].crosses(a, b):
+                    found[zone_id] = self.zones[zone_id]
+        return sorted(found.values(), key=lambda zone: zone.zone_id)
+
+
+zone_index = ZoneIndex()
+_load_lock = asyncio.Lock()
+
+
+def zone_data(zone: ZoneDeVol) -> dict:
+    return {
+        "zone_id": zone.zone_id,
+        "nom_zone": zone.nom_zone,
+        "type_zone": zone.type_zone,
+        "risque": zone.risque,
+        "restrictions": zone.restrictions,
+        "polygone": zone.polygone,
+    }
+
+
+def index_zone(zone: ZoneDeVol):
+    """À appeler après la création ou la modification d'une zone"""
+    if zone_index.loaded:
+        zone_index.upsert(zone.zone_id, zone.polygone, zone_data(zone))
+
+
+def unindex_zone(zone_id: int):
+    if zone_index.loaded:
+        zone_index.remove(zone_id)
+
+
+async def get_zone_index(db: AsyncSession) -> ZoneIndex:
+    """Index des zones, chargé depuis la base au premier appel"""
+    if not zone_index.loaded:
+        async with _load_lock:
+            if not zone_index.loaded:
+                zones = (await db.execute(select(ZoneDeVol).where(ZoneDeVol.polygone.is_not(None)))).scalars()
+                zone_index.clear()
+                for zone in zones:
+                    zone_index.upsert(zone.zone_id, zone.polygone, zone_data(zone))
+                zone_index.loaded = True
+    return zone_index
@@ -0,0 +1,62 @@
+import threading
+import time
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.drone import Drone, StatutDrone
+from app.models.mission import Mission
+
+STATS_TTL = 5.0  # secondes
+
+_lock = threading.Lock()
+_cached: Optional[dict] = None
+_expires_at = 0.0
+_generation = 0
+
+
+def invalidate():
+    """Invalide les statistiques en cache (à appeler après toute écriture de mission ou de drone)"""
+    global _cached, _generation
+    with _lock:
+        _cached = None
+        _generation += 1
+
+
+async def _count_by(db: AsyncSession, column) -> dict:
+    rows = (await db.execute(select(column, func.count()).group_by(column))).all()
+    return {key: count for key, count in rows if key is not None}
+
+
+async def compute_stats(db: AsyncSession) -> dict:
+    """Calcule les compteurs agrégés avec des requêtes GROUP BY"""
+    by_status = await _count_by(db, Mission.status)
+    drones_by_statut = await _count_by(db, Drone.statut)
+    total_drones = sum(drones_by_statut.values())
+    en_mission = drones_by_statut.get(StatutDrone.EN_MISSION.value, 0)
+    return {
+        "total_missions": sum(by_status.values()),
+        "missions_by_status": by_status,
+        "missions_by_category": await _count_by(db, Mission.category),
+        "missions_by_priority": await _count_by(db, Mission.priority),
+        "total_drones": total_drones,
+        "drones_by_statut": drones_by_statut,
+        "drone_utilisation": en_mission / total_drones if total_drones else 0.0,
+    }
+
+
+async def get_stats(db: AsyncSession) -> dict:
+    """Retourne les statistiques, recalculées au plus toutes les STATS_TTL secondes"""
+    global _cached, _expires_at
+    with _lock:
+        if _cached is not None and time.monotonic() < _expires_at:
+            return _cached
+        generation = _generation
+
+    stats = await compute_stats(db)
+
+    with _lock:
+        # Une écriture survenue pendant le calcul rend le résultat obsolète : on ne le garde pas
+        if generation == _generation:
+            _cached = stats
+            _expires_at = time.monotonic() + STATS_TTL
+    return stats
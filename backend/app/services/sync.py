@@ -0,0 +1,112 @@
+"""
+Synchronisation incrémentale des missions (GET /api/missions/changes).
+
+Le client garde un jeton opaque et ne reçoit que les missions créées ou modifiées depuis
+(index sur updated_at, mission_id) et les suppressions enregistrées depuis (journal
+missions_supprimees, écrit dans la transaction de la suppression). Le travail et la bande
+passante suivent le nombre de changements, pas la taille de la table.
+
+Le jeton porte la dernière clé (updated_at, mission_id) transmise, le dernier numéro de
+suppression transmis et sa date d'émission. Une page de suite (has_more) reprend
+exactement après la dernière clé ; une nouvelle synchronisation relit en plus les
+SYNC_OVERLAP dernières secondes, pour les transactions validées après une écriture plus
+récente : le client applique les lignes par ID (upsert), un doublon est sans effet.
+
+Le journal est purgé après SYNC_TOMBSTONE_DAYS jours ; un jeton plus ancien reçoit 410
+et le client repart d'une synchronisation complète (sans `since`).
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.mission import Mission, MissionSupprimee
+from app.schemas.mission import MissionResponse
+from app.services import fastjson, pagination
+
+SYNC_OVERLAP = float(os.getenv("SYNC_OVERLAP", "5"))  # secondes relues à chaque synchronisation
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))  # conservation des suppressions
+PURGE_INTERVAL = 3600.0  # secondes entre deux purges du journal, par processus
+
+TOKEN_SCOPE = "missions_sync"
+EXPIRE = "Jeton de synchronisation expiré : relancer une synchronisation complète sans `since`"
+
+_next_purge = 0.0
+
+
+async def record_deletion(db: AsyncSession, mission_id: int):
+    """Inscrit la suppression dans le journal (à appeler dans la transaction du DELETE)"""
+    global _next_purge
+    now = datetime.utcnow()
+    await db.execute(insert(MissionSupprimee).values(mission_id=mission_id, deleted_at=now))
+    if time.monotonic() >= _next_purge:
+        _next_purge = time.monotonic() + PURGE_INTERVAL
+        cutoff = now - timedelta(days=SYNC_TOMBSTONE_DAYS)
+        await db.execute(delete(MissionSupprimee).where(MissionSupprimee.deleted_at < cutoff))
+
+
+def encode_token(updated_at: Optional[str], mission_id: int, seq: int, more: bool) -> str:
+    state = {"u": updated_at, "i": mission_id, "s": seq, "t": int(time.time()), "c": int(more)}
+    return pagination.encode_cursor(TOKEN_SCOPE, state)
+
+
+def decode_token(token: str) -> dict:
+    state = pagination.decode_cursor(TOKEN_SCOPE, token)
+    if not isinstance(state, dict) or not {"u", "i", "s", "t", "c"} <= state.keys():
+        raise HTTPException(status_code=400, detail="Jeton de synchronisation invalide")
+    if state["t"] < time.time() - SYNC_TOMBSTONE_DAYS * 86400:
+        raise HTTPException(status_code=410, detail=EXPIRE)
+    return state
+
+
+def _key(value):
+    # Dates renvoyées telles que lues en base (datetime, ou texte selon le pilote)
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def changes(db: AsyncSession, since: Optional[str] = None, limit: int = 500) -> dict:
+    """
+    Page de changements et jeton suivant. Sans `since`, toutes les missions (synchronisation
+    complète, paginée de la même façon) ; le journal n'est relu qu'à partir de l'instant initial.
+    """
+    query = fastjson.select_schema(MissionResponse, Mission).order_by(Mission.updated_at, Mission.mission_id)
+    deleted = []
+    if since is None:
+        # Numéro relu avant les missions : une suppression concurrente sera transmise plus tard
+        seq = (await db.execute(select(func.coalesce(func.max(MissionSupprimee.seq), 0)))).scalar()
+        updated_at, mission_id = None, 0
+    else:
+        state = decode_token(since)
+        seq, updated_at, mission_id = state["s"], state["u"], state["i"]
+        if updated_at is not None:
+            last = datetime.fromisoformat(updated_at)
+            if state["c"]:
+                query = query.where(or_(
+                    Mission.updated_at > last, and_(Mission.updated_at == last, Mission.mission_id > mission_id)
+                ))
+            else:
+                query = query.where(Mission.updated_at >= last - timedelta(seconds=SYNC_OVERLAP))
+        tombstones = await db.execute(
+            select(MissionSupprimee.seq, MissionSupprimee.mission_id, MissionSupprimee.deleted_at)
+            .where(MissionSupprimee.seq > seq)
+            .order_by(MissionSupprimee.seq)
+            .limit(limit + 1)
+        )
+        deleted = tombstones.all()
+
+    rows = await fastjson.fetch(db, query.limit(limit + 1))
+    more_rows = len(rows) > limit
+    more_deleted = len(deleted) > limit
+    rows, deleted = rows[:limit], deleted[:limit]
+    if rows:
+        updated_at, mission_id = _key(rows[-1]["updated_at"]), rows[-1]["mission_id"]
+    if deleted:
+        seq = deleted[-1].seq
+    return {
+        "changes": rows,
+        "deleted": [{"mission_id": row.mission_id, "deleted_at": row.deleted_at} for row in deleted],
+        "token": encode_token(updated_at, mission_id, seq, more_rows),
+        "has_more": more_rows or more_deleted,
+    }
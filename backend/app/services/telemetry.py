@@ -0,0 +1,482 @@
+"""
+Télémétrie des drones : ingestion en lot, mémoire tampon circulaire et stockage par partitions.
+
+- Chaque drone a un tampon circulaire (array de flottants, TELEMETRY_BUFFER échantillons)
+  qui garde ses dernières secondes de vol : la dernière position est lue en O(1) et les
+  fenêtres récentes sont sous-échantillonnées sans requête SQL ;
+- les échantillons reçus s'accumulent dans une file d'attente, vidée toutes les
+  TELEMETRY_FLUSH secondes par une tâche asyncio en un INSERT par lot, soumis à la file
+  d'écriture (app.services.writer) comme les écritures des routes ;
+- la table est partitionnée par jour (telemetrie_AAAAMMJJ), clé (drone_id, ts) sans
+  rowid : une partition expirée (TELEMETRY_RETENTION_DAYS) est supprimée d'un DROP TABLE.
+
+Les échantillons ne sont ni rattachés à une mission ni contrôlés contre la table des
+drones : l'ingestion ne fait aucune lecture en base. Avec plusieurs processus, chacun
+écrit ce qu'il a reçu, mais les dernières positions et les tampons restent locaux :
+un drone doit toujours émettre vers le même processus (WebSocket ou répartition par drone).
+"""
+import asyncio
+import logging
+import os
+import time
+from array import array
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import orjson
+from sqlalchemy import Column, Float, Integer, MetaData, Table, func, select, text, union_all
+from sqlalchemy.dialects import postgresql
+from app.database import async_read_engine
+from app.services import metrics
+from app.services.writer import writer
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_BUFFER = int(os.getenv("TELEMETRY_BUFFER", "600"))  # échantillons gardés en mémoire par drone
+TELEMETRY_FLUSH = float(os.getenv("TELEMETRY_FLUSH", "1.0"))  # secondes entre deux écritures
+TELEMETRY_MAX_PENDING = int(os.getenv("TELEMETRY_MAX_PENDING", "200000"))  # file d'attente bornée
+TELEMETRY_RETENTION_DAYS = int(os.getenv("TELEMETRY_RETENTION_DAYS", "7"))  # 0 = conserver tout
+
+# Ordre des champs d'un échantillon, dans les tampons comme dans les partitions
+FIELDS = ("ts", "lat", "lon", "altitude", "vitesse", "batterie")
+STRIDE = len(FIELDS)
+MAX_POINTS = 5000  # points au plus par réponse sous-échantillonnée
+MAX_SAMPLES = 50_000  # échantillons au plus par requête
+
+PARTITION_PREFIX = "telemetrie_"
+DAY = 86400
+
+samples_received = metrics.registry.register(metrics.Counter(
+    "telemetry_samples_total", "Échantillons de télémétrie acceptés", ("source",)))
+samples_rejected = metrics.registry.register(metrics.Counter(
+    "telemetry_samples_rejected_total", "Échantillons de télémétrie refusés", ("source",)))
+samples_dropped = metrics.registry.register(metrics.Counter(
+    "telemetry_samples_dropped_total", "Échantillons perdus, file d'attente pleine"))
+pending_samples = metrics.registry.register(metrics.Gauge(
+    "telemetry_pending_samples", "Échantillons en attente d'écriture"))
+flush_duration = metrics.registry.register(metrics.Histogram(
+    "telemetry_flush_duration_seconds", "Durée d'une écriture en lot de la télémétrie"))
+
+
+class PayloadError(ValueError):
+    """Corps illisible (ni objet, ni tableau JSON, ni NDJSON)"""
+
+
+class RingBuffer:
+    """Derniers échantillons d'un drone, entrelacés dans un seul array de flottants"""
+
+    __slots__ = ("capacity", "data", "next", "size")
+
+    def __init__(self, capacity: int = TELEMETRY_BUFFER):
+        self.capacity = capacity
+        self.data = array("d", bytes(8 * STRIDE * capacity))
+        self.next = 0  # position du prochain échantillon
+        self.size = 0
+
+    def append(self, sample: Tuple[float, ...]):
+        data = self.data
+        offset = self.next * STRIDE
+        data[offset] = sample[0]
+        data[offset + 1] = sample[1]
+        data[offset + 2] = sample[2]
+        data[offset + 3] = sample[3]
+        data[offset + 4] = sample[4]
+        data[offset + 5] = sample[5]
+        self.next = (self.next + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def _at(self, position: int) -> Tuple[float, ...]:
+        offset = position * STRIDE
+        return tuple(self.data[offset:offset + STRIDE])
+
+    def oldest_ts(self) -> Optional[float]:
+        if not self.size:
+            return None
+        return self.data[((self.next - self.size) % self.capacity) * STRIDE]
+
+    def samples(self) -> Iterable[Tuple[float, ...]]:
+        """Échantillons du plus ancien au plus récent (ordre d'arrivée)"""
+        start = self.next - self.size
+        for index in range(start, self.next):
+            yield self._at(index % self.capacity)
+
+
+def _number(row: dict, name: str, low: float, high: float, default=None) -> Optional[float]:
+    value = row.get(name, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} : nombre attendu")
+    if not low <= value <= high:
+        raise ValueError(f"{name} : doit être compris entre {low} et {high}")
+    return float(value)
+
+
+def parse_sample(row, now: float) -> Tuple[int, Tuple[float, ...]]:
+    """
+    (drone_id, échantillon) depuis un objet JSON ; ValueError si invalide.
+    `ts` (secondes epoch) vaut l'heure de réception s'il est absent ; altitude,
+    vitesse et batterie absents valent NaN (non mesurés).
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Objet JSON attendu")
+    drone_id = row.get("drone_id")
+    if isinstance(drone_id, bool) or not isinstance(drone_id, int) or drone_id <= 0:
+        raise ValueError("drone_id : entier positif attendu")
+    ts = _number(row, "ts", now - 30 * DAY, now + 60, default=now)
+    lat = _number(row, "lat", -90.0, 90.0)
+    lon = _number(row, "lon", -180.0, 180.0)
+    if lat is None or lon is None:
+        raise ValueError("lat et lon sont obligatoires")
+    altitude = _number(row, "altitude", -500.0, 20_000.0)
+    vitesse = _number(row, "vitesse", 0.0, 1000.0)
+    batterie = _number(row, "batterie", 0.0, 100.0)
+    nan = float("nan")
+    return drone_id, (
+        ts, lat, lon,
+        nan if altitude is None else altitude,
+        nan if vitesse is None else vitesse,
+        nan if batterie is None else batterie,
+    )
+
+
+def parse_body(body: bytes, ndjson: bool = False) -> list:
+    """Objets JSON d'un message : objet seul, tableau JSON ou NDJSON"""
+    try:
+        if ndjson:
+            rows = [orjson.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            rows = orjson.loads(body or b"[]")
+    except orjson.JSONDecodeError as error:
+        raise PayloadError(f"JSON invalide : {error}")
+    if isinstance(rows, dict):
+        rows = [rows]
+    if not isinstance(rows, list):
+        raise PayloadError("Objet, tableau JSON ou NDJSON attendu")
+    if len(rows) > MAX_SAMPLES:
+        raise PayloadError(f"Au plus {MAX_SAMPLES} échantillons par requête")
+    return rows
+
+
+def _partition_name(ts: float) -> str:
+    return PARTITION_PREFIX + datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m%d")
+
+
+def partition_table(name: str, metadata: MetaData) -> Table:
+    """Partition journalière : clé (drone_id, ts), sans rowid sur SQLite (lignes rangées par drone puis date)"""
+    return Table(
+        name,
+        metadata,
+        Column("drone_id", Integer, primary_key=True),
+        Column("ts", Float, primary_key=True),
+        *(Column(field, Float) for field in FIELDS[1:]),
+        sqlite_with_rowid=False,
+    )
+
+
+async def _insert_rows(connection, table: Table, rows: List[tuple]):
+    """
+    INSERT en lot (executemany) de tuples dans l'ordre des colonnes de la partition.
+    Passe directement par le pilote : construire un dict par ligne et laisser SQLAlchemy
+    traiter chaque paramètre coûtait trois fois l'écriture elle-même.
+    """
+    # Un échantillon renvoyé deux fois (reprise après coupure) n'est écrit qu'une fois
+    if connection.dialect.name == "postgresql":
+        insert = postgresql.insert(table).on_conflict_do_nothing()
+    else:
+        insert = table.insert().prefix_with("OR IGNORE", dialect="sqlite")
+    compiled = insert.compile(dialect=connection.dialect, column_keys=[column.key for column in table.c])
+    if compiled.positional:
+        order = [table.c.keys().index(name) for name in compiled.positiontup]
+        params = rows if order == list(range(len(order))) else [tuple(row[i] for i in order) for row in rows]
+    else:
+        params = [dict(zip(table.c.keys(), row)) for row in rows]
+    await connection.exec_driver_sql(str(compiled), params)
+
+
+def downsample(samples: Iterable[Tuple[float, ...]], step: float) -> List[dict]:
+    """
+    Moyenne par intervalle de `step` secondes (batterie : minimum de l'intervalle).
+    Les mesures absentes (NaN) sont ignorées.
+    """
+    buckets: Dict[int, list] = {}
+    for sample in samples:
+        bucket = buckets.get(int(sample[0] // step))
+        if bucket is None:
+            # [n, somme lat, somme lon, n alt, somme alt, n vit, somme vit, batterie min, dernier ts]
+            bucket = buckets[int(sample[0] // step)] = [0, 0.0, 0.0, 0, 0.0, 0, 0.0, None, sample[0]]
+        bucket[0] += 1
+        bucket[1] += sample[1]
+        bucket[2] += sample[2]
+        if sample[3] == sample[3]:
+            bucket[3] += 1
+            bucket[4] += sample[3]
+        if sample[4] == sample[4]:
+            bucket[5] += 1
+            bucket[6] += sample[4]
+        if sample[5] == sample[5] and (bucket[7] is None or sample[5] < bucket[7]):
+            bucket[7] = sample[5]
+        if sample[0] > bucket[8]:
+            bucket[8] = sample[0]
+    return [
+        {
+            "ts": key * step,
+            "lat": n and sum_lat / n,
+            "lon": n and sum_lon / n,
+            "altitude": sum_alt / n_alt if n_alt else None,
+            "vitesse": sum_vit / n_vit if n_vit else None,
+            "batterie": batterie,
+            "echantillons": n,
+            "dernier_ts": last,
+        }
+        for key, (n, sum_lat, sum_lon, n_alt, sum_alt, n_vit, sum_vit, batterie, last) in sorted(buckets.items())
+    ]
+
+
+def _sample_dict(drone_id: int, sample: Tuple[float, ...]) -> dict:
+    values = dict(zip(FIELDS, sample))
+    for field in FIELDS[3:]:
+        if values[field] != values[field]:
+            values[field] = None
+    return {"drone_id": drone_id, **values}
+
+
+class TelemetryStore:
+    def __init__(self, capacity: int = TELEMETRY_BUFFER, interval: float = TELEMETRY_FLUSH,
+                 max_pending: int = TELEMETRY_MAX_PENDING, retention_days: int = TELEMETRY_RETENTION_DAYS):
+        self.capacity = capacity
+        self.interval = interval
+        self.max_pending = max_pending
+        self.retention_days = retention_days
+        self.buffers: Dict[int, RingBuffer] = {}
+        self.latest: Dict[int, Tuple[float, ...]] = {}
+        self.pending: deque = deque()  # (drone_id, échantillon) pas encore écrits
+        self.metadata = MetaData()
+        self.partitions: Optional[set] = None  # noms des partitions existantes, chargés au premier vidage
+        self.flush_lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+        self.started_at: Optional[float] = None
+        self.last_flush: Optional[float] = None
+        self.last_purge_day: Optional[int] = None
+
+    # --- ingestion ---
+
+    def add(self, drone_id: int, sample: Tuple[float, ...]):
+        buffer = self.buffers.get(drone_id)
+        if buffer is None:
+            buffer = self.buffers[drone_id] = RingBuffer(self.capacity)
+        buffer.append(sample)
+        latest = self.latest.get(drone_id)
+        # Un échantillon arrivé en retard ne remplace pas une position plus récente
+        if latest is None or sample[0] >= latest[0]:
+            self.latest[drone_id] = sample
+        self.pending.append((drone_id, sample))
+
+    def ingest(self, rows: list, source: str = "http") -> Tuple[int, List[dict]]:
+        """Ajoute les objets valides ; retourne le nombre accepté et les erreurs (index, message)"""
+        now = time.time()
+        accepted, errors = 0, []
+        for index, row in enumerate(rows):
+            try:
+                drone_id, sample = parse_sample(row, now)
+            except ValueError as error:
+                errors.append({"index": index, "errors": [{"msg": str(error)}]})
+                continue
+            self.add(drone_id, sample)
+            accepted += 1
+        overflow = len(self.pending) - self.max_pending
+        if overflow > 0:
+            # Base indisponible trop longtemps : on perd les plus anciens, pas la mémoire du processus
+            for _ in range(overflow):
+                self.pending.popleft()
+            samples_dropped.inc(amount=overflow)
+        if accepted:
+            samples_received.inc(source, amount=accepted)
+        if errors:
+            samples_rejected.inc(source, amount=len(errors))
+        pending_samples.set(len(self.pending))
+        return accepted, errors
+
+    # --- lecture ---
+
+    def position(self, drone_id: int) -> Optional[dict]:
+        sample = self.latest.get(drone_id)
+        return None if sample is None else _sample_dict(drone_id, sample)
+
+    def positions(self) -> List[dict]:
+        return [_sample_dict(drone_id, sample) for drone_id, sample in sorted(self.latest.items())]
+
+    def covers(self, drone_id: int, since: float) -> bool:
+        """Vrai si le tampon du drone contient toute la fenêtre commençant à `since`"""
+        buffer = self.buffers.get(drone_id)
+        if buffer is None or not buffer.size:
+            return False
+        if buffer.oldest_ts() <= since:
+            return True
+        # Tampon pas encore plein : il contient tout ce que le processus a reçu depuis son démarrage
+        return buffer.size < buffer.capacity and self.started_at is not None and self.started_at <= since
+
+    def recent(self, drone_id: int, since: float, until: float) -> List[Tuple[float, ...]]:
+        buffer = self.buffers.get(drone_id)
+        if buffer is None:
+            return []
+        return [sample for sample in buffer.samples() if since <= sample[0] < until]
+
+    async def history(self, drone_id: int, since: float, until: float, step: float) -> Tuple[str, List[dict]]:
+        """Série sous-échantillonnée sur [since, until[ ; source : memoire ou base"""
+        if self.covers(drone_id, since):
+            return "memoire", downsample(self.recent(drone_id, since, until), step)
+        await self.flush()
+        names = [name for name in self._partition_names(since, until) if name in self.partitions]
+        if not names:
+            return "base", []
+        parts = []
+        for name in names:
+            table = self._table(name)
+            parts.append(select(*table.c).where(table.c.drone_id == drone_id, table.c.ts >= since, table.c.ts < until))
+        rows = union_all(*parts).subquery()
+        bucket = func.floor(rows.c.ts / step)
+        query = (
+            select(
+                (bucket * step).label("ts"),
+                func.avg(rows.c.lat).label("lat"),
+                func.avg(rows.c.lon).label("lon"),
+                func.avg(rows.c.altitude).label("altitude"),
+                func.avg(rows.c.vitesse).label("vitesse"),
+                func.min(rows.c.batterie).label("batterie"),
+                func.count().label("echantillons"),
+                func.max(rows.c.ts).label("dernier_ts"),
+            )
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        async with async_read_engine.connect() as connection:
+            result = await connection.execute(query)
+            return "base", [dict(row) for row in result.mappings()]
+
+    def _table(self, name: str) -> Table:
+        table = self.metadata.tables.get(name)
+        return table if table is not None else partition_table(name, self.metadata)
+
+    @staticmethod
+    def _partition_names(since: float, until: float) -> List[str]:
+        first, last = int(since // DAY), int(max(since, until - 1e-6) // DAY)
+        return [_partition_name(day * DAY) for day in range(first, last + 1)]
+
+    # --- écriture ---
+
+    async def _load_partitions(self, connection):
+        result = await connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :prefix")
+            if connection.dialect.name == "sqlite" else
+            text("SELECT table_name FROM information_schema.tables WHERE table_name LIKE :prefix"),
+            {"prefix": PARTITION_PREFIX + "%"},
+        )
+        self.partitions = {row[0] for row in result}
+
+    async def flush(self) -> int:
+        """Écrit la file d'attente en un lot par partition ; retourne le nombre d'échantillons écrits"""
+        async with self.flush_lock:
+            if self.partitions is None:
+                async with async_read_engine.connect() as connection:
+                    await self._load_partitions(connection)
+            if not self.pending:
+                return 0
+            batch, self.pending = self.pending, deque()
+            start = time.perf_counter()
+            by_day: Dict[int, list] = {}
+            for drone_id, sample in batch:
+                rows = by_day.get(int(sample[0] // DAY))
+                if rows is None:
+                    rows = by_day[int(sample[0] // DAY)] = []
+                rows.append((
+                    drone_id, sample[0], sample[1], sample[2],
+                    None if sample[3] != sample[3] else sample[3],
+                    None if sample[4] != sample[4] else sample[4],
+                    None if sample[5] != sample[5] else sample[5],
+                ))
+            by_partition = {_partition_name(day * DAY): rows for day, rows in by_day.items()}
+
+            async def write(db):
+                connection = await db.connection()
+                for name, rows in by_partition.items():
+                    table = self._table(name)
+                    if name not in self.partitions:
+                        await connection.run_sync(table.create, checkfirst=True)
+                    await _insert_rows(connection, table, rows)
+
+            try:
+                await writer.submit(write)
+                self.partitions.update(by_partition)
+            except Exception:
+                # Remis en tête de file pour le prochain vidage
+                batch.extend(self.pending)
+                self.pending = batch
+                raise
+            flush_duration.observe(time.perf_counter() - start)
+            pending_samples.set(len(self.pending))
+            self.last_flush = time.time()
+            await self._purge()
+            return len(batch)
+
+    async def _purge(self):
+        """Supprime une fois par jour les partitions plus anciennes que la rétention"""
+        today = int(time.time() // DAY)
+        if not self.retention_days or self.last_purge_day == today:
+            return
+        self.last_purge_day = today
+        oldest = _partition_name((today - self.retention_days) * DAY)
+        expired = sorted(name for name in self.partitions if name < oldest)
+        if expired:
+            async def write(db):
+                for name in expired:
+                    await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+            await writer.submit(write)
+            self.partitions.difference_update(expired)
+            for name in expired:
+                table = self.metadata.tables.get(name)
+                if table is not None:
+                    self.metadata.remove(table)
+            logger.info("Partitions de télémétrie supprimées : %s", ", ".join(expired))
+
+    # --- cycle de vie ---
+
+    async def start(self):
+        self.started_at = time.time()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+            # Dernier vidage : rien de ce qui a été accepté n'est perdu à l'arrêt
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Échec du dernier vidage de la télémétrie")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Échec de l'écriture de la télémétrie")
+
+    def status(self) -> dict:
+        return {
+            "drones": len(self.latest),
+            "en_attente": len(self.pending),
+            "partitions": sorted(self.partitions or ()),
+            "dernier_vidage": self.last_flush,
+            "capacite_tampon": self.capacity,
+        }
+
+
+store = TelemetryStore()
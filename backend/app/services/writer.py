@@ -0,0 +1,156 @@
+"""
+File d'écriture à écrivain unique avec validation groupée (group commit).
+
+Toutes les écritures (routes, tours du planificateur, vidage de la télémétrie) soumettent
+une fonction `job(db)` qui modifie la session sans la valider. Une tâche asyncio unique
+dépile les jobs en attente (jusqu'à WRITE_BATCH, après au plus WRITE_BATCH_WAIT_MS
+d'attente) et les exécute dans une seule transaction, chacun dans son SAVEPOINT : un job
+en échec est annulé seul, les autres sont validés par un unique COMMIT, et `submit`
+relève l'exception du job (409, conflit de version). Les relectures après commit
+(événements, file du planificateur) passent par le moteur de lecture.
+
+Avec SQLite, une seule transaction d'écriture existe à la fois : sans file, chaque
+requête prend le verrou, écrit et valide à son tour, et les attentes se terminent en
+« database is locked ». Active par défaut en mode production SQLite (WRITE_QUEUE=auto) ;
+sinon `submit` exécute le job dans sa propre transaction.
+"""
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Optional, TypeVar
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import SQLITE_PRODUCTION, AsyncSessionLocal
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+WRITE_QUEUE = os.getenv("WRITE_QUEUE", "auto").strip().lower()
+WRITE_QUEUE_ENABLED = SQLITE_PRODUCTION if WRITE_QUEUE == "auto" else WRITE_QUEUE in ("1", "true", "yes", "on")
+WRITE_BATCH = int(os.getenv("WRITE_BATCH", "64"))  # jobs au plus par transaction
+WRITE_BATCH_WAIT_MS = float(os.getenv("WRITE_BATCH_WAIT_MS", "2"))  # attente des jobs suivants
+
+T = TypeVar("T")
+Job = Callable[[AsyncSession], Awaitable[T]]
+
+write_batches = metrics.registry.register(metrics.Histogram(
+    "write_queue_batch_size", "Jobs validés par transaction de la file d'écriture",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)))
+write_queue_depth = metrics.registry.register(metrics.Gauge(
+    "write_queue_depth", "Jobs en attente dans la file d'écriture"))
+write_failures = metrics.registry.register(metrics.Counter(
+    "write_queue_failures_total", "Jobs ou transactions en échec", ("cause",)))
+
+
+class WriteQueue:
+    def __init__(self, batch: int = WRITE_BATCH, wait_ms: float = WRITE_BATCH_WAIT_MS):
+        self.batch = batch
+        self.wait = wait_ms / 1000
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.commits = 0
+        self.jobs = 0
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None
+
+    async def submit(self, job: Job) -> T:
+        """
+        Exécute `job(db)` puis valide ; retourne son résultat ou relève son exception.
+        Le job ne doit pas appeler commit ni rollback, et rien de ce qu'il retourne ne doit
+        nécessiter de chargement paresseux : la session est fermée au retour.
+        """
+        if self.task is None:
+            async with AsyncSessionLocal() as db:
+                result = await job(db)
+                await db.commit()
+                return result
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((job, future))
+        write_queue_depth.set(self.queue.qsize())
+        return await future
+
+    def _drain(self, batch: list):
+        while len(batch) < self.batch:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            self._drain(batch)
+            if len(batch) < self.batch and self.wait > 0:
+                # Laisse aux requêtes concurrentes le temps de rejoindre la transaction
+                await asyncio.sleep(self.wait)
+                self._drain(batch)
+            write_queue_depth.set(self.queue.qsize())
+            try:
+                await self._commit(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _commit(self, batch: list):
+        outcomes = []
+        try:
+            async with AsyncSessionLocal() as db:
+                for job, future in batch:
+                    if future.cancelled():
+                        continue
+                    try:
+                        async with db.begin_nested():
+                            result = await job(db)
+                            await db.flush()
+                    except Exception as error:
+                        write_failures.inc("job")
+                        outcomes.append((future, None, error))
+                    else:
+                        outcomes.append((future, result, None))
+                await db.commit()
+        except Exception as error:
+            write_failures.inc("commit")
+            logger.exception("Échec de la validation d'un lot de %d écritures", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        self.commits += 1
+        self.jobs += len(outcomes)
+        write_batches.observe(len(outcomes))
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        task, self.task = self.task, None
+        # Les nouveaux jobs s'exécutent désormais seuls ; ceux déjà en file sont validés
+        await self.queue.join()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "depth": self.queue.qsize() if self.queue is not None else 0,
+            "commits": self.commits,
+            "jobs": self.jobs,
+            "jobs_per_commit": round(self.jobs / self.commits, 2) if self.commits else 0.0,
+        }
+
+
+writer = WriteQueue()
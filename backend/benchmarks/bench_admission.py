@@ -0,0 +1,149 @@
+"""
+Créations critiques sous une vague de lectures de tableaux de bord, sans puis avec le
+contrôle d'admission.
+
+    python -m benchmarks.bench_admission --readers 200 --duration 10 --json resultats.json
+
+`--readers` clients enchaînent les lectures de tableau de bord (statistiques, listes de
+missions et de drones) pendant que `--creators` clients créent des missions `critical`
+(une toutes les `--interval` secondes chacun). Chaque mode tourne dans son propre
+processus (la configuration est lue à l'import) sur une copie de la même base. On compare
+les latences des créations critiques, le débit des lectures et les requêtes délestées.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "sans": {"ADMISSION_ENABLED": "0"},
+    "avec": {"ADMISSION_ENABLED": "1"},
+}
+
+DASHBOARD = ("/api/stats/", "/api/missions/?limit=100", "/api/drones/?limit=100", "/api/stats/zones")
+
+CRITICAL = {
+    "title": "Évacuation", "category": "soins", "priority": "critical", "location": "Hôpital", "weight": 2,
+}
+
+
+def _percentiles(timings) -> dict:
+    if not timings:
+        return {}
+    timings = sorted(timings)
+    pick = lambda q: round(timings[min(int(len(timings) * q), len(timings) - 1)] * 1000, 2)  # noqa: E731
+    return {"p50_ms": round(statistics.median(timings) * 1000, 2), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+async def drive(duration: float, readers: int, creators: int, interval: float) -> dict:
+    import httpx
+    from app.main import app
+
+    created, reads = [], []
+    statuses = {"creation": Counter(), "lecture": Counter()}
+    deadline = time.perf_counter() + duration
+
+    async def reader(client: httpx.AsyncClient, index: int):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get(DASHBOARD[index % len(DASHBOARD)])
+            statuses["lecture"][response.status_code] += 1
+            if response.status_code == 200:
+                reads.append(time.perf_counter() - start)
+            else:
+                # Client délesté : il patiente comme le demande Retry-After (raccourci ici)
+                await asyncio.sleep(0.05)
+            index += 1
+
+    async def creator(client: httpx.AsyncClient):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.post("/api/missions/", json=CRITICAL)
+            statuses["creation"][response.status_code] += 1
+            if response.status_code == 201:
+                created.append(time.perf_counter() - start)
+            await asyncio.sleep(interval)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            await asyncio.gather(
+                *(reader(client, index) for index in range(readers)),
+                *(creator(client) for _ in range(creators)),
+            )
+    return {
+        "creations": created, "lectures": reads,
+        "statuts": {name: dict(counter) for name, counter in statuses.items()},
+    }
+
+
+def run_mode(name: str, source: str, directory: str, args) -> dict:
+    path = os.path.join(directory, f"{name}.db")
+    shutil.copy(source, path)
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", SCHEDULER_ENABLED="0", **MODES[name])
+    command = [
+        sys.executable, "-m", "benchmarks.bench_admission", "--worker", "--duration", str(args.duration),
+        "--readers", str(args.readers), "--creators", str(args.creators), "--interval", str(args.interval),
+    ]
+    output = json.loads(subprocess.run(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, text=True,
+                                       check=True).stdout)
+    return {
+        "mode": name,
+        "creations_critiques": len(output["creations"]),
+        "creations": _percentiles(output["creations"]),
+        "lectures_s": round(len(output["lectures"]) / args.duration, 1),
+        "lectures": _percentiles(output["lectures"]),
+        "statuts": output["statuts"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="volume de la base initiale")
+    parser.add_argument("--readers", type=int, default=200, help="clients de tableau de bord")
+    parser.add_argument("--creators", type=int, default=4, help="clients créant des missions critiques")
+    parser.add_argument("--interval", type=float, default=0.1, help="pause entre deux créations (s)")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(drive(args.duration, args.readers, args.creators, args.interval))))
+        return
+
+    directory = tempfile.mkdtemp()
+    source = os.path.join(directory, "source.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{source}"
+    # L'application lit DATABASE_URL à l'import : imports après la configuration
+    from sqlalchemy import create_engine
+    from app import migrations
+    from benchmarks.seed import seed
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    migrations.upgrade(engine)
+    seed(engine, rows=args.rows)
+    engine.dispose()
+
+    results = []
+    for name in args.modes:
+        result = run_mode(name, source, directory, args)
+        print(result)
+        results.append(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Écrivains concurrents sur les mêmes missions : lecture puis PATCH sans contrôle, avec
+If-Match (relecture et nouvel essai sur 409, après une attente aléatoire) et sous un
+verrou global.
+
+    python -m benchmarks.bench_concurrency --writers 32 --increments 20 --think 0.02 --hot 1 10 100 --json resultats.json
+
+Chaque écrivain lit une mission tirée parmi les `--hot` premières, puis écrit
+`estimated_duration + 1` : la somme doit augmenter du nombre d'incréments. L'écart compte
+les mises à jour perdues. Entre lecture et écriture, l'écrivain « réfléchit » `--think`
+secondes (réseau, logique du répartiteur). Le mode `verrou` sérialise lecture, réflexion et
+écriture (équivalent d'un verrou de table) : il ne perd rien mais n'admet qu'un écrivain à
+la fois. La base tourne en mode production SQLite (WAL, file d'écriture).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+MODES = ("sans", "if-match", "verrou")
+
+
+def _percentiles(timings) -> dict:
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 2),
+        "p95_ms": round(timings[min(int(len(timings) * 0.95), len(timings) - 1)] * 1000, 2),
+    }
+
+
+async def total_duration(client, hot: int) -> int:
+    total = 0
+    for mission_id in range(1, hot + 1):
+        total += (await client.get(f"/api/missions/{mission_id}")).json()["estimated_duration"]
+    return total
+
+
+async def run_mode(client, mode: str, hot: int, writers: int, increments: int, think: float) -> dict:
+    initial = await total_duration(client, hot)
+    lock = asyncio.Lock()
+    timings, conflicts = [], 0
+
+    async def increment(mission_id: int, rng: random.Random):
+        nonlocal conflicts
+        for attempt in range(1, 1000):
+            response = await client.get(f"/api/missions/{mission_id}")
+            headers = {"If-Match": response.headers["ETag"]} if mode == "if-match" else {}
+            value = response.json()["estimated_duration"] + 1
+            await asyncio.sleep(think)
+            response = await client.patch(f"/api/missions/{mission_id}", json={"estimated_duration": value},
+                                          headers=headers)
+            if response.status_code != 409:
+                response.raise_for_status()
+                return
+            conflicts += 1
+            # Attente aléatoire croissante : sans elle, les perdants se percutent à nouveau
+            await asyncio.sleep(rng.uniform(0, 0.002 * min(attempt, 50)))
+        raise RuntimeError("trop de conflits")
+
+    async def writer(rng: random.Random):
+        for _ in range(increments):
+            mission_id = rng.randint(1, hot)
+            start = time.perf_counter()
+            if mode == "verrou":
+                async with lock:
+                    await increment(mission_id, rng)
+            else:
+                await increment(mission_id, rng)
+            timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(random.Random(index)) for index in range(writers)))
+    elapsed = time.perf_counter() - start
+
+    expected = writers * increments
+    return {
+        "mode": mode,
+        "hot": hot,
+        "increments_s": round(expected / elapsed, 1),
+        "perdus": expected - (await total_duration(client, hot) - initial),
+        "conflits_409": conflicts,
+        **_percentiles(timings),
+    }
+
+
+async def drive(args) -> list:
+    import httpx
+    from app.main import app
+
+    results = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for hot in args.hot:
+                for mode in args.modes:
+                    result = await run_mode(client, mode, hot, args.writers, args.increments, args.think)
+                    print(result)
+                    results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="volume de la base initiale")
+    parser.add_argument("--writers", type=int, default=32, help="écrivains concurrents")
+    parser.add_argument("--increments", type=int, default=20, help="incréments par écrivain")
+    parser.add_argument("--think", type=float, default=0.02, help="délai client entre lecture et écriture (s)")
+    parser.add_argument("--hot", type=int, nargs="+", default=[1, 10, 100], help="missions disputées")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_concurrency.db')}"
+    os.environ["SCHEDULER_ENABLED"] = "0"
+    # Le mode SQLite par défaut échoue en « database is locked » avec autant d'écrivains
+    os.environ.setdefault("SQLITE_PRODUCTION", "1")
+    os.environ.setdefault("SLOW_QUERY_MS", "60000")
+    # L'application lit DATABASE_URL à l'import : imports après la configuration
+    from sqlalchemy import create_engine
+    from app import migrations
+    from benchmarks.seed import seed
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    migrations.upgrade(engine)
+    seed(engine, rows=max(args.rows, max(args.hot)))
+    engine.dispose()
+
+    results = asyncio.run(drive(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Compare la recherche du drone le plus ajusté avec l'index d'éligibilité (ensembles de bits)
+et avec l'ancienne méthode : analyse des zones autorisées de tous les drones disponibles à
+chaque requête, puis parcours.
+
+    python -m benchmarks.bench_eligibility --drones 100000 --zones 1000 --json resultats.json
+
+La flotte est synthétique et tenue en mémoire : la lecture des drones disponibles en base,
+commune aux deux méthodes, n'est pas mesurée (l'ancienne méthode lisait en plus toutes
+leurs colonnes). Les requêtes combinent zone, charge, niveau de sécurité et distance.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+
+def fleet(rng, drones: int, zones: int) -> list:
+    return [
+        (
+            drone_id,
+            round(rng.uniform(0.5, 25), 1),
+            round(rng.uniform(5, 120), 1),
+            round(rng.uniform(30, 150), 1),
+            rng.randint(1, 5),
+            None if rng.random() < 0.1 else ", ".join(f"Zone {rng.randint(1, zones)}" for _ in range(3)),
+        )
+        for drone_id in range(1, drones + 1)
+    ]
+
+
+def requests(rng, count: int, zones: int) -> list:
+    from app.services.eligibility import normalise
+
+    return [
+        {
+            "weight": rng.choice([0, 2, 5, 10, 20]),
+            "niveau_securite": rng.randint(1, 5),
+            "duree": rng.uniform(5, 60),
+            "distance": rng.choice([None, 10.0, 40.0, 80.0]),
+            "zone": normalise(f"Zone {rng.randint(1, zones)}"),
+        }
+        for _ in range(count)
+    ]
+
+
+def scan(rows, requirement):
+    """Ancienne méthode : candidats reconstruits à chaque requête, plus ajusté retenu"""
+    from app.services.eligibility import DroneCandidate
+
+    best = None
+    for row in rows:
+        candidate = DroneCandidate(*row)
+        if candidate.poids_max < requirement["weight"] or candidate.niveau_securite < requirement["niveau_securite"]:
+            continue
+        if not candidate.can_fly(requirement["duree"], requirement["distance"], requirement["zone"]):
+            continue
+        if best is None or candidate.fit_key < best.fit_key:
+            best = candidate
+    return best
+
+
+def _timings(timings) -> dict:
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[min(int(len(timings) * 0.95), len(timings) - 1)] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=100_000)
+    parser.add_argument("--zones", type=int, default=1000)
+    parser.add_argument("--available", type=float, default=0.5, help="part des drones disponibles")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    from app.services.assignment import DroneIndex
+    from app.services.eligibility import DroneCandidate, EligibilityIndex
+
+    rng = random.Random(0)
+    rows = fleet(rng, args.drones, args.zones)
+    available = [row for row in rows if rng.random() < args.available]
+    available_ids = [row[0] for row in available]
+    queries = requests(rng, args.queries, args.zones)
+    results = {"drones": args.drones, "zones": args.zones, "disponibles": len(available), "requetes": args.queries}
+
+    start = time.perf_counter()
+    index = EligibilityIndex()
+    index.load(DroneCandidate(*row) for row in rows)
+    index.candidates(weight=1, niveau_securite=2, distance=1.0)  # unions de suffixes
+    results["construction_index_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    start = time.perf_counter()
+    for row in rows[:1000]:
+        index.upsert_drone(DroneCandidate(*row))
+    results["mise_a_jour_drone_us"] = round((time.perf_counter() - start) / 1000 * 1e6, 1)
+
+    baseline, indexed, lookups = [], [], []
+    for requirement in queries:
+        start = time.perf_counter()
+        expected = scan(available, requirement)
+        baseline.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        drones = DroneIndex(index, index.bits_of(available_ids))
+        found = drones.find(**requirement)
+        indexed.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        drones.find(**requirement)
+        lookups.append(time.perf_counter() - start)
+        assert (found and found.drone_id) == (expected and expected.drone_id), requirement
+
+    results["parcours"] = _timings(baseline)
+    results["index"] = _timings(indexed)
+    results["index_sans_masque_disponibles"] = _timings(lookups)
+    results["acceleration"] = round(statistics.median(baseline) / statistics.median(indexed), 1)
+    print(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Mesure la mémoire et le débit de l'export en flux de l'historique.
+
+    python -m benchmarks.bench_export --rows 200000 --json resultats.json
+
+La base est remplie une fois avec `--rows` enregistrements ; chaque export porte sur une
+fraction croissante de la table. Pour chaque format, le pic de mémoire Python (tracemalloc)
+pendant la lecture du flux doit rester à peu près constant, là où le chargement complet
+de la même requête en liste croît avec le volume.
+
+Le flux est lu directement (export.stream) : httpx.ASGITransport accumule le corps
+entier avant de le rendre et fausserait la mesure de mémoire.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+FRACTIONS = (0.1, 0.5, 1.0)
+
+
+def _measure(result: dict, start: float) -> dict:
+    result["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    result["pic_memoire_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+    tracemalloc.stop()
+    return result
+
+
+async def run(rows: int, formats) -> list:
+    from app.database import AsyncSessionLocal
+    from app.services import export, fastjson
+
+    results = []
+    for fraction in FRACTIONS:
+        query = export.build_query().limit(int(rows * fraction))
+        for format in formats:
+            tracemalloc.start()
+            start = time.perf_counter()
+            size = 0
+            async for chunk in export.stream(format, query):
+                size += len(chunk)
+            results.append(_measure({"lignes": int(rows * fraction), "format": format, "octets": size}, start))
+
+        # Référence : la même requête chargée entièrement en liste
+        tracemalloc.start()
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            size = len(fastjson.dumps(await fastjson.fetch(db, query)))
+        results.append(_measure({"lignes": int(rows * fraction), "format": "liste complète", "octets": size}, start))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="enregistrements d'historique")
+    parser.add_argument("--formats", nargs="+", default=["ndjson", "csv", "colonnes"])
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_export.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    # L'application lit DATABASE_URL à l'import : imports après la configuration
+    from sqlalchemy import create_engine
+    from app import migrations
+    from benchmarks.seed import seed
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    migrations.upgrade(engine)
+    seed(engine, rows=args.rows)
+
+    results = asyncio.run(run(args.rows, args.formats))
+    for result in results:
+        print(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Mesure l'effet des index secondaires (migration 3) sur les requêtes des routes.
+
+    python -m benchmarks.bench_indexes --rows 1000000 --json resultats.json
+
+La base SQLite est remplie, puis chaque requête est chronométrée et son plan
+(EXPLAIN QUERY PLAN) relevé sans les index, puis avec.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from sqlalchemy import create_engine, select, text
+from app import migrations
+from app.models import Drone, HistoriqueMission, Mission, ZoneDeVol
+from benchmarks.seed import seed
+
+missions = Mission.__table__
+drones = Drone.__table__
+zones = ZoneDeVol.__table__
+historique = HistoriqueMission.__table__
+
+# Requêtes équivalentes à celles émises par les routes
+QUERIES = {
+    "missions par statut": select(missions).where(missions.c.status == "pending"),
+    "file d'attribution": select(missions)
+    .where(missions.c.status == "pending")
+    .order_by(missions.c.priority, missions.c.created_at)
+    .limit(100),
+    "missions par catégorie": select(missions).where(missions.c.category == "soins").limit(1000),
+    "drones disponibles": select(drones).where(drones.c.statut == "disponible"),
+    "zones par risque": select(zones).where(zones.c.risque == 5),
+    "historique d'un drone": select(historique)
+    .where(historique.c.drone_id == 42)
+    .order_by(historique.c.date),
+    "historique d'une mission": select(historique).where(historique.c.mission_id == 4242),
+}
+
+
+def query_plan(connection, query) -> list:
+    sql = str(query.compile(connection, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def time_query(connection, query, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        connection.execute(query).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings)}
+
+
+def measure(engine, repeat: int) -> dict:
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+        return {
+            name: {"plan": query_plan(connection, query), **time_query(connection, query, repeat)}
+            for name, query in QUERIES.items()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="nombre de missions et d'entrées d'historique")
+    parser.add_argument("--repeat", type=int, default=10, help="exécutions par requête")
+    parser.add_argument("--db", help="fichier SQLite à utiliser (temporaire par défaut)")
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench_indexes.db")
+    engine = create_engine(f"sqlite:///{path}")
+    migrations.upgrade(engine)
+
+    start = time.perf_counter()
+    sizes = seed(engine, rows=args.rows)
+    print(f"Base remplie en {time.perf_counter() - start:.1f} s : {sizes}")
+
+    with engine.begin() as connection:
+        migrations.drop_indexes(connection)
+    before = measure(engine, args.repeat)
+
+    with engine.begin() as connection:
+        migrations.create_indexes(connection)
+    after = measure(engine, args.repeat)
+
+    print(f"{'requête':<28}{'sans index':>14}{'avec index':>14}{'gain':>10}")
+    for name in QUERIES:
+        speedup = before[name]["median_ms"] / max(after[name]["median_ms"], 1e-6)
+        print(f"{name:<28}{before[name]['median_ms']:>11.2f} ms{after[name]['median_ms']:>11.2f} ms{speedup:>9.1f}x")
+        print(f"    sans : {' / '.join(before[name]['plan'])}")
+        print(f"    avec : {' / '.join(after[name]['plan'])}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump({"rows": sizes, "before": before, "after": after}, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Mesure les statistiques de performance par drone : lecture de la ligne cumulée contre
+agrégation de l'historique à la lecture, et surcoût des triggers à l'écriture.
+
+    python -m benchmarks.bench_rollups --rows 1000000 --json resultats.json
+
+La base est migrée puis remplie par benchmarks.seed : les statistiques sont tenues à jour
+par les triggers pendant le remplissage. On compare pour des drones au hasard :
+- la route GET /api/stats/drones/{id} (recherche par clé primaire) ;
+- GET /api/historique/drone/{id}, que le frontend agrégeait lui-même ;
+- pour les drones et les zones, la lecture de la ligne cumulée et le calcul de la même
+  réponse depuis l'historique (repli hors SQLite).
+Puis des INSERT d'historique avec et sans les triggers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def _ms(timings) -> float:
+    return round(statistics.median(timings) * 1000, 3)
+
+
+async def run(repeat: int, inserts: int) -> dict:
+    import httpx
+    from sqlalchemy import func, select, text
+    from app.database import AsyncSessionLocal
+    from app.main import app
+    from app.models import Drone, ZoneDeVol
+    from app.services import rollups
+
+    async with AsyncSessionLocal() as db:
+        drones = (await db.execute(select(func.max(Drone.drone_id)))).scalar()
+    rng = random.Random(0)
+    ids = [rng.randint(1, drones) for _ in range(repeat)]
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, url in (("statistiques", "/api/stats/drones/{}"), ("historique_brut", "/api/historique/drone/{}")):
+            timings, size = [], 0
+            for drone_id in ids:
+                start = time.perf_counter()
+                response = await client.get(url.format(drone_id))
+                timings.append(time.perf_counter() - start)
+                size += len(response.content)
+            results[f"{label}_ms"] = _ms(timings)
+            results[f"{label}_octets"] = size // len(ids)
+
+    # Service seul, sans HTTP : ligne cumulée contre agrégation de l'historique de la clé
+    async with AsyncSessionLocal() as db:
+        zones = (await db.execute(select(func.max(ZoneDeVol.zone_id)))).scalar()
+        zone_ids = [rng.randint(1, zones) for _ in range(repeat)]
+        for maintained, label in ((True, "ligne_cumulee"), (False, "agregation_a_la_lecture")):
+            rollups._maintained = maintained
+            for kind, get, keys in (("drone", rollups.get_drone, ids), ("zone", rollups.get_zone, zone_ids)):
+                timings = []
+                for key in keys:
+                    start = time.perf_counter()
+                    await get(db, key)
+                    timings.append(time.perf_counter() - start)
+                results[f"{kind}_{label}_ms"] = _ms(timings)
+        rollups._maintained = None
+
+    # Écritures : INSERT d'historique avec les triggers, puis sans
+    insert = text(
+        "INSERT INTO historique_missions (mission_id, drone_id, date, performance) "
+        "VALUES (:mission_id, :drone_id, CURRENT_TIMESTAMP, 'réussie')"
+    )
+    for label in ("avec_triggers", "sans_triggers"):
+        async with AsyncSessionLocal() as db:
+            if label == "sans_triggers":
+                for name in rollups.TRIGGERS:
+                    await db.execute(text(f"DROP TRIGGER {name}"))
+            start = time.perf_counter()
+            for _ in range(inserts):
+                await db.execute(insert, {"mission_id": rng.randint(1, 1000), "drone_id": rng.randint(1, drones)})
+            elapsed = time.perf_counter() - start
+            await db.rollback()
+        results[f"insert_{label}_us"] = round(elapsed / inserts * 1e6, 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="missions (et enregistrements d'historique)")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--inserts", type=int, default=5000)
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_rollups.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["SCHEDULER_ENABLED"] = "0"
+    # L'application lit DATABASE_URL à l'import : imports après la configuration
+    from sqlalchemy import create_engine
+    from app import migrations
+    from benchmarks.seed import seed
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    migrations.upgrade(engine)
+    seed(engine, rows=args.rows)
+
+    results = asyncio.run(run(args.repeat, args.inserts))
+    print(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
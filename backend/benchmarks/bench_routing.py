@@ -0,0 +1,81 @@
+"""
+Mesure la planification de trajets (A*) sur une carte de zones aléatoires.
+
+    python -m benchmarks.bench_routing --zones 1000 --routes 500 --json resultats.json
+
+Les zones sont des carrés de 200 m à 2 km répartis sur un carré de `--extent` degrés ;
+une part `--interdites` d'entre elles est infranchissable. Chaque trajet est calculé
+une première fois (cache vide) puis redemandé (cache chaud).
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from app.services.routing import NoRouteError, RoutePlanner
+from app.services.spatial import ZoneIndex
+
+ORIGINE = (48.75, 2.25)
+
+
+def build_index(zones: int, extent: float, forbidden: float, rng: random.Random) -> ZoneIndex:
+    index = ZoneIndex()
+    for zone_id in range(zones):
+        lat = ORIGINE[0] + rng.random() * extent
+        lon = ORIGINE[1] + rng.random() * extent
+        size = rng.uniform(0.002, 0.02)
+        risque = 5 if rng.random() < forbidden else rng.randint(1, 4)
+        polygon = [[lat, lon], [lat + size, lon], [lat + size, lon + size], [lat, lon + size]]
+        index.upsert(zone_id, polygon, {"zone_id": zone_id, "risque": risque, "restrictions": None})
+    return index
+
+
+def percentiles(timings: list) -> dict:
+    timings = sorted(timings)
+    return {
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[int(len(timings) * 0.95)],
+        "p99_ms": timings[int(len(timings) * 0.99)],
+        "max_ms": timings[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zones", type=int, default=1000, help="nombre de zones")
+    parser.add_argument("--routes", type=int, default=500, help="nombre de trajets calculés")
+    parser.add_argument("--extent", type=float, default=0.2, help="côté de la carte en degrés (0.2 ≈ 20 km)")
+    parser.add_argument("--interdites", type=float, default=0.05, help="part des zones interdites")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = build_index(args.zones, args.extent, args.interdites, rng)
+    planner = RoutePlanner(index)
+    pairs = [
+        tuple((ORIGINE[0] + rng.random() * args.extent, ORIGINE[1] + rng.random() * args.extent) for _ in range(2))
+        for _ in range(args.routes)
+    ]
+
+    results = {}
+    for phase in ("cache vide", "cache chaud"):
+        timings, failures = [], 0
+        for departure, arrival in pairs:
+            start = time.perf_counter()
+            try:
+                planner.plan(departure, arrival)
+            except NoRouteError:
+                failures += 1
+            timings.append((time.perf_counter() - start) * 1000)
+        results[phase] = {**percentiles(timings), "sans_trajet": failures}
+        print(f"{phase:<12} p50 {results[phase]['p50_ms']:7.2f} ms  p95 {results[phase]['p95_ms']:7.2f} ms  "
+              f"p99 {results[phase]['p99_ms']:7.2f} ms  sans trajet : {failures}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump({"parametres": vars(args), "resultats": results}, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
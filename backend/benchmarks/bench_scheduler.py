@@ -0,0 +1,99 @@
+"""
+Mesure le planificateur d'attribution : reconstruction de la file, opérations du tas et tour
+d'attribution, comparés à la relecture de la table des missions en attente à chaque tour.
+
+    python -m benchmarks.bench_scheduler --rows 100000 --json resultats.json
+
+La base est remplie par benchmarks.seed (une part des missions est en attente) ; aucun
+drone n'est disponible pendant les mesures de tour, qui portent donc sur le coût fixe
+d'un tour à vide : dépilement des missions prêtes contre SELECT des missions en attente.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+async def run(repeat: int) -> dict:
+    from sqlalchemy import update
+    from app.database import AsyncSessionLocal
+    from app.models import Drone, StatutDrone
+    from app.services import assignment
+    from app.services.scheduler import MissionQueue, QueuedMission, Scheduler
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Drone).values(statut=StatutDrone.EN_MAINTENANCE.value))
+        await db.commit()
+
+    scheduler = Scheduler()
+    start = time.perf_counter()
+    await scheduler.rebuild()
+    results = {"file": len(scheduler.queue), "reconstruction_ms": _ms(time.perf_counter() - start)}
+
+    # push puis pop de missions aléatoires dans une file déjà pleine
+    entries = list(scheduler.queue.entries.values())
+    rng = random.Random(0)
+    queue = MissionQueue()
+    queue.rebuild(entries)
+    samples = [QueuedMission.of(entry) for entry in rng.sample(entries, min(10_000, len(entries)))]
+    start = time.perf_counter()
+    for entry in samples:
+        queue.push(entry)
+    push = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in samples:
+        queue.pop()
+    pop = time.perf_counter() - start
+    results["push_us"] = round(push / len(samples) * 1e6, 3)
+    results["pop_us"] = round(pop / len(samples) * 1e6, 3)
+
+    # Tour à vide du planificateur (aucun drone disponible) contre relecture des missions en attente
+    ticks, queries = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await scheduler.dispatch()
+        ticks.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            (await db.execute(assignment.pending_missions_query())).scalars().all()
+        queries.append(time.perf_counter() - start)
+    results["tour_planificateur_ms"] = _ms(statistics.median(ticks))
+    results["relecture_en_attente_ms"] = _ms(statistics.median(queries))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="volume de missions")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_scheduler.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    # L'application lit DATABASE_URL à l'import : imports après la configuration
+    from sqlalchemy import create_engine
+    from app import migrations
+    from benchmarks.seed import seed
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    migrations.upgrade(engine)
+    seed(engine, rows=args.rows)
+
+    results = asyncio.run(run(args.repeat))
+    print(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Mesure la latence de la recherche plein texte (/api/search) : index FTS5 contre LIKE.
+
+    python -m benchmarks.bench_search --rows 1000000 --json resultats.json
+
+La base est migrée (index FTS5 et triggers) puis remplie par benchmarks.seed : l'index est
+donc alimenté par les triggers, comme en production. Chaque requête est exécutée `--repeat`
+fois avec chaque moteur ; le moteur LIKE, qui parcourt la table, est limité à `--like-repeat`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+# Le vocabulaire de benchmarks.seed est petit : chacun de ses mots apparaît dans environ
+# 12 % des documents, le pire cas pour BM25 (fréquence documentaire parcourue en entier).
+# Les numéros (titre, secteur) sont des termes sélectifs, plus proches d'une recherche réelle.
+QUERIES = (
+    "123456",  # numéro dans le titre
+    "417",  # numéro de secteur, en préfixe
+    "medic",  # préfixe courant
+    "hopital secu",  # deux préfixes, sans accents
+    "pont inondée",
+    "vaccins nord",
+    "zone interdite",
+    "défibrillateur oxygène thermique",  # mots rares ensemble
+    "météo",  # commentaires de l'historique
+)
+
+
+def _summary(timings) -> dict:
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[min(int(len(timings) * 0.95), len(timings) - 1)] * 1000, 3),
+    }
+
+
+async def run(repeat: int, like_repeat: int, limit: int) -> dict:
+    from app.database import AsyncSessionLocal
+    from app.services import search
+
+    backends = {"fts5": (search.Fts5Backend(), repeat), "like": (search.LikeBackend(), like_repeat)}
+    results = {}
+    async with AsyncSessionLocal() as db:
+        for query in QUERIES:
+            results[query] = {}
+            for name, (backend, count) in backends.items():
+                timings = []
+                for _ in range(count):
+                    start = time.perf_counter()
+                    hits = await backend.search(db, query, search.KINDS, limit)
+                    timings.append(time.perf_counter() - start)
+                results[query][name] = {"resultats": len(hits), **_summary(timings)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="missions (et enregistrements d'historique)")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--like-repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=20, help="k des top-k")
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_search.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    # L'application lit DATABASE_URL à l'import : imports après la configuration
+    from sqlalchemy import create_engine
+    from app import migrations
+    from benchmarks.seed import seed
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    migrations.upgrade(engine)
+    start = time.perf_counter()
+    seed(engine, rows=args.rows)
+    print(f"base remplie (index FTS5 par triggers) en {time.perf_counter() - start:.1f} s")
+
+    results = asyncio.run(run(args.repeat, args.like_repeat, args.limit))
+    for query, result in results.items():
+        print(f"{query!r:<38} {result}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
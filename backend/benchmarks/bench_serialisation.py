@@ -0,0 +1,108 @@
+"""
+Compare la sérialisation des listes : objets ORM validés par Pydantic contre colonnes encodées par orjson.
+
+    python -m benchmarks.bench_serialisation --rows 5000 --json resultats.json
+
+- « ORM + Pydantic » : le chemin d'origine des routes de liste (select(Mission), puis
+  validation from_attributes de chaque objet par MissionResponse et encodage JSON, comme FastAPI) ;
+- « colonnes + orjson » : fastjson.select_schema puis orjson.
+
+Les deux corps produits sont comparés : ils doivent être identiques.
+Une mesure de bout en bout (GET /api/missions/?limit=N via ASGI) complète le tableau.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+
+def _median_ms(timings) -> float:
+    return round(statistics.median(timings) * 1000, 3)
+
+
+async def run(rows: int, repeat: int) -> dict:
+    import httpx
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.main import app
+    from app.models import Drone, Mission
+    from app.schemas import DroneResponse, MissionResponse
+    from app.services import fastjson
+
+    cases = {
+        "missions": (Mission, MissionResponse, rows),
+        "drones": (Drone, DroneResponse, None),
+    }
+    results = {}
+    async with AsyncSessionLocal() as db:
+        for name, (model, schema, limit) in cases.items():
+            adapter = TypeAdapter(List[schema])
+            orm_timings, fast_timings = [], []
+            for _ in range(repeat):
+                # Objets détachés à chaque tour : l'ORM les recharge entièrement
+                db.expunge_all()
+                start = time.perf_counter()
+                objects = (await db.execute(select(model).limit(limit))).scalars().all()
+                validated = adapter.validate_python(objects, from_attributes=True)
+                # Ce que fait FastAPI : validation, dump en mode JSON, puis json.dumps (JSONResponse)
+                orm_body = json.dumps(
+                    adapter.dump_python(validated, mode="json"), ensure_ascii=False, separators=(",", ":")
+                ).encode()
+                orm_timings.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                fast_body = fastjson.dumps(await fastjson.fetch(db, fastjson.select_schema(schema, model).limit(limit)))
+                fast_timings.append(time.perf_counter() - start)
+
+            results[name] = {
+                "rows": len(objects),
+                "orm_pydantic_ms": _median_ms(orm_timings),
+                "colonnes_orjson_ms": _median_ms(fast_timings),
+                "gain": round(statistics.median(orm_timings) / statistics.median(fast_timings), 1),
+                "corps_identiques": json.loads(orm_body) == json.loads(fast_body),
+            }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await client.get("/api/missions/", params={"limit": rows})
+            timings.append(time.perf_counter() - start)
+        results["GET /api/missions/ (ASGI)"] = {"rows": len(response.json()), "ms": _median_ms(timings)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="lignes par liste")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_serialisation.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    # L'application lit DATABASE_URL à l'import : imports après la configuration
+    from sqlalchemy import create_engine
+    from app import migrations
+    from benchmarks.seed import seed
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    migrations.upgrade(engine)
+    seed(engine, rows=max(args.rows, 10_000))
+
+    results = asyncio.run(run(args.rows, args.repeat))
+    for name, result in results.items():
+        print(name, result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
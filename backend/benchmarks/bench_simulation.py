@@ -0,0 +1,81 @@
+"""
+Mesure le simulateur de capacité de la flotte : tirages Monte-Carlo vectorisés (NumPy),
+sur un processus puis sur un pool, comparés à une simulation objet par objet en Python.
+
+    python -m benchmarks.bench_simulation --drones 500 --missions 200 --runs 10000 --json resultats.json
+
+La flotte (vitesses, autonomies, charges) et le catalogue de missions sont synthétiques :
+le coût ne dépend que des dimensions (tirages × missions × drones). La version Python
+n'est mesurée que sur `--python-runs` tirages, puis ramenée au même nombre de tirages.
+"""
+import argparse
+import json
+import os
+import time
+
+
+def python_reference(fleet, catalog, missions: int, runs: int, seed: int) -> float:
+    """Même modèle, une boucle par tirage, par mission et par drone ; retourne la durée"""
+    import random
+    from app.services.simulation import MANUTENTION, RECHARGE_RATIO
+
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(runs):
+        free = [0.0] * len(fleet)
+        for _ in range(missions):
+            poids, distance = catalog[rng.randrange(len(catalog))]
+            best, best_done = None, float("inf")
+            for index, (vitesse, autonomie, poids_max) in enumerate(fleet):
+                if poids > poids_max or 2 * distance > autonomie:
+                    continue
+                done = free[index] + distance / vitesse * 60 + MANUTENTION
+                if done < best_done:
+                    best, best_done = index, done
+            if best is not None:
+                vitesse = fleet[best][0]
+                free[best] += 2 * distance / vitesse * 60 * (1 + RECHARGE_RATIO) + MANUTENTION
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=500)
+    parser.add_argument("--missions", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processus du second passage")
+    parser.add_argument("--python-runs", type=int, default=5, help="tirages mesurés en Python pur")
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    import numpy as np
+    from app.services import simulation
+
+    rng = np.random.default_rng(0)
+    fleet = list(zip(
+        rng.uniform(40, 90, args.drones).tolist(),  # vitesse_max (km/h)
+        rng.uniform(10, 60, args.drones).tolist(),  # autonomie_max (km)
+        rng.uniform(2, 25, args.drones).tolist(),  # poids_max (kg)
+    ))
+    catalog = simulation.synthetic_catalog(seed=0)
+    results = {"drones": args.drones, "missions": args.missions, "runs": args.runs}
+
+    for label, workers in (("numpy_1_processus", 1), (f"numpy_{args.workers}_processus", args.workers)):
+        if label + "_s" in results:
+            continue
+        start = time.perf_counter()
+        outcome = simulation.run(fleet, catalog, args.missions, delai=60.0, runs=args.runs, seed=0, workers=workers)
+        results[label + "_s"] = round(time.perf_counter() - start, 3)
+        results["taux_reussite"] = outcome["resultats"][0]["taux_reussite"]
+
+    elapsed = python_reference(fleet, catalog, args.missions, args.python_runs, seed=0)
+    results["python_estime_s"] = round(elapsed / args.python_runs * args.runs, 1)
+    results["acceleration"] = round(results["python_estime_s"] / results["numpy_1_processus_s"], 1)
+    print(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Écritures concurrentes sur SQLite : mode par défaut, WAL seul et mode production complet
+(WAL, pragmas, moteurs séparés et file d'écriture à validation groupée).
+
+    python -m benchmarks.bench_sqlite_writes --processes 4 --concurrency 32 --duration 10 --json resultats.json
+
+Pour chaque mode, une copie de la même base remplie est attaquée par `--processes`
+processus (comme des workers uvicorn) ; chacun fait tourner l'application en ASGI avec
+`--concurrency` clients qui alternent créations de missions et d'historique, plus une
+part `--reads` de lectures de la liste des missions. On compte les écritures réussies
+par seconde, leurs latences et les erreurs (« database is locked » : réponses 500).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "defaut": {"SQLITE_PRODUCTION": "0"},
+    "wal": {"SQLITE_PRODUCTION": "1", "WRITE_QUEUE": "0"},
+    "production": {"SQLITE_PRODUCTION": "1", "WRITE_QUEUE": "1"},
+}
+
+
+def _mission(rng: random.Random) -> dict:
+    return {
+        "title": f"Écriture {rng.randint(1, 10**9)}",
+        "category": rng.choice(("soins", "mecanique", "reconnaissance", "livraison")),
+        "priority": rng.choice(("low", "medium", "high", "critical")),
+        "location": f"Secteur {rng.randint(1, 500)}",
+        "weight": round(rng.uniform(0.1, 20), 1),
+    }
+
+
+async def drive(duration: float, concurrency: int, reads: float, seed: int) -> dict:
+    import httpx
+    from app.main import app
+
+    writes, read_timings, statuses, errors = [], [], Counter(), Counter()
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(client: httpx.AsyncClient, index: int):
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if rng.random() < reads:
+                    response = await client.get("/api/missions/", params={"limit": 20})
+                    read_timings.append(time.perf_counter() - start)
+                elif rng.random() < 0.5:
+                    response = await client.post("/api/missions/", json=_mission(rng))
+                    writes.append(time.perf_counter() - start)
+                else:
+                    response = await client.post("/api/historique/", json={
+                        "mission_id": rng.randint(1, 1000), "drone_id": rng.randint(1, 50),
+                        "performance": "ok", "commentaires": "charge",
+                    })
+                    writes.append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+            except Exception as error:  # erreur remontée par l'application (verrou, pool...)
+                errors[type(error).__name__ + ": " + str(error).splitlines()[0][:80]] += 1
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            await asyncio.gather(*(client_loop(client, index) for index in range(concurrency)))
+    return {
+        "writes": writes, "reads": read_timings,
+        "statuses": dict(statuses), "errors": dict(errors),
+    }
+
+
+def _percentiles(timings) -> dict:
+    if not timings:
+        return {}
+    timings = sorted(timings)
+    pick = lambda q: round(timings[min(int(len(timings) * q), len(timings) - 1)] * 1000, 2)  # noqa: E731
+    return {"p50_ms": round(statistics.median(timings) * 1000, 2), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+def run_mode(name: str, source: str, directory: str, args) -> dict:
+    path = os.path.join(directory, f"{name}.db")
+    shutil.copy(source, path)
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", SCHEDULER_ENABLED="0", **MODES[name])
+    command = [sys.executable, "-m", "benchmarks.bench_sqlite_writes", "--worker",
+               "--duration", str(args.duration), "--concurrency", str(args.concurrency), "--reads", str(args.reads)]
+    workers = [
+        subprocess.Popen(command + ["--seed", str(index)], cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, text=True)
+        for index in range(args.processes)
+    ]
+    outputs = [json.loads(worker.communicate()[0]) for worker in workers]
+    writes = [t for output in outputs for t in output["writes"]]
+    reads = [t for output in outputs for t in output["reads"]]
+    statuses, errors = Counter(), Counter()
+    for output in outputs:
+        statuses.update(output["statuses"])
+        errors.update(output["errors"])
+    ok = sum(count for status, count in statuses.items() if int(status) < 400)
+    return {
+        "mode": name,
+        "ecritures_s": round(len(writes) / args.duration, 1),
+        "reponses_ok": ok,
+        "statuts": dict(statuses),
+        "erreurs": dict(errors),
+        "ecritures": _percentiles(writes),
+        "lectures": _percentiles(reads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="volume de la base initiale")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32, help="clients par processus")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--reads", type=float, default=0.2, help="part des requêtes en lecture")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(drive(args.duration, args.concurrency, args.reads, args.seed))))
+        return
+
+    directory = tempfile.mkdtemp()
+    source = os.path.join(directory, "source.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{source}"
+    # L'application lit DATABASE_URL à l'import : imports après la configuration
+    from sqlalchemy import create_engine
+    from app import migrations
+    from benchmarks.seed import seed
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    migrations.upgrade(engine)
+    seed(engine, rows=args.rows)
+    engine.dispose()
+
+    results = []
+    for name in args.modes:
+        result = run_mode(name, source, directory, args)
+        print(result)
+        results.append(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
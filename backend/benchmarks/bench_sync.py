@@ -0,0 +1,143 @@
+"""
+Compare une synchronisation incrémentale (GET /api/missions/changes?since=) au
+rechargement complet de la liste des missions (GET /api/missions/ paginé).
+
+    python -m benchmarks.bench_sync --rows 1000000 --changes 100 --json resultats.json
+
+Après une synchronisation complète, `--changes` missions sont modifiées et `--deletes`
+(créées pour l'occasion) supprimées par l'API ; on mesure alors la durée et les octets transférés du delta et du
+rechargement complet. Un delta vide (aucun changement) mesure le coût fixe d'un appel.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+PAGE = 5000
+
+
+async def _full_reload(client) -> tuple:
+    """Toutes les missions par pages de PAGE, via le curseur X-Next-Cursor"""
+    size, count, cursor = 0, 0, None
+    while True:
+        params = {"limit": PAGE}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/missions/", params=params)
+        size += len(response.content)
+        count += len(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return size, count
+
+
+async def _delta(client, token: str) -> tuple:
+    size, changes, deleted = 0, 0, 0
+    while True:
+        response = await client.get("/api/missions/changes", params={"since": token, "limit": PAGE})
+        body = response.json()
+        size += len(response.content)
+        changes += len(body["changes"])
+        deleted += len(body["deleted"])
+        token = body["token"]
+        if not body["has_more"]:
+            return size, changes, deleted, token
+
+
+async def run(rows: int, changes: int, deletes: int, repeat: int) -> dict:
+    import httpx
+    from app.main import app
+    from app.services import sync
+
+    rng = random.Random(0)
+    results = {"missions": rows, "modifiees": changes, "supprimees": deletes}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        # Missions à supprimer créées sans historique (une mission avec historique ne se supprime pas)
+        removable = []
+        for index in range(deletes):
+            response = await client.post("/api/missions/", json={
+                "title": f"Temporaire {index}", "category": "livraison", "priority": "low", "location": "Bench",
+            })
+            removable.append(response.json()["mission_id"])
+
+        start = time.perf_counter()
+        token = None
+        while True:
+            params = {"limit": PAGE} if token is None else {"since": token, "limit": PAGE}
+            body = (await client.get("/api/missions/changes", params=params)).json()
+            token = body["token"]
+            if not body["has_more"]:
+                break
+        results["synchro_initiale_s"] = round(time.perf_counter() - start, 3)
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            empty = await _delta(client, token)
+            timings.append(time.perf_counter() - start)
+        results["delta_vide_ms"] = round(min(timings) * 1000, 3)
+        results["delta_vide_octets"] = empty[0]
+
+        # Attendre la fin de la fenêtre de relecture pour que le delta ne compte que les changements
+        await asyncio.sleep(sync.SYNC_OVERLAP + 0.1)
+        token = empty[3]
+        for mission_id in rng.sample(range(1, rows + 1), changes):
+            await client.patch(f"/api/missions/{mission_id}", json={"title": f"Modifiée {mission_id}"})
+        for mission_id in removable:
+            await client.delete(f"/api/missions/{mission_id}")
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            delta = await _delta(client, token)
+            timings.append(time.perf_counter() - start)
+        results["delta_ms"] = round(min(timings) * 1000, 3)
+        results["delta_octets"] = delta[0]
+        results["delta_lignes"] = delta[1]
+        results["delta_suppressions"] = delta[2]
+
+        start = time.perf_counter()
+        full = await _full_reload(client)
+        results["rechargement_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        results["rechargement_octets"] = full[0]
+        results["rechargement_lignes"] = full[1]
+    results["gain_temps"] = round(results["rechargement_ms"] / results["delta_ms"], 1)
+    results["gain_octets"] = round(results["rechargement_octets"] / results["delta_octets"], 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=100, help="missions modifiées entre deux synchronisations")
+    parser.add_argument("--deletes", type=int, default=10, help="missions supprimées entre deux synchronisations")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_sync.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["SCHEDULER_ENABLED"] = "0"
+    # L'application lit DATABASE_URL à l'import : imports après la configuration
+    from sqlalchemy import create_engine
+    from app import migrations
+    from benchmarks.seed import seed
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    migrations.upgrade(engine)
+    seed(engine, rows=args.rows)
+    engine.dispose()
+
+    results = asyncio.run(run(args.rows, args.changes, args.deletes, args.repeat))
+    print(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
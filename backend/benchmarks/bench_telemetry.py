@@ -0,0 +1,130 @@
+"""
+Mesure l'ingestion de télémétrie : débit soutenu pour une flotte à fréquence donnée,
+écriture en lot dans les partitions et lectures (dernière position, trajectoire).
+
+    python -m benchmarks.bench_telemetry --drones 1000 --hz 10 --seconds 10 --json resultats.json
+
+Chaque seconde simulée, chaque drone émet `--hz` échantillons, envoyés par lots de
+`--batch` sur POST /api/telemetrie (ASGI, dans le processus) ; la file d'écriture est vidée
+une fois par seconde simulée, comme la tâche périodique. Le temps CPU du processus
+(process_time, thread SQLite compris) rapporté à la durée simulée donne la part d'un cœur
+nécessaire : en dessous de 1, la charge tient sur un seul cœur.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def _us(seconds: float, count: int) -> float:
+    return round(seconds / count * 1e6, 3)
+
+
+def _fleet_second(rng, drones: int, hz: int, t0: float) -> list:
+    """Échantillons d'une seconde de vol de toute la flotte, dans l'ordre d'émission"""
+    samples = []
+    for tick in range(hz):
+        ts = t0 + tick / hz
+        for drone_id in range(1, drones + 1):
+            samples.append({
+                "drone_id": drone_id, "ts": ts,
+                "lat": 48.8 + rng.random() * 0.1, "lon": 2.3 + rng.random() * 0.1,
+                "altitude": 120.0, "vitesse": 45.0, "batterie": 80.0,
+            })
+    return samples
+
+
+async def run(drones: int, hz: int, seconds: int, batch: int) -> dict:
+    import httpx
+    import orjson
+    from app.main import app
+    from app.services import telemetry
+    from app.services.telemetry import store
+
+    rng = random.Random(0)
+    t0 = time.time() - seconds
+    payloads = []
+    for second in range(seconds):
+        samples = _fleet_second(rng, drones, hz, t0 + second)
+        payloads.append([orjson.dumps(samples[i:i + batch]) for i in range(0, len(samples), batch)])
+    total = drones * hz * seconds
+    results = {"drones": drones, "hz": hz, "secondes": seconds, "lot": batch, "echantillons": total}
+
+    store.started_at = t0
+    transport = httpx.ASGITransport(app=app)
+    flushes = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        cpu, wall = time.process_time(), time.perf_counter()
+        for second in payloads:
+            for body in second:
+                response = await client.post("/api/telemetrie/", content=body,
+                                             headers={"content-type": "application/json"})
+                assert response.status_code == 202, response.text
+            start = time.perf_counter()
+            await store.flush()
+            flushes.append(time.perf_counter() - start)
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    results["http_cpu_par_seconde_simulee"] = round(cpu / seconds, 3)
+    results["http_debit_echantillons_s"] = round(total / wall)
+    results["vidage_ms_median"] = round(statistics.median(flushes) * 1000, 2)
+
+    # Coût du seul chemin d'ingestion (analyse JSON + tampons), sans HTTP : message WebSocket
+    bodies = [body for second in payloads for body in second]
+    start = time.process_time()
+    for body in bodies:
+        store.ingest(telemetry.parse_body(body), source="bench")
+    results["ingestion_us_par_echantillon"] = _us(time.process_time() - start, total)
+    store.pending.clear()
+
+    # Lectures
+    ids = [rng.randint(1, drones) for _ in range(100_000)]
+    start = time.perf_counter()
+    for drone_id in ids:
+        store.position(drone_id)
+    results["derniere_position_us"] = _us(time.perf_counter() - start, len(ids))
+    until = t0 + seconds
+    for label, since in (("memoire", until - seconds / 2), ("base", until - seconds)):
+        if label == "base":
+            # Tampons vidés : la même fenêtre est relue dans les partitions
+            store.buffers.clear()
+        timings = []
+        for drone_id in ids[:50]:
+            start = time.perf_counter()
+            source, points = await store.history(drone_id, since, until, 1.0)
+            timings.append(time.perf_counter() - start)
+        results[f"trajectoire_{label}_ms"] = round(statistics.median(timings) * 1000, 3)
+        results[f"trajectoire_{label}_source"] = source
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=1000)
+    parser.add_argument("--hz", type=int, default=10, help="échantillons par drone et par seconde")
+    parser.add_argument("--seconds", type=int, default=10, help="durée simulée")
+    parser.add_argument("--batch", type=int, default=500, help="échantillons par requête HTTP")
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_telemetry.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["SCHEDULER_ENABLED"] = "0"
+    # L'application lit DATABASE_URL à l'import : imports après la configuration
+    from sqlalchemy import create_engine
+    from app import migrations
+
+    migrations.upgrade(create_engine(os.environ["DATABASE_URL"]))
+
+    results = asyncio.run(run(args.drones, args.hz, args.seconds, args.batch))
+    print(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Test de charge de l'API : latences (p50, p95, p99) et débit par scénario.
+
+    python -m benchmarks.load_test --rows 10000 100000 1000000 --mode both --json resultats.json
+
+Pour chaque volume, une base SQLite temporaire est migrée et remplie (benchmarks.seed),
+puis chaque scénario tourne `--duration` secondes avec `--concurrency` clients :
+- en processus : httpx.ASGITransport, sans réseau ni sérialisation HTTP ;
+- via uvicorn : serveur lancé dans un sous-processus, requêtes HTTP sur localhost.
+
+Scénarios :
+- dashboard : lectures du tableau de bord (statistiques, dernières missions, drones, zones) ;
+- creation : rafales de créations de missions, unitaires et en lot ;
+- statuts : mises à jour de statut, unitaires et en lot ;
+- mixte : 80 % dashboard, 10 % creation, 10 % statuts.
+
+Le JSON produit (commit, paramètres, résultats par volume, mode et scénario)
+est fait pour être comparé d'un commit à l'autre.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+
+SCENARIOS = ("dashboard", "creation", "statuts", "mixte")
+MIX = {"dashboard": 80, "creation": 10, "statuts": 10}
+STATUTS = ("pending", "in-progress", "completed", "failed")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+Request = Tuple[str, str, str, dict]  # nom, méthode, URL, arguments httpx
+
+
+def _mission(rng: random.Random) -> dict:
+    return {
+        "title": f"Charge {rng.randint(1, 10**9)}",
+        "category": rng.choice(("soins", "mecanique", "reconnaissance", "livraison")),
+        "priority": rng.choice(("low", "medium", "high", "critical")),
+        "location": f"Secteur {rng.randint(1, 500)}",
+        "weight": round(rng.uniform(0.1, 20), 1),
+    }
+
+
+def request_factories(missions: int) -> Dict[str, List[Tuple[int, Callable[[random.Random], Request]]]]:
+    """Requêtes pondérées de chaque scénario élémentaire"""
+    return {
+        "dashboard": [
+            (3, lambda rng: ("GET /api/stats/", "GET", "/api/stats/", {})),
+            (3, lambda rng: ("GET /api/missions/?limit=5", "GET", "/api/missions/", {"params": {"limit": 5, "order": "desc"}})),
+            (2, lambda rng: ("GET /api/drones/", "GET", "/api/drones/", {})),
+            (1, lambda rng: ("GET /api/drones/disponibles", "GET", "/api/drones/disponibles", {})),
+            (1, lambda rng: ("GET /api/zones/", "GET", "/api/zones/", {})),
+            (1, lambda rng: (
+                "GET /api/missions/{id}", "GET", f"/api/missions/{rng.randint(1, missions)}", {}
+            )),
+        ],
+        "creation": [
+            (9, lambda rng: ("POST /api/missions/", "POST", "/api/missions/", {"json": _mission(rng)})),
+            (1, lambda rng: (
+                "POST /api/missions/bulk", "POST", "/api/missions/bulk",
+                {"params": {"assign": "false"}, "json": [_mission(rng) for _ in range(100)]},
+            )),
+        ],
+        "statuts": [
+            (9, lambda rng: (
+                "PATCH /api/missions/{id}", "PATCH", f"/api/missions/{rng.randint(1, missions)}",
+                {"json": {"status": rng.choice(STATUTS)}},
+            )),
+            (1, lambda rng: (
+                "PATCH /api/missions/bulk", "PATCH", "/api/missions/bulk",
+                {"json": [
+                    {"mission_id": rng.randint(1, missions), "status": rng.choice(STATUTS)} for _ in range(50)
+                ]},
+            )),
+        ],
+    }
+
+
+def scenario_picker(scenario: str, missions: int) -> Callable[[random.Random], Request]:
+    factories = request_factories(missions)
+    if scenario == "mixte":
+        weighted = [
+            (share * weight / sum(w for w, _ in factories[name]), factory)
+            for name, share in MIX.items()
+            for weight, factory in factories[name]
+        ]
+    else:
+        weighted = factories[scenario]
+    weights = [w for w, _ in weighted]
+    choices = [f for _, f in weighted]
+    return lambda rng: rng.choices(choices, weights)[0](rng)
+
+
+def percentiles(timings: List[float]) -> dict:
+    if not timings:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(int(len(timings) * 0.95), len(timings) - 1)], 3),
+        "p99_ms": round(timings[min(int(len(timings) * 0.99), len(timings) - 1)], 3),
+    }
+
+
+async def drive(client: httpx.AsyncClient, scenario: str, missions: int, duration: float, concurrency: int, seed: int) -> dict:
+    """Lance `concurrency` clients en boucle fermée pendant `duration` secondes"""
+    pick = scenario_picker(scenario, missions)
+    timings: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int):
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < deadline:
+            name, method, url, kwargs = pick(rng)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            timings.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+            if failed:
+                errors[name] = errors.get(name, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    every = [t for values in timings.values() for t in values]
+    return {
+        "requests": len(every),
+        "errors": sum(errors.values()),
+        "rps": round(len(every) / elapsed, 1),
+        **percentiles(every),
+        "endpoints": {
+            name: {"requests": len(values), "errors": errors.get(name, 0), **percentiles(values)}
+            for name, values in sorted(timings.items())
+        },
+    }
+
+
+async def run_scenarios(client: httpx.AsyncClient, args, missions: int) -> dict:
+    results = {}
+    for scenario in args.scenarios:
+        await drive(client, scenario, missions, min(args.warmup, args.duration), args.concurrency, args.seed)
+        results[scenario] = await drive(client, scenario, missions, args.duration, args.concurrency, args.seed)
+    return results
+
+
+def inprocess_worker(args) -> dict:
+    """Exécuté dans un sous-processus : DATABASE_URL doit être défini avant d'importer l'application"""
+    from app.main import app
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await run_scenarios(client, args, args.missions)
+
+    return asyncio.run(main())
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_uvicorn(args, env: dict, missions: int) -> dict:
+    port = _free_port()
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--port", str(port), "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+    ]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(200):
+            try:
+                if httpx.get(f"{base_url}/health").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("uvicorn n'a pas démarré")
+
+        async def main():
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                return await run_scenarios(client, args, missions)
+
+        return asyncio.run(main())
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def run_inprocess(args, env: dict, missions: int) -> dict:
+    command = [sys.executable, "-m", "benchmarks.load_test", "--worker", "--missions", str(missions),
+               "--duration", str(args.duration), "--warmup", str(args.warmup),
+               "--concurrency", str(args.concurrency), "--seed", str(args.seed), "--scenarios", *args.scenarios]
+    output = subprocess.run(command, cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def prepare_database(rows: int, directory: str, seed_value: int) -> Tuple[str, dict]:
+    from sqlalchemy import create_engine
+    from app import migrations
+    from benchmarks.seed import seed
+
+    path = os.path.join(directory, f"charge_{rows}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    migrations.upgrade(engine)
+    sizes = seed(engine, rows=rows, seed_value=seed_value)
+    engine.dispose()
+    return path, sizes
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnu"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000], help="volumes de missions à tester")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn", "both"), default="both")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=10.0, help="secondes mesurées par scénario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="secondes de chauffe non mesurées")
+    parser.add_argument("--concurrency", type=int, default=16, help="clients simultanés")
+    parser.add_argument("--workers", type=int, default=1, help="processus uvicorn")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dir", help="répertoire des bases (temporaire par défaut)")
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--missions", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(inprocess_worker(args)))
+        return
+
+    directory = args.dir or tempfile.mkdtemp()
+    modes = ("inprocess", "uvicorn") if args.mode == "both" else (args.mode,)
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "parametres": {key: value for key, value in vars(args).items() if key not in ("worker", "missions", "json")},
+        "resultats": [],
+    }
+    for rows in args.rows:
+        start = time.perf_counter()
+        path, sizes = prepare_database(rows, directory, args.seed)
+        print(f"{rows} missions : base remplie en {time.perf_counter() - start:.1f} s {sizes}", file=sys.stderr)
+        for mode in modes:
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", PYTHONPATH=BACKEND_DIR)
+            runner = run_inprocess if mode == "inprocess" else run_uvicorn
+            for scenario, result in runner(args, env, sizes["missions"]).items():
+                report["resultats"].append({"rows": rows, "mode": mode, "scenario": scenario, **result})
+                print(
+                    f"{rows:>9} {mode:<10}{scenario:<11}{result['rps']:>9.1f} req/s  "
+                    f"p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  p99 {result['p99_ms']:>8.2f} ms  "
+                    f"erreurs {result['errors']}",
+                    file=sys.stderr,
+                )
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            handle.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Vérifie le nombre de requêtes SQL émises par les routes d'écriture et de lecture.
+Une route qui répond en erreur (4xx, 5xx) fait aussi échouer le script.
+
+    python -m benchmarks.query_budget
+
+Chaque route est appelée dans le processus (TestClient) sur une base SQLite temporaire ;
+le script échoue (code de sortie 1) si une route dépasse son budget, ce qui signale
+un retour des relectures après commit ou des chargements paresseux (N+1).
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'query_budget.db')}")
+# Les tours du planificateur émettraient leurs requêtes pendant les mesures
+os.environ.setdefault("SCHEDULER_ENABLED", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.database import async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.querycount import QueryBudgetExceeded, count_queries  # noqa: E402
+
+DRONE = {"nom": "Budget", "poids_max": 5, "autonomie_max": 80, "vitesse_max": 60, "niveau_securite": 4}
+ZONE = {"nom_zone": "Budget", "type_zone": "urbaine", "risque": 2}
+MISSION = {
+    "title": "Budget", "category": "livraison", "priority": "high", "location": "Paris", "weight": 1,
+    "departure_lat": 48.85, "departure_lon": 2.35, "arrival_lat": 48.86, "arrival_lon": 2.36,
+}
+
+
+def scenario(client: TestClient):
+    """(nom, budget, appel) ; les appels s'enchaînent et réutilisent les IDs créés"""
+    ids = {}
+
+    def create(path, payload, key):
+        def call():
+            response = client.post(path, json=payload)
+            ids[key] = response.json()[key]
+            return response
+        return call
+
+    return [
+        # INSERT
+        ("POST /api/drones/", 1, create("/api/drones/", DRONE, "drone_id")),
+        # UPDATE ... RETURNING
+        ("PATCH /api/drones/{id}", 1, lambda: client.patch(f"/api/drones/{ids['drone_id']}", json={"nom": "B2"})),
+        ("GET /api/drones/{id}", 1, lambda: client.get(f"/api/drones/{ids['drone_id']}")),
+        # statistiques (absentes : pas encore d'historique), puis le drone ; compteurs à zéro
+        ("GET /api/stats/drones/{id}", 2, lambda: client.get(f"/api/stats/drones/{ids['drone_id']}")),
+        ("POST /api/zones/", 1, create("/api/zones/", ZONE, "zone_id")),
+        ("PATCH /api/zones/{id}", 1, lambda: client.patch(f"/api/zones/{ids['zone_id']}", json={"risque": 3})),
+        ("GET /api/stats/zones/{id}", 2, lambda: client.get(f"/api/stats/zones/{ids['zone_id']}")),
+        # drones disponibles, UPDATE du drone attribué, INSERT
+        ("POST /api/missions/", 3, create("/api/missions/", MISSION, "mission_id")),
+        ("PATCH /api/missions/{id}", 1, lambda: client.patch(f"/api/missions/{ids['mission_id']}", json={"title": "B3"})),
+        # mission, puis son drone (selectinload) ; l'index des zones est déjà chargé
+        ("GET /api/missions/{id}/route", 2, lambda: client.get(f"/api/missions/{ids['mission_id']}/route")),
+        ("POST /api/historique/", 1, create(
+            "/api/historique/", {"mission_id": 1, "drone_id": 1, "performance": "réussie"}, "historique_id"
+        )),
+        ("PATCH /api/historique/{id}", 1, lambda: client.patch(
+            f"/api/historique/{ids['historique_id']}", json={"commentaires": "ok"}
+        )),
+        # DELETE ... RETURNING
+        ("DELETE /api/historique/{id}", 1, lambda: client.delete(f"/api/historique/{ids['historique_id']}")),
+    ]
+
+
+def main() -> int:
+    failures = 0
+    with TestClient(app) as client:
+        # Charge les index des zones et d'éligibilité une fois pour ne pas les compter dans les routes
+        client.get("/api/zones/localisation", params={"lat": 0, "lon": 0})
+        client.get("/api/drones/eligibles")
+        # Détection (une fois par processus) des triggers des statistiques
+        client.get("/api/stats/drones")
+        for name, budget, call in scenario(client):
+            with count_queries(async_engine) as counter:
+                response = call()
+            status = "ok"
+            if response.status_code >= 400:
+                status = f"HTTP {response.status_code}"
+                failures += 1
+            else:
+                try:
+                    counter.assert_at_most(budget)
+                except QueryBudgetExceeded as error:
+                    status = str(error)
+                    failures += 1
+            print(f"{name:<32}{counter.count:>3} / {budget:<3}{status}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
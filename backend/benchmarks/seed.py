@@ -0,0 +1,161 @@
+"""
+Génération de données de test volumineuses.
+
+Les lignes sont insérées par lots avec executemany, directement sur les tables
+SQLAlchemy Core, pour pouvoir remplir une base d'un million de missions en
+quelques dizaines de secondes.
+"""
+import random
+from datetime import datetime, timedelta
+from app.models import Drone, HistoriqueMission, Mission, ZoneDeVol
+from app.models import MissionCategory, Priority, Risk, StatutDrone, StatutMission, TypeZone
+
+BATCH_SIZE = 50_000
+START = datetime(2024, 1, 1)
+ORIGINE = (48.75, 2.25)  # coin sud-ouest de la carte (région parisienne)
+ETENDUE = 0.2  # côté de la carte en degrés, environ 20 km
+
+# Répartition réaliste : la plupart des missions sont terminées
+STATUS_WEIGHTS = {
+    StatutMission.COMPLETED.value: 85,
+    StatutMission.FAILED.value: 5,
+    StatutMission.IN_PROGRESS.value: 5,
+    StatutMission.PENDING.value: 5,
+}
+DRONE_STATUT_WEIGHTS = {
+    StatutDrone.DISPONIBLE.value: 30,
+    StatutDrone.EN_MISSION.value: 50,
+    StatutDrone.EN_MAINTENANCE.value: 15,
+    StatutDrone.HORS_SERVICE.value: 5,
+}
+PERFORMANCES = ("réussie", "retard", "échec")
+# Vocabulaire des descriptions et commentaires (recherche plein texte)
+VOCABULAIRE = (
+    "médicaments", "vaccins", "sang", "eau", "potable", "vivres", "rations", "pansements", "défibrillateur",
+    "insuline", "oxygène", "hôpital", "clinique", "école", "gymnase", "pont", "route", "coupée", "inondée",
+    "effondrée", "évacuation", "blessés", "sinistrés", "abri", "toiture", "secteur", "nord", "sud", "est",
+    "ouest", "quartier", "centre", "périphérie", "urgence", "sécurité", "reconnaissance", "photos", "thermique",
+    "inspection", "antenne", "relais", "batterie", "pièces", "moteur", "réparation", "livraison", "colis",
+    "retard", "météo", "vent", "pluie", "brouillard", "atterrissage", "décollage", "zone", "interdite",
+)
+
+
+def _text(rng, low: int, high: int) -> str:
+    return " ".join(rng.choices(VOCABULAIRE, k=rng.randint(low, high)))
+
+
+def scale(rows: int) -> dict:
+    """Taille de chaque table pour un volume de missions donné"""
+    return {
+        "zones": max(rows // 1000, 10),
+        "drones": max(rows // 100, 10),
+        "missions": rows,
+        "historique": rows,
+    }
+
+
+def _insert(connection, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            connection.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        connection.execute(table.insert(), batch)
+
+
+def _point(rng):
+    return ORIGINE[0] + rng.random() * ETENDUE, ORIGINE[1] + rng.random() * ETENDUE
+
+
+def _zones(rng, count):
+    types = [t.value for t in TypeZone]
+    for zone_id in range(1, count + 1):
+        lat, lon = _point(rng)
+        size = rng.uniform(0.002, 0.01)
+        yield {
+            "zone_id": zone_id,
+            "nom_zone": f"Zone {zone_id}",
+            "type_zone": rng.choice(types),
+            "risque": rng.randint(1, 5),
+            "restrictions": None,
+            "polygone": [[lat, lon], [lat + size, lon], [lat + size, lon + size], [lat, lon + size]],
+        }
+
+
+def _drones(rng, count, zones):
+    statuts, weights = zip(*DRONE_STATUT_WEIGHTS.items())
+    for drone_id in range(1, count + 1):
+        yield {
+            "drone_id": drone_id,
+            "nom": f"Drone {drone_id}",
+            "poids_max": round(rng.uniform(0.5, 25), 1),
+            "autonomie_max": round(rng.uniform(5, 120), 1),
+            "vitesse_max": round(rng.uniform(30, 150), 1),
+            "niveau_securite": rng.randint(1, 5),
+            "statut": rng.choices(statuts, weights)[0],
+            "zone_vol_autorisee": ", ".join(f"Zone {rng.randint(1, zones)}" for _ in range(3)),
+        }
+
+
+def _missions(rng, count, drones, zones):
+    categories = [c.value for c in MissionCategory]
+    priorities = [p.value for p in Priority]
+    risks = [r.value for r in Risk]
+    statuses, weights = zip(*STATUS_WEIGHTS.items())
+    for mission_id in range(1, count + 1):
+        status = rng.choices(statuses, weights)[0]
+        created_at = START + timedelta(seconds=mission_id * 30)
+        departure, arrival = _point(rng), _point(rng)
+        yield {
+            "mission_id": mission_id,
+            "title": f"Mission {mission_id}",
+            "category": rng.choice(categories),
+            "drone_id": None if status == StatutMission.PENDING.value else str(rng.randint(1, drones)),
+            "priority": rng.choice(priorities),
+            "status": status,
+            "risk": rng.choice(risks),
+            "location": f"Secteur {rng.randint(1, 500)}",
+            "description": _text(rng, 4, 10),
+            "estimated_duration": rng.randint(5, 90),
+            "weight": round(rng.uniform(0.1, 20), 1),
+            "start_date": None,
+            "departure": None,
+            "arrival": None,
+            "zone_id": rng.randint(1, zones),
+            "departure_lat": departure[0],
+            "departure_lon": departure[1],
+            "arrival_lat": arrival[0],
+            "arrival_lon": arrival[1],
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def _historique(rng, count, missions, drones):
+    for historique_id in range(1, count + 1):
+        yield {
+            "historique_id": historique_id,
+            "mission_id": rng.randint(1, missions),
+            "drone_id": rng.randint(1, drones),
+            "date": START + timedelta(seconds=historique_id * 30 + rng.randint(0, 3600)),
+            "performance": rng.choice(PERFORMANCES),
+            "commentaires": _text(rng, 2, 6),
+        }
+
+
+def seed(engine, rows: int = 10_000, seed_value: int = 42) -> dict:
+    """Remplit une base vide (schéma déjà migré) et retourne le nombre de lignes par table"""
+    rng = random.Random(seed_value)
+    sizes = scale(rows)
+    with engine.begin() as connection:
+        _insert(connection, ZoneDeVol.__table__, _zones(rng, sizes["zones"]))
+        _insert(connection, Drone.__table__, _drones(rng, sizes["drones"], sizes["zones"]))
+        _insert(connection, Mission.__table__, _missions(rng, sizes["missions"], sizes["drones"], sizes["zones"]))
+        _insert(
+            connection,
+            HistoriqueMission.__table__,
+            _historique(rng, sizes["historique"], sizes["missions"], sizes["drones"]),
+        )
+    return sizes
@@ -0,0 +1,40 @@
+import 'mission.dart';
+
+class MissionStats {
+  final int totalMissions;
+  final Map<String, int> missionsByStatus;
+  final Map<String, int> missionsByCategory;
+  final Map<String, int> missionsByPriority;
+  final int totalDrones;
+  final Map<String, int> dronesByStatut;
+  final double droneUtilisation;
+
+  const MissionStats({
+    this.totalMissions = 0,
+    this.missionsByStatus = const {},
+    this.missionsByCategory = const {},
+    this.missionsByPriority = const {},
+    this.totalDrones = 0,
+    this.dronesByStatut = const {},
+    this.droneUtilisation = 0,
+  });
+
+  int countByStatus(MissionStatus status) => missionsByStatus[status.value] ?? 0;
+
+  static Map<String, int> _counts(dynamic json) {
+    if (json == null) return const {};
+    return (json as Map<String, dynamic>).map((key, value) => MapEntry(key, value as int));
+  }
+
+  factory MissionStats.fromJson(Map<String, dynamic> json) {
+    return MissionStats(
+      totalMissions: json['total_missions'],
+      missionsByStatus: _counts(json['missions_by_status']),
+      missionsByCategory: _counts(json['missions_by_category']),
+      missionsByPriority: _counts(json['missions_by_priority']),
+      totalDrones: json['total_drones'],
+      dronesByStatut: _counts(json['drones_by_statut']),
+      droneUtilisation: (json['drone_utilisation'] as num).toDouble(),
+    );
+  }
+}
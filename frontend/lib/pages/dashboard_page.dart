@@ -2,6 +2,7 @@ import 'package:flutter/material.dart';
 import 'package:flutter/services.dart';
 import 'package:fl_chart/fl_chart.dart';
 import '../models/mission.dart';
+import '../models/stats.dart';
 import '../services/api_service.dart';
 import 'dart:math';
 
@@ -15,6 +16,7 @@ class DashboardPage extends StatefulWidget {
 class _DashboardPageState extends State<DashboardPage> with TickerProviderStateMixin {
   final ApiService _apiService = ApiService();
   List<Mission> _missions = [];
+  MissionStats _stats = const MissionStats();
   bool _isLoading = true;
   
   late AnimationController _mainAnimationController;
@@ -67,9 +69,14 @@ class _DashboardPageState extends State<DashboardPage> with TickerProviderStateM
 
   Future<void> _loadMissions() async {
     try {
-      final missions = await _apiService.getMissions();
+      // Les compteurs sont calculés côté serveur : seules les 5 dernières missions créées sont téléchargées
+      final results = await Future.wait([
+        _apiService.getStats(),
+        _apiService.getMissions(limit: 5, recentFirst: true),
+      ]);
       setState(() {
-        _missions = missions;
+        _stats = results[0] as MissionStats;
+        _missions = results[1] as List<Mission>;
         _isLoading = false;
       });
     } catch (e) {
@@ -151,8 +158,8 @@ class _DashboardPageState extends State<DashboardPage> with TickerProviderStateM
   }
 
   Widget _buildWelcomeSection(ThemeData theme) {
-    final completedMissions = _missions.where((m) => m.status == MissionStatus.completed).length;
-    final activeMissions = _missions.where((m) => m.status == MissionStatus.inProgress).length;
+    final completedMissions = _stats.countByStatus(MissionStatus.completed);
+    final activeMissions = _stats.countByStatus(MissionStatus.inProgress);
     
     return Container(
       padding: const EdgeInsets.all(24),
@@ -313,10 +320,10 @@ class _DashboardPageState extends State<DashboardPage> with TickerProviderStateM
   }
 
   Widget _buildStatsGrid(ThemeData theme) {
-    final totalMissions = _missions.length;
-    final completedMissions = _missions.where((m) => m.status == MissionStatus.completed).length;
-    final activeMissions = _missions.where((m) => m.status == MissionStatus.inProgress).length;
-    final pendingMissions = _missions.where((m) => m.status == MissionStatus.pending).length;
+    final totalMissions = _stats.totalMissions;
+    final completedMissions = _stats.countByStatus(MissionStatus.completed);
+    final activeMissions = _stats.countByStatus(MissionStatus.inProgress);
+    final pendingMissions = _stats.countByStatus(MissionStatus.pending);
 
     final stats = [
       StatCard(
@@ -683,7 +690,7 @@ class _DashboardPageState extends State<DashboardPage> with TickerProviderStateM
   }
 
   Widget _buildStatusPieChart(ThemeData theme) {
-    final totalMissions = _missions.length;
+    final totalMissions = _stats.totalMissions;
     if (totalMissions == 0) {
       return Container(
         height: 300,
@@ -710,9 +717,9 @@ class _DashboardPageState extends State<DashboardPage> with TickerProviderStateM
       );
     }
 
-    final completedPercent = (_missions.where((m) => m.status == MissionStatus.completed).length / totalMissions * 100);
-    final activePercent = (_missions.where((m) => m.status == MissionStatus.inProgress).length / totalMissions * 100);
-    final plannedPercent = (_missions.where((m) => m.status == MissionStatus.pending).length / totalMissions * 100);
+    final completedPercent = (_stats.countByStatus(MissionStatus.completed) / totalMissions * 100);
+    final activePercent = (_stats.countByStatus(MissionStatus.inProgress) / totalMissions * 100);
+    final plannedPercent = (_stats.countByStatus(MissionStatus.pending) / totalMissions * 100);
 
     return Container(
       height: 300,
@@ -6,6 +6,7 @@ import '../models/mission.dart';
 import '../models/drone.dart';
 import '../models/zone_vol.dart';
 import '../models/historique.dart';
+import '../models/stats.dart';
 
 class ApiService {
   // Détection automatique de l'URL selon la plateforme
@@ -53,10 +54,15 @@ class ApiService {
     }
   }
 
-  Future<List<Mission>> getMissions() async {
+  Future<List<Mission>> getMissions({int? limit, bool recentFirst = false}) async {
+    // recentFirst : les dernières missions créées d'abord (order=desc)
+    final query = [
+      if (limit != null) 'limit=$limit',
+      if (recentFirst) 'order=desc',
+    ].join('&');
     try {
       final response = await http.get(
-        Uri.parse('$baseUrl/api/missions/'),
+        Uri.parse('$baseUrl/api/missions/${query.isNotEmpty ? '?$query' : ''}'),
         headers: {
           'Content-Type': 'application/json',
         },
@@ -118,6 +124,28 @@ class ApiService {
     }
   }
 
+  // === STATISTIQUES ===
+  Future<MissionStats> getStats() async {
+    try {
+      final response = await http.get(
+        Uri.parse('$baseUrl/api/stats/'),
+        headers: {
+          'Content-Type': 'application/json',
+        },
+      );
+
+      if (response.statusCode == 200) {
+        return MissionStats.fromJson(json.decode(response.body));
+      } else {
+        throw Exception(
+          'Erreur lors de la récupération des statistiques: ${response.statusCode}',
+        );
+      }
+    } catch (e) {
+      throw Exception('Erreur de connexion au serveur: $e');
+    }
+  }
+
   // === DRONES ===
   Future<List<Drone>> getDrones() async {
     try {